@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import pyopencl as cl
+import json
+import os
+import tempfile
+
+from registry import get_kernel_info
+from programcache import CACHE_DIR
+from sampling import AdaptiveSampler
+
+TUNING_FILE = os.path.join(CACHE_DIR, 'tuning.json')
+MAX_WAVES = 256 # maximum number of work-groups per compute unit
+
+# tuning only has to rank configurations, so a rough estimate of each is good enough
+TUNING_SAMPLER = AdaptiveSampler(precision = 0.05, max_runs = 20, time_budget = 0.2)
+
+def get_mem_size_bucket(mem_size):
+	"""
+	Returns the power of two the given memory size is rounded up to for tuning.
+	"""
+	bucket = 1
+	while bucket < mem_size:
+		bucket *= 2
+	return bucket
+
+class TuningCache:
+	"""
+	Persistent cache of the best global and local thread numbers.
+
+	Entries are keyed by device, driver, kernel and memory size bucket. If filename is None,
+	entries are only kept in memory.
+	"""
+
+	def __init__(self, filename = TUNING_FILE):
+		self.filename = filename
+		self.entries = self.load()
+
+	def get_key(self, device, kernelname, mem_size):
+		return '|'.join((device.name.strip(), device.driver_version.strip(), kernelname, str(get_mem_size_bucket(mem_size))))
+
+	def load(self):
+		if not self.filename:
+			return {}
+		try:
+			f = open(self.filename, 'r')
+		except IOError:
+			return {}
+		try:
+			return json.load(f)
+		except ValueError:
+			return {} # corrupt file, will be replaced on the next store
+		finally:
+			f.close()
+
+	def get(self, device, kernelname, mem_size):
+		"""
+		Returns the tuned (global_threads, local_threads) tuple or None.
+		"""
+		entry = self.entries.get(self.get_key(device, kernelname, mem_size))
+		return tuple(entry) if entry else None
+
+	def store(self, device, kernelname, mem_size, global_threads, local_threads):
+		key = self.get_key(device, kernelname, mem_size)
+		if not self.filename:
+			self.entries[key] = [global_threads, local_threads]
+			return
+
+		# merge with entries stored by concurrent runs in the meantime
+		self.entries = self.load()
+		self.entries[key] = [global_threads, local_threads]
+		directory = os.path.dirname(self.filename)
+		if not os.path.isdir(directory):
+			os.makedirs(directory)
+		fd, tmpname = tempfile.mkstemp(dir=directory)
+		f = os.fdopen(fd, 'w')
+		try:
+			json.dump(self.entries, f, indent=1, sort_keys=True)
+		finally:
+			f.close()
+		os.rename(tmpname, self.filename)
+
+	def clear(self):
+		self.entries = {}
+		if self.filename and os.path.exists(self.filename):
+			os.remove(self.filename)
+
+def get_local_candidates(runner, kernelname):
+	"""
+	Returns the powers of two the device and kernel support as local thread numbers.
+	"""
+	info = get_kernel_info(kernelname)
+	device = runner.device
+	kernel = runner.get_kernel(kernelname)
+	limit = min(device.max_work_group_size, device.max_work_item_sizes[0], kernel.get_work_group_info(cl.kernel_work_group_info.WORK_GROUP_SIZE, device))
+	if info.local:
+		limit = min(limit, device.local_mem_size / info.storage_size)
+	candidates = []
+	local_threads = 1
+	while local_threads <= limit:
+		candidates.append(local_threads)
+		local_threads *= 2
+	return candidates
+
+def tune(runner, kernelname, mem_size):
+	"""
+	Search the fastest global and local thread numbers for the given kernel and memory size.
+
+	Local thread numbers are powers of two up to the work-group size limit, global thread numbers
+	a power of two of work-groups per compute unit. A coarse search over every other power of two
+	of both is refined by walking to the fastest neighbouring configuration until none is faster.
+
+	Returns a tuple of global and local threads.
+	"""
+	info = get_kernel_info(kernelname)
+	compute_units = runner.device.max_compute_units
+	local_candidates = get_local_candidates(runner, kernelname)
+	waves = []
+	while 2 ** len(waves) <= MAX_WAVES:
+		waves.append(2 ** len(waves))
+
+	def get_config(point):
+		local_threads = local_candidates[point[0]]
+		return (local_threads * compute_units * waves[point[1]], local_threads)
+
+	times = {}
+	def measure(point):
+		if point not in times:
+			global_threads, local_threads = get_config(point)
+			# read kernels write one element per thread to the output buffer, checked as by Runner.prepare()
+			if global_threads * max(info.storage_size, info.elem_size) > runner.out_buf.tiles[0].size:
+				times[point] = float('inf')
+			else:
+				try:
+					datapoint = runner.benchmark(kernelname, mem_size, global_threads, local_threads, sampler = TUNING_SAMPLER)
+					times[point] = datapoint.time_median
+				except (ValueError, cl.RuntimeError, cl.LogicError):
+					# configurations the device cannot run are skipped by the search
+					times[point] = float('inf')
+		return times[point]
+
+	coarse = [(l, w) for l in range(0, len(local_candidates), 2) for w in range(0, len(waves), 2)]
+	best = min(coarse, key = measure)
+	while True:
+		neighbours = [(best[0] + dl, best[1] + dw) for dl in (-1, 0, 1) for dw in (-1, 0, 1)
+		              if 0 <= best[0] + dl < len(local_candidates) and 0 <= best[1] + dw < len(waves)]
+		candidate = min(neighbours, key = measure)
+		if measure(candidate) >= measure(best):
+			break
+		best = candidate
+
+	return get_config(best)
@@ -22,10 +22,51 @@ import pyopencl as cl
 import optparse
 
 from runner import *
+from multidevice import resolve_devices, run_on_devices
+from peak import PEAK_FILE, plot_peaks
+from results import ResultsRecorder
+from registry import RECONSTRUCTED_SIZES
+import baseline
+import sampling
+
+def run(runner, args):
+	# build all required kernels up front so the compile units get built in parallel
+	runner.build(runner.get_kernel_names(args.generated))
+
+	datapoints = []
+	# each process records the run on its own device
+	recorder = ResultsRecorder(args.database, runner, 'bandwidth.py') if args.database else None
+
+	requests = map(BenchmarkRequest, runner.get_kernel_names(args.generated))
+	for request, datapoint in runner.benchmark_many(requests):
+		if isinstance(datapoint, Exception):
+			# On Apples OpenCL retrieving the profiling information sometimes seems to fail for no good reason
+			# In addition, sometimes the queue becomes invalid
+			print 'Error benchmarking {0}: {1}'.format(request.kernel, datapoint)
+			continue
+		datapoints.append(datapoint)
+		if recorder:
+			recorder.write(datapoint)
+
+	if recorder:
+		recorder.close()
+
+	return datapoints
+
+def get_driver_baselines(datapoints, estimator):
+	"""
+	Returns a dict mapping (device, access) to the bandwidth of the driver pseudo-kernel of that access mode.
+	"""
+	baselines = {}
+	for datapoint in datapoints:
+		info = get_kernel_info(datapoint.kernel)
+		if is_driver(info):
+			baselines[(datapoint.device, info.access)] = get_bandwidth(datapoint, estimator)
+	return baselines
 
 if __name__ == '__main__':
 	parser = optparse.OptionParser(description='Benchmark global memory bandwidth')
-	parser.add_option('-d', '--device', type=int, metavar='I', help='The device to use for the measurement')
+	parser.add_option('-d', '--device', metavar='SEL', help='The device(s) to use for the measurement: a device index, PLATFORM:DEVICE, a comma separated list of those or all')
 	parser.add_option('-p', '--plot', action='store_true', default=False, help='Make a plot of the measurements')
 	parser.add_option('-e', '--plot-errorbars', action='store_true', default=False, help='Add error bars to the plot')
 	parser.add_option('-m', '--plot-marker', type=float, dest='plot_markers', action='append', metavar='GB/s', help='Add a marker to the plot at the given performance')
@@ -33,53 +74,130 @@ if __name__ == '__main__':
 	parser.add_option('-g', '--global-threads', type=int, metavar='NUM', help='The number of global threads to use')
 	parser.add_option('-l', '--local-threads', type=int, metavar='NUM', help='The number of global threads to use')
 	parser.add_option('-s', '--mem-size', type=int, metavar='BYTE', help='Memory size in byte')
+	parser.add_option('--estimator', choices=ESTIMATORS.keys(), default='mean', help='The estimator of the kernel time used for the bandwidth: {0} (default mean)'.format(', '.join(ESTIMATORS.keys())))
+	parser.add_option('--export', metavar='FILE', help='Export measurement results to a CSV file, or a binary file if it ends with .npy')
+	parser.add_option('--database', metavar='FILE', help='Record the run and its results in the given SQLite database, see queryResults.py')
+	parser.add_option('--baseline', metavar='FILE', help='Compare the measurements with those exported by a previous run and fail if any kernel got significantly slower')
+	parser.add_option('--regression-threshold', type=float, metavar='REL', default=baseline.THRESHOLD, help='Relative bandwidth loss of a kernel that fails the comparison with the baseline (default {0})'.format(baseline.THRESHOLD))
+	parser.add_option('--generated', action='store_true', default=False, help='Also benchmark the generated kernel variants')
+	parser.add_option('--no-build-cache', action='store_false', dest='build_cache', default=True, help='Always build the kernels from source instead of using cached binaries')
+	parser.add_option('--autotune', action='store_true', default=False, help='Search the fastest global and local thread numbers for each kernel and memory size not yet in the tuning cache')
+	parser.add_option('--no-tuning-cache', action='store_false', dest='tuning_cache', default=True, help='Neither use nor store tuned thread numbers across runs')
+	parser.add_option('--precision', type=float, metavar='REL', help='Repeat each measurement until the 95% confidence interval of the time is within +-REL of the mean (default {0})'.format(sampling.PRECISION))
+	parser.add_option('--max-runs', type=int, metavar='N', help='Never repeat a measurement more than N times (default {0})'.format(sampling.MAX_RUNS))
+	parser.add_option('--time-budget', type=float, metavar='SECONDS', help='Stop repeating a measurement once its runs took SECONDS (default {0})'.format(sampling.TIME_BUDGET))
+	parser.add_option('--peak-table', metavar='FILE', help='JSON file mapping device names to their peak bandwidth in GB/s (default {0})'.format(PEAK_FILE))
 
 	(args, rem) = parser.parse_args()
 
 	runner_args = {}
-	if args.device != None:
-		runner_args['device'] = args.device
 	if args.global_threads != None:
 		runner_args['global_threads'] = args.global_threads
 	if args.local_threads != None:
 		runner_args['local_threads'] = args.local_threads
 	if args.mem_size != None:
 		runner_args['max_mem_size'] = args.mem_size
-
-	runner = Runner(**runner_args)
-
-	datapoints = []
-
-	print '#Kernel Bytes nanos (rel err) GB/s'
-	for kernel in runner.get_kernel_names():
-		try:
-			datapoints.append(runner.benchmark(kernel))
-		except (cl.RuntimeError, cl.LogicError) as ex:
-			# On Apples OpenCL retrieving the profiling information sometimes seems to fail for no good reason
-			# In addition, sometimes the queue becomes invalid
-			print 'Error benchmarking {0}: {1}'.format(kernel, ex)
-
-
-	for datapoint in datapoints:
-		print '{0.kernel} {0.bytes_transferred} {0.time:.0f} ({1:.1%}) {0.bandwidth}'.format(datapoint, datapoint.time_std / datapoint.time)
+	if not args.build_cache:
+		runner_args['build_cache'] = False
+	if args.autotune:
+		runner_args['autotune'] = True
+	if not args.tuning_cache:
+		runner_args['tuning_cache'] = False
+	if args.peak_table:
+		runner_args['peak_table'] = args.peak_table
+	sampler_args = {}
+	if args.precision:
+		sampler_args['precision'] = args.precision
+	if args.max_runs:
+		sampler_args['max_runs'] = args.max_runs
+	if args.time_budget:
+		sampler_args['time_budget'] = args.time_budget
+	if sampler_args:
+		runner_args['sampler'] = sampling.AdaptiveSampler(**sampler_args)
+
+	devices = resolve_devices(args.device) if args.device != None else []
+	if len(devices) > 1:
+		datapoints = run_on_devices(devices, runner_args, run, args)
+	else:
+		if devices:
+			runner_args['device'] = devices[0]
+		datapoints = run(Runner(**runner_args), args)
+
+	if args.export:
+		write_datapoints(args.export, datapoints)
+
+	device_ids = unique(map(lambda p: p.device, datapoints))
+
+	if args.estimator != 'mean':
+		print '#Estimator: {0}'.format(args.estimator)
+	# copy and write kernels are rated against the driver's buffer copy and fill
+	baselines = get_driver_baselines(datapoints, args.estimator)
+	# compressed kernels additionally give the rate of reconstructed matrices and the bandwidth it corresponds to
+	print '#Kernel Bytes nanos (rel err) GB/s [of peak] (of driver) <Gmatrices/s effective GB/s>'
+	for device in device_ids:
+		if len(device_ids) > 1:
+			print '#Device: {0}'.format(device)
+		for datapoint in filter(lambda p: p.device == device, datapoints):
+			bandwidth = get_bandwidth(datapoint, args.estimator)
+			line = '{0.kernel} {0.bytes_transferred} {1:.0f} ({2:.1%}) {3}{4}'.format(datapoint, get_time(datapoint, args.estimator), datapoint.time_std / datapoint.time, bandwidth, format_efficiency(datapoint, args.estimator))
+			reference = baselines.get((device, get_kernel_info(datapoint.kernel).access))
+			if reference and not is_driver(get_kernel_info(datapoint.kernel)):
+				line += ' ({0:.0%})'.format(bandwidth / reference)
+			if datapoint.kernel in RECONSTRUCTED_SIZES:
+				rate = get_element_rate(datapoint, args.estimator)
+				line += ' <{0:.3f} {1:.1f}>'.format(rate, rate * RECONSTRUCTED_SIZES[datapoint.kernel])
+			print line
+
+	regressions = []
+	if args.baseline:
+		comparisons = baseline.compare(read_datapoints(args.baseline), datapoints)
+		regressions = filter(lambda c: baseline.is_regression(c, args.regression_threshold), comparisons)
+		print '#Baseline: {0}'.format(args.baseline)
+		print '#Kernel Bytes baseline GB/s -> GB/s (change)'
+		for comparison in comparisons:
+			old = comparison.baseline
+			if comparison.current == None:
+				print '{0.kernel} {0.mem_size} {0.bandwidth} -> missing REGRESSION'.format(old)
+				continue
+			if baseline.is_regression(comparison, args.regression_threshold):
+				verdict = ' REGRESSION'
+			elif baseline.is_improvement(comparison, args.regression_threshold):
+				verdict = ' improvement'
+			elif not comparison.significant:
+				verdict = ' (not significant)'
+			else:
+				verdict = ''
+			print '{0.kernel} {0.mem_size} {0.bandwidth} -> {1.bandwidth} ({2:+.1%}){3}'.format(old, comparison.current, comparison.change, verdict)
+		print '#{0} of {1} kernels regressed by more than {2:.0%}'.format(len(regressions), len(comparisons), args.regression_threshold)
 
 	if args.plot:
 		import matplotlib.pyplot as plt # by including it here we won't need it unless we want to plot
 
-		bandwidths = map(lambda p: p.bandwidth, datapoints)
-		xticks = map(lambda p: p.kernel, datapoints)
-		if args.plot_errorbars:
-			errs = map(lambda p: p.time_std / p.time * p.bandwidth, datapoints)
-		ind = np.arange(len(datapoints)) + 0.5
+		xticks = unique(map(lambda p: p.kernel, datapoints))
+		ind = np.arange(len(xticks)) + 0.5
+		width = 0.8 / len(device_ids) # bars of different devices are placed next to each other
 
-		plt.figure(figsize=(2 + len(datapoints) * .25,12))
+		plt.figure(figsize=(2 + len(xticks) * .25 * len(device_ids),12))
 		plt.axes([0.125,.4,.775,.5])
 		plt.title('Global Memory Bandwidth')
 		plt.ylabel('GB/s')
-		if args.plot_errorbars:
-			plt.bar(ind, bandwidths, align='center', yerr=errs, ecolor='black')
-		else:
-			plt.bar(ind, bandwidths, align='center')
+		for i, device in enumerate(device_ids):
+			device_points = filter(lambda p: p.device == device, datapoints)
+			bandwidths = map(lambda p: get_bandwidth(p, args.estimator), device_points)
+			pos = map(lambda p: ind[xticks.index(p.kernel)] + (i - (len(device_ids) - 1) / 2.) * width, device_points)
+			color = plt.cm.jet(float(i) / len(device_ids)) if len(device_ids) > 1 else None
+			if args.plot_errorbars:
+				if args.estimator == 'mean':
+					errs = map(lambda p: p.time_std / p.time * p.bandwidth, device_points)
+				else: # show the range between the 5th and the 95th percentile
+					lower = [max(b - get_bandwidth(p, 'p95'), 0) for p, b in zip(device_points, bandwidths)]
+					upper = [max(get_bandwidth(p, 'p5') - b, 0) for p, b in zip(device_points, bandwidths)]
+					errs = [lower, upper]
+				plt.bar(pos, bandwidths, width, align='center', yerr=errs, ecolor='black', color=color, label=device)
+			else:
+				plt.bar(pos, bandwidths, width, align='center', color=color, label=device)
+		if len(device_ids) > 1:
+			plt.legend(loc='upper right')
 
 		# handle markers
 		if args.plot_markers:
@@ -92,7 +210,12 @@ if __name__ == '__main__':
 
 		plt.xticks(ind, xticks, rotation='vertical')
 
+		plot_peaks(plt, map(get_peak, datapoints))
+
 		if args.plot_file:
 			plt.savefig(args.plot_file)
 		else:
 			plt.show()
+
+	if regressions:
+		raise SystemExit(1)
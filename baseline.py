@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+from collections import namedtuple
+
+from sampling import is_significant
+
+THRESHOLD = 0.05 # relative bandwidth loss considered a regression
+
+# Comparison of a measurement with its baseline. change is the relative change of the bandwidth,
+# current is None if the measurement is missing.
+Comparison = namedtuple('Comparison', 'baseline current change significant')
+
+def get_key(datapoint):
+	"""
+	Returns the parameters identifying a measurement: device, kernel, memory size, threads and stride.
+	"""
+	return (datapoint.device, datapoint.kernel, datapoint.mem_size, datapoint.global_threads, datapoint.local_threads, getattr(datapoint, 'stride', None))
+
+def compare(baseline, datapoints):
+	"""
+	Match the datapoints with those of the baseline and return a Comparison for each baseline datapoint.
+
+	Baseline datapoints of devices that have not been measured are skipped, those of measured devices
+	without a matching datapoint are reported with current set to None.
+	"""
+	current = dict((get_key(datapoint), datapoint) for datapoint in datapoints)
+	devices = set(map(lambda p: p.device, datapoints))
+	comparisons = []
+	for old in baseline:
+		if old.device not in devices:
+			continue
+		new = current.get(get_key(old))
+		if new == None:
+			comparisons.append(Comparison(old, None, None, False))
+			continue
+		# both moved the same number of bytes, so the bandwidth changes inversely to the time
+		change = float(old.time) / new.time - 1
+		significant = is_significant(old.time, old.time_std, old.samples, new.time, new.time_std, new.samples)
+		comparisons.append(Comparison(old, new, change, significant))
+	return comparisons
+
+def is_regression(comparison, threshold = THRESHOLD):
+	"""
+	Returns whether the comparison shows a significant bandwidth loss of more than threshold or a missing measurement.
+	"""
+	if comparison.current == None:
+		return True
+	return comparison.significant and comparison.change < -threshold
+
+def is_improvement(comparison, threshold = THRESHOLD):
+	return comparison.current != None and comparison.significant and comparison.change > threshold
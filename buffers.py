@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import pyopencl as cl
+
+def gcd(a, b):
+	while b:
+		a, b = b, a % b
+	return a
+
+def get_tile_size(size, max_alloc_size, storage_sizes):
+	"""
+	Returns the size of the tiles to split a buffer of the given size into.
+
+	If the buffer does not fit into a single allocation, tiles are made a multiple of all the given
+	storage sizes, so each tile holds whole elements of every kernel.
+	"""
+	if size <= max_alloc_size:
+		return size
+	granularity = 1
+	for storage_size in storage_sizes:
+		granularity = granularity * storage_size / gcd(granularity, storage_size)
+	tile_size = max_alloc_size / granularity * granularity
+	if tile_size == 0:
+		raise ValueError('Cannot tile a buffer into allocations of {0} bytes'.format(max_alloc_size))
+	return tile_size
+
+class TiledBuffer:
+	"""
+	A buffer of the given size, spread over as many cl.Buffers of at most tile_size bytes as required.
+
+	Kernels cannot span multiple buffers, so they have to be launched once per tile, see split().
+	"""
+
+	def __init__(self, ctx, flags, size, tile_size):
+		self.size = size
+		self.tile_size = tile_size
+		self.tiles = []
+		for offset in range(0, size, tile_size):
+			self.tiles.append(cl.Buffer(ctx, flags, min(tile_size, size - offset)))
+
+	def split(self, elems, storage_size):
+		"""
+		Distribute elems elements of storage_size bytes over the tiles.
+
+		Returns a list of (buffer, elems) tuples, one for each tile used.
+		"""
+		tiles = []
+		for buf in self.tiles:
+			if elems <= 0:
+				break
+			tile_elems = min(elems, buf.size / storage_size)
+			tiles.append((buf, tile_elems))
+			elems -= tile_elems
+		if elems > 0:
+			raise ValueError('{0} bytes exceed the buffer size of {1} bytes'.format((sum(map(lambda tile: tile[1], tiles)) + elems) * storage_size, self.size))
+		return tiles
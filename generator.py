@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+"""
+Generator for copy, read and write kernels over the full matrix of
+element type x layout x alignment x access mode.
+
+An element type is described by its real type and its shape, that is how it splits
+into sub-structures. E.g. a spinor consists of 4 su3 vectors, each of 3 complex numbers
+of 2 reals each, giving the shape (4, 3, 2). The layout selects at which depth the
+element is split into separate arrays: AoS does not split at all, SOA splits at the first
+level, FullSOA at the second and FullestSOA at the third. This matches the naming of the
+hand-written kernels in kernels.cl.
+
+The generated kernels are named like their hand-written counterparts, prefixed by Gen,
+e.g. copyGenAligned16DpSu3vecSOARestricted.
+"""
+
+import numpy as np
+from collections import namedtuple, OrderedDict
+
+ElementType = namedtuple('ElementType', 'name real shape')
+Real = namedtuple('Real', 'name size scalar_type fp64')
+
+REALS = {
+	'float': Real('float', 4, np.float32, False),
+	'double': Real('double', 8, np.float64, True),
+}
+
+ELEMENT_TYPES = [
+	ElementType('SpComplex', 'float', (2,)),
+	ElementType('SpSu3vec', 'float', (3, 2)),
+	ElementType('SpSu3', 'float', (9, 2)),
+	ElementType('SpSpinor', 'float', (4, 3, 2)),
+	ElementType('DpComplex', 'double', (2,)),
+	ElementType('DpSu3vec', 'double', (3, 2)),
+	ElementType('DpSu3', 'double', (9, 2)),
+	ElementType('DpSpinor', 'double', (4, 3, 2)),
+]
+
+# layout name -> split depth, ViaLocal stages an AoS layout through local memory
+LAYOUTS = OrderedDict([
+	('', 0),
+	('SOA', 1),
+	('FullSOA', 2),
+	('FullestSOA', 3),
+	('ViaLocal', 0),
+])
+
+# alignment name -> alignment of the stored parts in bytes, FromAligned instead aligns the complex numbers
+ALIGNMENTS = OrderedDict([
+	('', None),
+	('Aligned8', 8),
+	('Aligned16', 16),
+	('Aligned32', 32),
+	('FromAligned', None),
+])
+
+ACCESS_MODES = ('copy', 'read', 'write')
+
+UNIT_PREFIX = 'gen'
+
+# Metadata of a generated kernel, matching the fields of registry.KernelInfo
+GeneratedKernel = namedtuple('GeneratedKernel', 'name unit access storage_size elem_size scalar_type stride local fp64 memory pattern')
+
+class Variant:
+	"""
+	A single element type in a given layout and alignment. All access modes and restrict
+	qualifiers of a variant share the same stored part type.
+	"""
+
+	def __init__(self, elemtype, layout, alignment):
+		self.elemtype = elemtype
+		self.layout = layout
+		self.alignment = alignment
+		self.real = REALS[elemtype.real]
+
+		depth = LAYOUTS[layout]
+		self.parts = int(np.prod(elemtype.shape[:depth]))
+		reals_per_part = int(np.prod(elemtype.shape[depth:]))
+
+		# parts consisting of whole complex numbers are stored as arrays of complex numbers
+		self.complex_parts = reals_per_part % 2 == 0
+		if self.complex_parts:
+			self.components = reals_per_part / 2
+			if alignment == 'FromAligned':
+				self.component = 'genAligned{0}Complex'.format(self.get_prefix())
+				natural_alignment = 2 * self.real.size
+			else:
+				self.component = 'gen{0}Complex'.format(self.get_prefix())
+				natural_alignment = self.real.size
+		else:
+			self.components = reals_per_part
+			self.component = self.real.name
+			natural_alignment = self.real.size
+
+		self.natural_alignment = natural_alignment
+		self.part_alignment = max(natural_alignment, ALIGNMENTS[alignment] or 0)
+		part_size = reals_per_part * self.real.size
+		self.part_storage_size = -(-part_size / self.part_alignment) * self.part_alignment
+
+		self.base = '{0}{1}{2}{3}'.format(alignment if alignment != 'FromAligned' else '', elemtype.name, 'FromAligned' if alignment == 'FromAligned' else '', layout)
+		self.part = UNIT_PREFIX + self.base + 'Part'
+
+	def get_prefix(self):
+		return 'Sp' if self.real.name == 'float' else 'Dp'
+
+	def is_valid(self):
+		depth = LAYOUTS[self.layout]
+		if depth > len(self.elemtype.shape):
+			return False
+		if self.alignment == 'FromAligned' and not self.complex_parts:
+			return False
+		# alignments not above the natural alignment would only duplicate the unaligned variant
+		if ALIGNMENTS[self.alignment] and ALIGNMENTS[self.alignment] <= self.natural_alignment:
+			return False
+		return True
+
+	def get_storage_size(self):
+		return self.parts * self.part_storage_size
+
+	def get_elem_size(self):
+		return int(np.prod(self.elemtype.shape)) * self.real.size
+
+	def get_kernels(self):
+		unit = get_unit(self.elemtype)
+		kernels = []
+		for restricted in ('', 'Restricted'):
+			for access in ACCESS_MODES:
+				name = '{0}Gen{1}{2}'.format(access, self.base, restricted)
+				kernels.append(GeneratedKernel(name, unit, access, self.get_storage_size(), self.get_elem_size(), self.real.scalar_type,
+				                               self.parts > 1, self.layout == 'ViaLocal', self.real.fp64, 'global', None))
+		return kernels
+
+	def get_type_source(self):
+		attribute = ' __attribute__((aligned({0})))'.format(self.part_alignment) if ALIGNMENTS[self.alignment] else ''
+		if self.complex_parts:
+			add = '\t\tres.e[k].re = left.e[k].re + right.e[k].re;\n\t\tres.e[k].im = left.e[k].im + right.e[k].im;\n'
+			make = '\t\tres.e[k].re = val;\n\t\tres.e[k].im = val;\n'
+		else:
+			add = '\t\tres.e[k] = left.e[k] + right.e[k];\n'
+			make = '\t\tres.e[k] = val;\n'
+		return ('typedef struct {{ {comp} e[{n}]; }}{attr} {part};\n\n'
+		        '{part} make_{part}(const {real} val) {{\n'
+		        '\t{part} res;\n'
+		        '\tfor(uint k = 0; k < {n}; ++k) {{\n{make}\t}}\n'
+		        '\treturn res;\n'
+		        '}}\n\n'
+		        '{part} {part}Add(const {part} left, const {part} right) {{\n'
+		        '\t{part} res;\n'
+		        '\tfor(uint k = 0; k < {n}; ++k) {{\n{add}\t}}\n'
+		        '\treturn res;\n'
+		        '}}\n\n').format(comp=self.component, n=self.components, attr=attribute, part=self.part, real=self.real.name, make=make, add=add)
+
+	def get_kernel_source(self, kernel, restricted):
+		part = self.part
+		if restricted:
+			args = '__global {0} * const restrict out, '.format(part)
+			in_arg = '__global const {0} * const restrict in'.format(part)
+		else:
+			args = '__global {0} * out, '.format(part)
+			in_arg = '__global {0} * in'.format(part)
+		if kernel.access == 'write':
+			args += 'const {0} in'.format(self.real.name)
+		else:
+			args += in_arg
+		args += ', const ulong elems'
+		if kernel.stride:
+			args += ', ulong stride'
+		if kernel.local:
+			args += ', __local {0} * const restrict scratch'.format(part)
+
+		if kernel.local:
+			body = self.get_via_local_body(kernel.access)
+		else:
+			body = self.get_body(kernel.access)
+
+		return '__kernel void {0}({1})\n{{\n{2}}}\n'.format(kernel.name, args, body)
+
+	def get_index(self, part, index):
+		if self.parts == 1:
+			return index
+		return '{0} * stride + {1}'.format(part, index)
+
+	def get_body(self, access):
+		part = self.part
+		body = ''
+		if self.parts > 1:
+			body += '\tstride = (stride == 0) ? elems : stride;\n'
+		if access == 'read':
+			for p in range(self.parts):
+				body += '\t{0} tmp{1} = make_{0}(0.0f);\n'.format(part, p)
+		body += '\tfor(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {\n'
+		if access == 'copy':
+			for p in range(self.parts):
+				body += '\t\tout[{0}] = in[{0}];\n'.format(self.get_index(p, 'i'))
+		elif access == 'read':
+			for p in range(self.parts):
+				body += '\t\ttmp{0} = {1}Add(tmp{0}, in[{2}]);\n'.format(p, part, self.get_index(p, 'i'))
+		else:
+			body += '\t\t{0} tmp = make_{0}(in);\n'.format(part)
+			for p in range(self.parts):
+				body += '\t\tout[{0}] = tmp;\n'.format(self.get_index(p, 'i'))
+		body += '\t}\n'
+		if access == 'read':
+			for p in range(self.parts):
+				body += '\tout[{0}] = tmp{1};\n'.format(self.get_index(p, 'get_global_id(0)'), p)
+		return body
+
+	def get_via_local_body(self, access):
+		part = self.part
+		real = self.real.name
+		reals = self.part_storage_size / self.real.size
+		body = ''
+		if access == 'read':
+			body += '\t{0} tmp = make_{0}(0.0f);\n'.format(part)
+		body += ('\tconst size_t block_size = get_local_size(0);\n'
+		         '\tfor(size_t block = get_group_id(0); block < elems / block_size; block += get_num_groups(0)) {\n')
+		if access != 'write':
+			body += ('\t\tevent_t event = async_work_group_copy((__local {0} *) scratch, (__global const {0} *) &in[block * block_size], block_size * {1}, 0);\n'
+			         '\t\twait_group_events(1, &event);\n').format(real, reals)
+		if access == 'read':
+			body += ('\t\ttmp = {0}Add(tmp, scratch[get_local_id(0)]);\n'
+			         '\t\tbarrier(CLK_LOCAL_MEM_FENCE);\n').format(part)
+		else:
+			if access == 'write':
+				body += ('\t\tscratch[get_local_id(0)] = make_{0}(in);\n'
+				         '\t\tbarrier(CLK_LOCAL_MEM_FENCE);\n'
+				         '\t\tevent_t event').format(part)
+			else:
+				body += '\t\tevent'
+			body += (' = async_work_group_copy((__global {0} *) &out[block * block_size], (__local const {0} *) scratch, block_size * {1}, 0);\n'
+			         '\t\twait_group_events(1, &event);\n').format(real, reals)
+		body += '\t}\n'
+		if access == 'read':
+			body += '\tout[get_global_id(0)] = tmp;\n'
+		return body
+
+def get_unit(elemtype):
+	return UNIT_PREFIX + elemtype.name
+
+def get_variants(elemtype):
+	variants = []
+	for layout in LAYOUTS:
+		for alignment in ALIGNMENTS:
+			variant = Variant(elemtype, layout, alignment)
+			if variant.is_valid():
+				variants.append(variant)
+	return variants
+
+def get_kernels():
+	"""
+	Returns the metadata of all generated kernels.
+	"""
+	kernels = []
+	for elemtype in ELEMENT_TYPES:
+		for variant in get_variants(elemtype):
+			kernels.extend(variant.get_kernels())
+	return kernels
+
+def get_units():
+	return map(get_unit, ELEMENT_TYPES)
+
+HEADER = '''/*
+ * Generated by generator.py, do not edit.
+ */
+
+'''
+
+FP64_HEADER = '''#ifdef cl_khr_fp64
+#pragma OPENCL EXTENSION cl_khr_fp64 : enable
+#else /* cl_khr_fp64 */
+#pragma OPENCL EXTENSION cl_amd_fp64 : enable
+#endif /* cl_khr_fp64 */
+
+'''
+
+def generate_source(unit):
+	"""
+	Generate the OpenCL source of all kernels of the given compile unit.
+	"""
+	elemtype = [elemtype for elemtype in ELEMENT_TYPES if get_unit(elemtype) == unit][0]
+	real = REALS[elemtype.real]
+	prefix = 'Sp' if real.name == 'float' else 'Dp'
+
+	source = HEADER
+	if real.fp64:
+		source += FP64_HEADER
+	source += 'typedef struct {{ {0} re; {0} im; }} gen{1}Complex;\n'.format(real.name, prefix)
+	source += 'typedef struct {{ {0} re; {0} im; }} __attribute__((aligned({1}))) genAligned{2}Complex;\n\n'.format(real.name, 2 * real.size, prefix)
+
+	for variant in get_variants(elemtype):
+		source += variant.get_type_source()
+		for kernel in variant.get_kernels():
+			source += variant.get_kernel_source(kernel, kernel.name.endswith('Restricted'))
+			source += '\n'
+	return source
+
+if __name__ == '__main__':
+	import optparse
+	parser = optparse.OptionParser(description='Print the source of the generated kernels of a compile unit')
+	parser.add_option('-u', '--unit', metavar='UNIT', action='append', dest='units', help='The compile unit to print, one of {0}'.format(', '.join(get_units())))
+	parser.add_option('-l', '--list', action='store_true', default=False, help='List the generated kernels instead')
+
+	(args, rem) = parser.parse_args()
+
+	if args.list:
+		for kernel in get_kernels():
+			print '{0.name} {0.storage_size} {0.elem_size}'.format(kernel)
+	else:
+		for unit in (args.units or get_units()):
+			print generate_source(unit)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+"""
+Index tables of the gather and scatter kernels. Each table is a permutation of the elements,
+so scatter kernels write every element exactly once.
+"""
+
+import numpy as np
+from collections import OrderedDict
+
+INDEX_SIZE = 4 # bytes of one index
+BLOCK_SIZE = 64 # elements kept together by the blocked shuffle
+
+def get_identity(elems, seed = 0):
+	return np.arange(elems, dtype=np.uint32)
+
+def get_random(elems, seed = 0):
+	return np.random.RandomState(seed).permutation(elems).astype(np.uint32)
+
+def get_blocked(elems, seed = 0, block_size = BLOCK_SIZE):
+	"""
+	Returns the elements in blocks of block_size consecutive ones, the blocks in random order.
+	Elements not filling a whole block stay in place.
+	"""
+	blocks = elems / block_size
+	order = np.random.RandomState(seed).permutation(blocks)
+	indices = np.arange(elems, dtype=np.uint32)
+	indices[:blocks * block_size] = (order[:, np.newaxis] * block_size + np.arange(block_size)).ravel()
+	return indices
+
+def get_lattice_extent(elems):
+	"""
+	Returns the largest even extent of a 4D lattice with no more sites than elems, 0 if there is none.
+	"""
+	extent = int(elems ** 0.25)
+	while extent ** 4 > elems:
+		extent -= 1
+	while (extent + 1) ** 4 <= elems:
+		extent += 1
+	return extent - extent % 2
+
+def get_lattice(elems, seed = 0):
+	"""
+	Returns the neighbour in positive x direction of each site of a 4D lattice in even-odd ordering,
+	as accessed by even-odd preconditioned stencils. x runs fastest, the sites of each parity are
+	stored consecutively in lexicographic order. Elements beyond the lattice stay in place.
+	"""
+	extent = get_lattice_extent(elems)
+	indices = np.arange(elems, dtype=np.uint32)
+	if extent < 2:
+		return indices
+	volume = extent ** 4
+	sites = np.arange(volume)
+	x = sites % extent
+	neighbours = sites - x + (x + 1) % extent
+
+	def even_odd(lexicographic):
+		parity = sum(lexicographic / extent ** mu % extent for mu in range(4)) % 2
+		return parity * (volume / 2) + lexicographic / 2
+
+	indices[even_odd(sites)] = even_odd(neighbours)
+	return indices
+
+# pattern name -> function returning the index table for a number of elements
+PATTERNS = OrderedDict([
+	('Identity', get_identity),
+	('Random', get_random),
+	('Blocked', get_blocked),
+	('Lattice', get_lattice),
+])
+
+def get_indices(pattern, elems, seed = 0):
+	try:
+		return PATTERNS[pattern](elems, seed)
+	except KeyError:
+		raise NameError("Don't know the index pattern {0}".format(pattern))
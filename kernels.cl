@@ -27,10 +27,63 @@
 #endif /* cl_amd_fp64 */
 #endif /* cl_khr_fp64 */
 
+/*
+ * The kernels are grouped into compile units, each guarded by a UNIT_* macro.
+ * To build only some of them define UNITS_SELECTED and the required UNIT_* macros,
+ * otherwise all kernels get built.
+ * Types and helper functions are always available as kernels of one unit make use
+ * of the types of the others.
+ */
+#ifndef UNITS_SELECTED
+#define UNIT_FLOAT
+#define UNIT_SP_COMPLEX
+#define UNIT_SP_SU3VEC
+#define UNIT_SP_SU3
+#define UNIT_SP_SPINOR
+#define UNIT_DOUBLE
+#define UNIT_DP_COMPLEX
+#define UNIT_DP_SU3VEC
+#define UNIT_DP_SU3
+#define UNIT_DP_SPINOR
+#define UNIT_LATENCY
+#define UNIT_LOCAL
+#define UNIT_SP_IMAGE
+#define UNIT_DP_IMAGE
+#define UNIT_STENCIL
+#endif /* UNITS_SELECTED */
+
+/*
+ * Gather and scatter kernels access the elements through a table of indices,
+ * gather kernels read in[idx[i]], scatter kernels write out[idx[i]].
+ * The tables are generated by indices.py.
+ */
+#define INDEXED_KERNELS(type, name, zero) \
+__kernel void copy##name##Gather(__global type * const restrict out, __global const type * const restrict in, __global const uint * const restrict idx, const ulong elems) \
+{ \
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) { \
+		out[i] = in[idx[i]]; \
+	} \
+} \
+__kernel void copy##name##Scatter(__global type * const restrict out, __global const type * const restrict in, __global const uint * const restrict idx, const ulong elems) \
+{ \
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) { \
+		out[idx[i]] = in[i]; \
+	} \
+} \
+__kernel void read##name##Gather(__global type * const restrict out, __global const type * const restrict in, __global const uint * const restrict idx, const ulong elems) \
+{ \
+	type tmp = zero; \
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) { \
+		tmp = type##Add(tmp, in[idx[i]]); \
+	} \
+	out[get_global_id(0)] = tmp; \
+}
+
 /*
  * float kernels
  */
 
+#ifdef UNIT_FLOAT
 __kernel void copyFloat(__global float * out, __global float * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -114,6 +167,7 @@ __kernel void writeFloat4(__global float4 * out, const float in, const ulong ele
 		out[i] = in;
 	}
 }
+#endif /* UNIT_FLOAT */
 
 /*
  * Single precision complex
@@ -129,6 +183,7 @@ spComplex spComplexAdd(const spComplex left, const spComplex right) {
 	return make_spComplex(left.re + right.re, left.im + right.im);
 }
 
+#ifdef UNIT_SP_COMPLEX
 __kernel void copySpComplex(__global spComplex * out, __global spComplex * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -170,6 +225,8 @@ __kernel void writeSpComplexRestricted(__global spComplex * const restrict out,
 		out[i] = make_spComplex(in, in);
 	}
 }
+INDEXED_KERNELS(spComplex, SpComplex, make_spComplex(0.0f, 0.0f))
+#endif /* UNIT_SP_COMPLEX */
 
 typedef struct { float re; float im; } __attribute__ ((aligned (8))) alignedSpComplex;
 
@@ -181,6 +238,7 @@ alignedSpComplex alignedSpComplexAdd(const alignedSpComplex left, const alignedS
 	return make_alignedSpComplex(left.re + right.re, left.im + right.im);
 }
 
+#ifdef UNIT_SP_COMPLEX
 __kernel void copyAlignedSpComplex(__global alignedSpComplex * out, __global alignedSpComplex * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -222,6 +280,7 @@ __kernel void writeAlignedSpComplexRestricted(__global alignedSpComplex * const
 		out[i] = make_alignedSpComplex(in, in);
 	}
 }
+#endif /* UNIT_SP_COMPLEX */
 
 /*
  * Single precisoin SU3 vectors
@@ -245,6 +304,7 @@ spSu3vec spSu3vecAdd(const spSu3vec left, const spSu3vec right) {
 	);
 }
 
+#ifdef UNIT_SP_SU3VEC
 __kernel void copySpSu3vec(__global spSu3vec * out, __global spSu3vec * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -290,6 +350,8 @@ __kernel void writeSpSu3vecRestricted(__global spSu3vec * const restrict out, co
 		out[i] = make_spSu3vec(bla, bla, bla);
 	}
 }
+INDEXED_KERNELS(spSu3vec, SpSu3vec, make_spSu3vec(make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f)))
+#endif /* UNIT_SP_SU3VEC */
 
 typedef struct {
 	spComplex e0;
@@ -309,6 +371,7 @@ alignedSpSu3vec alignedSpSu3vecAdd(const alignedSpSu3vec left, const alignedSpSu
 	);
 }
 
+#ifdef UNIT_SP_SU3VEC
 __kernel void copyAlignedSpSu3vecRestricted(__global alignedSpSu3vec * const restrict out, __global const alignedSpSu3vec * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -331,6 +394,7 @@ __kernel void writeAlignedSpSu3vecRestricted(__global alignedSpSu3vec * const re
 		out[i] = make_alignedSpSu3vec(bla, bla, bla);
 	}
 }
+#endif /* UNIT_SP_SU3VEC */
 
 typedef struct {
 	spComplex e0;
@@ -350,6 +414,7 @@ aligned8SpSu3vec aligned8SpSu3vecAdd(const aligned8SpSu3vec left, const aligned8
 	);
 }
 
+#ifdef UNIT_SP_SU3VEC
 __kernel void copyAligned8SpSu3vecRestricted(__global aligned8SpSu3vec * const restrict out, __global const aligned8SpSu3vec * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -372,6 +437,7 @@ __kernel void writeAligned8SpSu3vecRestricted(__global aligned8SpSu3vec * const
 		out[i] = make_aligned8SpSu3vec(bla, bla, bla);
 	}
 }
+#endif /* UNIT_SP_SU3VEC */
 
 typedef struct {
 	spComplex e0;
@@ -391,6 +457,7 @@ aligned16SpSu3vec aligned16SpSu3vecAdd(const aligned16SpSu3vec left, const align
 	);
 }
 
+#ifdef UNIT_SP_SU3VEC
 __kernel void copyAligned16SpSu3vecRestricted(__global aligned16SpSu3vec * const restrict out, __global const aligned16SpSu3vec * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -413,6 +480,7 @@ __kernel void writeAligned16SpSu3vecRestricted(__global aligned16SpSu3vec * cons
 		out[i] = make_aligned16SpSu3vec(bla, bla, bla);
 	}
 }
+#endif /* UNIT_SP_SU3VEC */
 
 typedef struct {
 	spComplex e0;
@@ -432,6 +500,7 @@ aligned32SpSu3vec aligned32SpSu3vecAdd(const aligned32SpSu3vec left, const align
 	);
 }
 
+#ifdef UNIT_SP_SU3VEC
 __kernel void copyAligned32SpSu3vecRestricted(__global aligned32SpSu3vec * const restrict out, __global const aligned32SpSu3vec * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -454,6 +523,7 @@ __kernel void writeAligned32SpSu3vecRestricted(__global aligned32SpSu3vec * cons
 		out[i] = make_aligned32SpSu3vec(bla, bla, bla);
 	}
 }
+#endif /* UNIT_SP_SU3VEC */
 
 typedef struct {
 	alignedSpComplex e0;
@@ -473,6 +543,7 @@ spSu3vecFromAligned spSu3vecFromAlignedAdd(const spSu3vecFromAligned left, const
 	);
 }
 
+#ifdef UNIT_SP_SU3VEC
 __kernel void copySpSu3vecFromAlignedRestricted(__global spSu3vecFromAligned * const restrict out, __global const spSu3vecFromAligned * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -495,6 +566,7 @@ __kernel void writeSpSu3vecFromAlignedRestricted(__global spSu3vecFromAligned *
 		out[i] = make_spSu3vecFromAligned(bla, bla, bla);
 	}
 }
+#endif /* UNIT_SP_SU3VEC */
 
 /*
  * Single precision SU3
@@ -528,6 +600,7 @@ spSu3 spSu3Add(const spSu3 left, const spSu3 right) {
 	);
 }
 
+#ifdef UNIT_SP_SU3
 __kernel void copySpSu3(__global spSu3 * out, __global spSu3 * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -566,6 +639,15 @@ __kernel void readSpSu3Restricted(__global spSu3 * const restrict out, __global
 	}
 	out[get_global_id(0)] = tmp;
 }
+__kernel void readSpSu3Constant(__global spSu3 * const restrict out, __constant spSu3 * const restrict in, const ulong elems)
+{
+	spComplex bla = make_spComplex(0.0f, 0.0f);
+	spSu3 tmp = make_spSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = spSu3Add(tmp, in[i]);
+	}
+	out[get_global_id(0)] = tmp;
+}
 __kernel void writeSpSu3Restricted(__global spSu3 * const restrict out, const float in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -573,6 +655,10 @@ __kernel void writeSpSu3Restricted(__global spSu3 * const restrict out, const fl
 		out[i] = make_spSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
 	}
 }
+INDEXED_KERNELS(spSu3, SpSu3, make_spSu3(make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f),
+                make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f),
+                make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f)))
+#endif /* UNIT_SP_SU3 */
 
 spSu3 getSpSu3SOA(__global const spComplex * const restrict in, const size_t i, const size_t stride)
 {
@@ -594,6 +680,7 @@ void putSpSu3SOA(__global spComplex * const restrict out, const size_t i, const
 	out[8 * stride + i] = val.e22;
 }
 
+#ifdef UNIT_SP_SU3
 __kernel void copySpSu3SOARestricted(__global spComplex * const restrict out, __global const spComplex * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -621,6 +708,7 @@ __kernel void writeSpSu3SOARestricted(__global spComplex * const restrict out, c
 		putSpSu3SOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_SP_SU3 */
 
 spSu3 getSpSu3ViaLocal(__global const spSu3 * const restrict in, const size_t block, __local spSu3 * const restrict scratch)
 {
@@ -638,9 +726,10 @@ void putSpSu3ViaLocal(__global spSu3 * const restrict out, const size_t block, c
 	wait_group_events(1, &event);
 }
 
+#ifdef UNIT_SP_SU3
 __kernel void copySpSu3ViaLocalRestricted(__global spSu3 * const restrict out, __global const spSu3 * const restrict in, const ulong elems, __local spSu3 * const restrict scratch)
 {
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		spSu3 tmp = getSpSu3ViaLocal(in, i, scratch);
 		putSpSu3ViaLocal(out, i, tmp, scratch);
 	}
@@ -649,19 +738,20 @@ __kernel void readSpSu3ViaLocalRestricted(__global spSu3 * const restrict out, _
 {
 	spComplex bla = make_spComplex(0.0f, 0.0f);
 	spSu3 tmp = make_spSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		tmp = spSu3Add(tmp, getSpSu3ViaLocal(in, i, scratch));
 	}
-	putSpSu3ViaLocal(out, get_global_id(0), tmp, scratch);
+	putSpSu3ViaLocal(out, get_group_id(0), tmp, scratch);
 }
 __kernel void writeSpSu3ViaLocalRestricted(__global spSu3 * const restrict out, const float in, const ulong elems, __local spSu3 * const restrict scratch)
 {
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		spComplex bla = make_spComplex(in, in);
 		spSu3 tmp = make_spSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
 		putSpSu3ViaLocal(out, i, tmp, scratch);
 	}
 }
+#endif /* UNIT_SP_SU3 */
 
 typedef struct {
 	alignedSpComplex e00, e01, e02;
@@ -691,6 +781,7 @@ spSu3FromAligned spSu3FromAlignedAdd(const spSu3FromAligned left, const spSu3Fro
 	);
 }
 
+#ifdef UNIT_SP_SU3
 __kernel void copySpSu3FromAlignedRestricted(__global spSu3FromAligned * const restrict out, __global const spSu3FromAligned * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -713,6 +804,7 @@ __kernel void writeSpSu3FromAlignedRestricted(__global spSu3FromAligned * const
 		out[i] = make_spSu3FromAligned(bla, bla, bla, bla, bla, bla, bla, bla, bla);
 	}
 }
+#endif /* UNIT_SP_SU3 */
 
 spSu3FromAligned getSpSu3FromAlignedSOA(__global const alignedSpComplex * const restrict in, const size_t i, const size_t stride)
 {
@@ -734,6 +826,7 @@ void putSpSu3FromAlignedSOA(__global alignedSpComplex * const restrict out, cons
 	out[8 * stride + i] = val.e22;
 }
 
+#ifdef UNIT_SP_SU3
 __kernel void copySpSu3FromAlignedSOARestricted(__global alignedSpComplex * const restrict out, __global const alignedSpComplex * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -761,6 +854,7 @@ __kernel void writeSpSu3FromAlignedSOARestricted(__global alignedSpComplex * con
 		putSpSu3FromAlignedSOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_SP_SU3 */
 
 spSu3FromAligned getSpSu3FromAlignedViaLocal(__global const spSu3FromAligned * const restrict in, const size_t block, __local spSu3FromAligned * const restrict scratch)
 {
@@ -776,9 +870,10 @@ void putSpSu3FromAlignedViaLocal(__global spSu3FromAligned * const restrict out,
 	wait_group_events(1, &event);
 }
 
+#ifdef UNIT_SP_SU3
 __kernel void copySpSu3FromAlignedViaLocalRestricted(__global spSu3FromAligned * const restrict out, __global const spSu3FromAligned * const restrict in, const ulong elems, __local spSu3FromAligned * const restrict scratch)
 {
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		spSu3FromAligned tmp = getSpSu3FromAlignedViaLocal(in, i, scratch);
 		putSpSu3FromAlignedViaLocal(out, i, tmp, scratch);
 	}
@@ -787,19 +882,20 @@ __kernel void readSpSu3FromAlignedViaLocalRestricted(__global spSu3FromAligned *
 {
 	alignedSpComplex bla = make_alignedSpComplex(0.0f, 0.0f);
 	spSu3FromAligned tmp = make_spSu3FromAligned(bla, bla, bla, bla, bla, bla, bla, bla, bla);
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		tmp = spSu3FromAlignedAdd(tmp, getSpSu3FromAlignedViaLocal(in, i, scratch));
 	}
-	putSpSu3FromAlignedViaLocal(out, get_global_id(0), tmp, scratch);
+	putSpSu3FromAlignedViaLocal(out, get_group_id(0), tmp, scratch);
 }
 __kernel void writeSpSu3FromAlignedViaLocalRestricted(__global spSu3FromAligned * const restrict out, const float in, const ulong elems, __local spSu3FromAligned * const restrict scratch)
 {
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		alignedSpComplex bla = make_alignedSpComplex(in, in);
 		spSu3FromAligned tmp = make_spSu3FromAligned(bla, bla, bla, bla, bla, bla, bla, bla, bla);
 		putSpSu3FromAlignedViaLocal(out, i, tmp, scratch);
 	}
 }
+#endif /* UNIT_SP_SU3 */
 
 
 typedef struct {
@@ -830,6 +926,7 @@ alignedSpSu3 alignedSpSu3Add(const alignedSpSu3 left, const alignedSpSu3 right)
 	);
 }
 
+#ifdef UNIT_SP_SU3
 __kernel void copyAligned8SpSu3Restricted(__global alignedSpSu3 * const restrict out, __global const alignedSpSu3 * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -852,6 +949,247 @@ __kernel void writeAligned8SpSu3Restricted(__global alignedSpSu3 * const restric
 		out[i] = make_alignedSpSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
 	}
 }
+#endif /* UNIT_SP_SU3 */
+
+/*
+ * Compressed single precision SU3 matrices
+ * Reconstruct-12 stores the first two rows, the third one being the complex conjugate of their cross product.
+ * Reconstruct-8 stores e01, e02 and e10 and the phases of e00 and e20, the magnitudes following from the unit norm
+ * of the first row and column and the remaining elements from unitarity.
+ */
+
+typedef struct {
+	spComplex e00, e01, e02;
+	spComplex e10, e11, e12;
+} spSu3Recon12;
+
+typedef struct {
+	spComplex e01, e02, e10;
+	spComplex phases; /* the phase of e00 as real and that of e20 as imaginary part */
+} spSu3Recon8;
+
+spSu3Recon12 make_spSu3Recon12(const spComplex e00, const spComplex e01, const spComplex e02,
+                               const spComplex e10, const spComplex e11, const spComplex e12) {
+	return (spSu3Recon12) {e00, e01, e02,
+	                       e10, e11, e12};
+}
+
+spSu3Recon8 make_spSu3Recon8(const spComplex e01, const spComplex e02, const spComplex e10, const spComplex phases) {
+	return (spSu3Recon8) {e01, e02, e10, phases};
+}
+
+spComplex spComplexMult(const spComplex left, const spComplex right) {
+	return make_spComplex(left.re * right.re - left.im * right.im, left.re * right.im + left.im * right.re);
+}
+
+spComplex spComplexSub(const spComplex left, const spComplex right) {
+	return make_spComplex(left.re - right.re, left.im - right.im);
+}
+
+spComplex spComplexConj(const spComplex val) {
+	return make_spComplex(val.re, -val.im);
+}
+
+spComplex spComplexScale(const spComplex val, const float factor) {
+	return make_spComplex(val.re * factor, val.im * factor);
+}
+
+spComplex spComplexPolar(const float abs, const float arg) {
+	return make_spComplex(abs * cos(arg), abs * sin(arg));
+}
+
+float spComplexAbs2(const spComplex val) {
+	return val.re * val.re + val.im * val.im;
+}
+
+/* conj(a * b - c * d), an element of the conjugated cross product of two rows */
+spComplex spComplexConjCross(const spComplex a, const spComplex b, const spComplex c, const spComplex d) {
+	return spComplexConj(spComplexSub(spComplexMult(a, b), spComplexMult(c, d)));
+}
+
+spSu3 reconstructSpSu3Recon12(const spSu3Recon12 val)
+{
+	return make_spSu3(val.e00, val.e01, val.e02,
+	                  val.e10, val.e11, val.e12,
+	                  spComplexConjCross(val.e01, val.e12, val.e02, val.e11),
+	                  spComplexConjCross(val.e02, val.e10, val.e00, val.e12),
+	                  spComplexConjCross(val.e00, val.e11, val.e01, val.e10));
+}
+
+spSu3Recon12 compressSpSu3Recon12(const spSu3 val)
+{
+	return make_spSu3Recon12(val.e00, val.e01, val.e02,
+	                         val.e10, val.e11, val.e12);
+}
+
+spSu3 reconstructSpSu3Recon8(const spSu3Recon8 val)
+{
+	const float row = spComplexAbs2(val.e01) + spComplexAbs2(val.e02);
+	const spComplex e00 = spComplexPolar(sqrt(max(1.0f - row, 0.0f)), val.phases.re);
+	const spComplex e20 = spComplexPolar(sqrt(max(row - spComplexAbs2(val.e10), 0.0f)), val.phases.im);
+	const float scale = 1.0f / row;
+	const spComplex e00e10 = spComplexMult(spComplexConj(e00), val.e10);
+	const spComplex e00e20 = spComplexMult(spComplexConj(e00), e20);
+	return make_spSu3(e00, val.e01, val.e02,
+	                  val.e10,
+	                  spComplexScale(spComplexAdd(spComplexMult(spComplexConj(e20), spComplexConj(val.e02)), spComplexMult(e00e10, val.e01)), -scale),
+	                  spComplexScale(spComplexSub(spComplexMult(spComplexConj(e20), spComplexConj(val.e01)), spComplexMult(e00e10, val.e02)), scale),
+	                  e20,
+	                  spComplexScale(spComplexSub(spComplexMult(spComplexConj(val.e10), spComplexConj(val.e02)), spComplexMult(e00e20, val.e01)), scale),
+	                  spComplexScale(spComplexAdd(spComplexMult(spComplexConj(val.e10), spComplexConj(val.e01)), spComplexMult(e00e20, val.e02)), -scale));
+}
+
+/*
+ * Inverting reconstruct-8 takes two atan2, work a lattice code loading its links never does. The reconstruct-8
+ * kernels instead store the elements rebuilt from the others, which is no valid compressed matrix, but keeps
+ * the whole reconstruction alive.
+ */
+spSu3Recon8 packSpSu3Recon8(const spSu3 val)
+{
+	return make_spSu3Recon8(val.e11, val.e12, val.e21, val.e22);
+}
+
+/*
+ * Cyclically permuting the rows keeps the matrix in SU3. The reconstruct-12 kernels store their results permuted,
+ * so the rebuilt third row is used and the reconstruction cannot be optimized away.
+ */
+spSu3 spSu3RotateRows(const spSu3 val)
+{
+	return make_spSu3(val.e10, val.e11, val.e12,
+	                  val.e20, val.e21, val.e22,
+	                  val.e00, val.e01, val.e02);
+}
+
+spSu3Recon12 getSpSu3Recon12SOA(__global const spComplex * const restrict in, const size_t i, const size_t stride)
+{
+	return make_spSu3Recon12(in[0 * stride + i], in[1 * stride + i], in[2 * stride + i],
+	                         in[3 * stride + i], in[4 * stride + i], in[5 * stride + i]);
+}
+
+void putSpSu3Recon12SOA(__global spComplex * const restrict out, const size_t i, const spSu3Recon12 val, const size_t stride)
+{
+	out[0 * stride + i] = val.e00;
+	out[1 * stride + i] = val.e01;
+	out[2 * stride + i] = val.e02;
+	out[3 * stride + i] = val.e10;
+	out[4 * stride + i] = val.e11;
+	out[5 * stride + i] = val.e12;
+}
+
+spSu3Recon8 getSpSu3Recon8SOA(__global const spComplex * const restrict in, const size_t i, const size_t stride)
+{
+	return make_spSu3Recon8(in[0 * stride + i], in[1 * stride + i], in[2 * stride + i], in[3 * stride + i]);
+}
+
+void putSpSu3Recon8SOA(__global spComplex * const restrict out, const size_t i, const spSu3Recon8 val, const size_t stride)
+{
+	out[0 * stride + i] = val.e01;
+	out[1 * stride + i] = val.e02;
+	out[2 * stride + i] = val.e10;
+	out[3 * stride + i] = val.phases;
+}
+
+#ifdef UNIT_SP_SU3
+__kernel void copySpSu3Recon12Restricted(__global spSu3Recon12 * const restrict out, __global const spSu3Recon12 * const restrict in, const ulong elems)
+{
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		out[i] = compressSpSu3Recon12(spSu3RotateRows(reconstructSpSu3Recon12(in[i])));
+	}
+}
+__kernel void readSpSu3Recon12Restricted(__global spSu3Recon12 * const restrict out, __global const spSu3Recon12 * const restrict in, const ulong elems)
+{
+	spComplex bla = make_spComplex(0.0f, 0.0f);
+	spSu3 tmp = make_spSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = spSu3Add(tmp, reconstructSpSu3Recon12(in[i]));
+	}
+	out[get_global_id(0)] = compressSpSu3Recon12(spSu3RotateRows(tmp));
+}
+__kernel void writeSpSu3Recon12Restricted(__global spSu3Recon12 * const restrict out, const float in, const ulong elems)
+{
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		spComplex bla = make_spComplex(in, in);
+		out[i] = make_spSu3Recon12(bla, bla, bla, bla, bla, bla);
+	}
+}
+
+__kernel void copySpSu3Recon12SOARestricted(__global spComplex * const restrict out, __global const spComplex * const restrict in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		spSu3 tmp = reconstructSpSu3Recon12(getSpSu3Recon12SOA(in, i, stride));
+		putSpSu3Recon12SOA(out, i, compressSpSu3Recon12(spSu3RotateRows(tmp)), stride);
+	}
+}
+__kernel void readSpSu3Recon12SOARestricted(__global spComplex * const restrict out, __global const spComplex * const restrict in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	spComplex bla = make_spComplex(0.0f, 0.0f);
+	spSu3 tmp = make_spSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = spSu3Add(tmp, reconstructSpSu3Recon12(getSpSu3Recon12SOA(in, i, stride)));
+	}
+	putSpSu3Recon12SOA(out, get_global_id(0), compressSpSu3Recon12(spSu3RotateRows(tmp)), stride);
+}
+__kernel void writeSpSu3Recon12SOARestricted(__global spComplex * const restrict out, const float in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		spComplex bla = make_spComplex(in, in);
+		putSpSu3Recon12SOA(out, i, make_spSu3Recon12(bla, bla, bla, bla, bla, bla), stride);
+	}
+}
+
+__kernel void copySpSu3Recon8Restricted(__global spSu3Recon8 * const restrict out, __global const spSu3Recon8 * const restrict in, const ulong elems)
+{
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		out[i] = packSpSu3Recon8(reconstructSpSu3Recon8(in[i]));
+	}
+}
+__kernel void readSpSu3Recon8Restricted(__global spSu3Recon8 * const restrict out, __global const spSu3Recon8 * const restrict in, const ulong elems)
+{
+	spComplex bla = make_spComplex(0.0f, 0.0f);
+	spSu3 tmp = make_spSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = spSu3Add(tmp, reconstructSpSu3Recon8(in[i]));
+	}
+	out[get_global_id(0)] = packSpSu3Recon8(tmp);
+}
+__kernel void writeSpSu3Recon8Restricted(__global spSu3Recon8 * const restrict out, const float in, const ulong elems)
+{
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		spComplex bla = make_spComplex(in, in);
+		out[i] = make_spSu3Recon8(bla, bla, bla, bla);
+	}
+}
+
+__kernel void copySpSu3Recon8SOARestricted(__global spComplex * const restrict out, __global const spComplex * const restrict in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		spSu3 tmp = reconstructSpSu3Recon8(getSpSu3Recon8SOA(in, i, stride));
+		putSpSu3Recon8SOA(out, i, packSpSu3Recon8(tmp), stride);
+	}
+}
+__kernel void readSpSu3Recon8SOARestricted(__global spComplex * const restrict out, __global const spComplex * const restrict in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	spComplex bla = make_spComplex(0.0f, 0.0f);
+	spSu3 tmp = make_spSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = spSu3Add(tmp, reconstructSpSu3Recon8(getSpSu3Recon8SOA(in, i, stride)));
+	}
+	putSpSu3Recon8SOA(out, get_global_id(0), packSpSu3Recon8(tmp), stride);
+}
+__kernel void writeSpSu3Recon8SOARestricted(__global spComplex * const restrict out, const float in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		spComplex bla = make_spComplex(in, in);
+		putSpSu3Recon8SOA(out, i, make_spSu3Recon8(bla, bla, bla, bla), stride);
+	}
+}
+#endif /* UNIT_SP_SU3 */
 
 /*
  * Single precision spinors
@@ -876,6 +1214,7 @@ spSpinor spSpinorAdd(const spSpinor left, const spSpinor right) {
 	);
 }
 
+#ifdef UNIT_SP_SPINOR
 __kernel void copySpSpinor(__global spSpinor * out, __global spSpinor * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -917,6 +1256,16 @@ __kernel void readSpSpinorRestricted(__global spSpinor * const restrict out, __g
 	}
 	out[get_global_id(0)] = tmp;
 }
+__kernel void readSpSpinorConstant(__global spSpinor * const restrict out, __constant spSpinor * const restrict in, const ulong elems)
+{
+	spComplex bla = make_spComplex(0.0f, 0.0f);
+	spSu3vec foo = make_spSu3vec(bla, bla, bla);
+	spSpinor tmp = make_spSpinor(foo, foo, foo, foo);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = spSpinorAdd(tmp, in[i]);
+	}
+	out[get_global_id(0)] = tmp;
+}
 __kernel void writeSpSpinorRestricted(__global spSpinor * const restrict out, const float in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -925,6 +1274,11 @@ __kernel void writeSpSpinorRestricted(__global spSpinor * const restrict out, co
 		out[i] = make_spSpinor(foo, foo, foo, foo);
 	}
 }
+INDEXED_KERNELS(spSpinor, SpSpinor, make_spSpinor(make_spSu3vec(make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f)),
+                make_spSu3vec(make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f)),
+                make_spSu3vec(make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f)),
+                make_spSu3vec(make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f), make_spComplex(0.0f, 0.0f))))
+#endif /* UNIT_SP_SPINOR */
 
 spSpinor getSpSpinorSOA(__global const spSu3vec * const restrict in, const size_t i, const size_t stride)
 {
@@ -939,6 +1293,7 @@ void putSpSpinorSOA(__global spSu3vec * const restrict out, const size_t i, cons
 	out[3 * stride + i] = val.e3;
 }
 
+#ifdef UNIT_SP_SPINOR
 __kernel void copySpSpinorSOARestricted(__global spSu3vec * const restrict out, __global const spSu3vec * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -968,6 +1323,7 @@ __kernel void writeSpSpinorSOARestricted(__global spSu3vec * const restrict out,
 		putSpSpinorSOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_SP_SPINOR */
 
 spSpinor getSpSpinorFullSOA(__global const spComplex * const restrict in, const size_t i, const size_t stride)
 {
@@ -993,6 +1349,7 @@ void putSpSpinorFullSOA(__global spComplex * const restrict out, const size_t i,
 	out[11 * stride + i] = val.e3.e2;
 }
 
+#ifdef UNIT_SP_SPINOR
 __kernel void copySpSpinorFullSOARestricted(__global spComplex * const restrict out, __global const spComplex * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -1022,6 +1379,7 @@ __kernel void writeSpSpinorFullSOARestricted(__global spComplex * const restrict
 		putSpSpinorFullSOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_SP_SPINOR */
 
 typedef struct {
 	spSu3vecFromAligned e0;
@@ -1067,6 +1425,7 @@ void putSpSpinorFullAlignedSOA(__global alignedSpComplex * const restrict out, c
 	out[11 * stride + i] = val.e3.e2;
 }
 
+#ifdef UNIT_SP_SPINOR
 __kernel void copySpSpinorFullAlignedSOARestricted(__global alignedSpComplex * const restrict out, __global const alignedSpComplex * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -1096,6 +1455,7 @@ __kernel void writeSpSpinorFullAlignedSOARestricted(__global alignedSpComplex *
 		putSpSpinorFullAlignedSOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_SP_SPINOR */
 
 
 spSpinor getSpSpinorViaLocal(__global const spSpinor * const restrict in, const size_t block, __local spSpinor * const restrict scratch)
@@ -1112,9 +1472,10 @@ void putSpSpinorViaLocal(__global spSpinor * const restrict out, const size_t bl
 	wait_group_events(1, &event);
 }
 
+#ifdef UNIT_SP_SPINOR
 __kernel void copySpSpinorViaLocalRestricted(__global spSpinor * const restrict out, __global const spSpinor * const restrict in, const ulong elems, __local spSpinor * const restrict scratch)
 {
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		spSpinor tmp = getSpSpinorViaLocal(in, i, scratch);
 		putSpSpinorViaLocal(out, i, tmp, scratch);
 	}
@@ -1124,20 +1485,21 @@ __kernel void readSpSpinorViaLocalRestricted(__global spSpinor * const restrict
 	spComplex bla = make_spComplex(0.0f, 0.0f);
 	spSu3vec foo = make_spSu3vec(bla, bla, bla);
 	spSpinor tmp = make_spSpinor(foo, foo, foo, foo);
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		tmp = spSpinorAdd(tmp, getSpSpinorViaLocal(in, i, scratch));
 	}
-	putSpSpinorViaLocal(out, get_global_id(0), tmp, scratch);
+	putSpSpinorViaLocal(out, get_group_id(0), tmp, scratch);
 }
 __kernel void writeSpSpinorViaLocalRestricted(__global spSpinor * const restrict out, const float in, const ulong elems, __local spSpinor * const restrict scratch)
 {
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		spComplex bla = make_spComplex(in, in);
 		spSu3vec foo = make_spSu3vec(bla, bla, bla);
 		spSpinor tmp = make_spSpinor(foo, foo, foo, foo);
 		putSpSpinorViaLocal(out, i, tmp, scratch);
 	}
 }
+#endif /* UNIT_SP_SPINOR */
 
 typedef struct {
 	aligned8SpSu3vec e0;
@@ -1159,6 +1521,7 @@ spSpinorFromAligned spSpinorFromAlignedAdd(const spSpinorFromAligned left, const
 	);
 }
 
+#ifdef UNIT_SP_SPINOR
 __kernel void copySpSpinorFromAlignedRestricted(__global spSpinorFromAligned * const restrict out, __global const spSpinorFromAligned * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1183,6 +1546,7 @@ __kernel void writeSpSpinorFromAlignedRestricted(__global spSpinorFromAligned *
 		out[i] = make_spSpinorFromAligned(foo, foo, foo, foo);
 	}
 }
+#endif /* UNIT_SP_SPINOR */
 
 spSpinorFromAligned getSpSpinorFromAlignedSOA(__global const aligned8SpSu3vec * const restrict in, const size_t i, const size_t stride)
 {
@@ -1197,6 +1561,7 @@ void putSpSpinorFromAlignedSOA(__global aligned8SpSu3vec * const restrict out, c
 	out[3 * stride + i] = val.e3;
 }
 
+#ifdef UNIT_SP_SPINOR
 __kernel void copySpSpinorFromAlignedSOARestricted(__global aligned8SpSu3vec * const restrict out, __global const aligned8SpSu3vec * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -1226,6 +1591,7 @@ __kernel void writeSpSpinorFromAlignedSOARestricted(__global aligned8SpSu3vec *
 		putSpSpinorFromAlignedSOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_SP_SPINOR */
 
 spSpinorFromAligned getSpSpinorFromAlignedViaLocal(__global const spSpinorFromAligned * const restrict in, const size_t block, __local spSpinorFromAligned * const restrict scratch)
 {
@@ -1241,9 +1607,10 @@ void putSpSpinorFromAlignedViaLocal(__global spSpinorFromAligned * const restric
 	wait_group_events(1, &event);
 }
 
+#ifdef UNIT_SP_SPINOR
 __kernel void copySpSpinorFromAlignedViaLocalRestricted(__global spSpinorFromAligned * const restrict out, __global const spSpinorFromAligned * const restrict in, const ulong elems, __local spSpinorFromAligned * const restrict scratch)
 {
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		spSpinorFromAligned tmp = getSpSpinorFromAlignedViaLocal(in, i, scratch);
 		putSpSpinorFromAlignedViaLocal(out, i, tmp, scratch);
 	}
@@ -1253,20 +1620,21 @@ __kernel void readSpSpinorFromAlignedViaLocalRestricted(__global spSpinorFromAli
 	spComplex bla = make_spComplex(0.0f, 0.0f);
 	aligned8SpSu3vec foo = make_aligned8SpSu3vec(bla, bla, bla);
 	spSpinorFromAligned tmp = make_spSpinorFromAligned(foo, foo, foo, foo);
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		tmp = spSpinorFromAlignedAdd(tmp, getSpSpinorFromAlignedViaLocal(in, i, scratch));
 	}
-	putSpSpinorFromAlignedViaLocal(out, get_global_id(0), tmp, scratch);
+	putSpSpinorFromAlignedViaLocal(out, get_group_id(0), tmp, scratch);
 }
 __kernel void writeSpSpinorFromAlignedViaLocalRestricted(__global spSpinorFromAligned * const restrict out, const float in, const ulong elems, __local spSpinorFromAligned * const restrict scratch)
 {
-	for(size_t i = get_group_id(0); i < elems / get_num_groups(0); i += get_num_groups(0)) {
+	for(size_t i = get_group_id(0); i < elems / get_local_size(0); i += get_num_groups(0)) {
 		spComplex bla = make_spComplex(in, in);
 		aligned8SpSu3vec foo = make_aligned8SpSu3vec(bla, bla, bla);
 		spSpinorFromAligned tmp = make_spSpinorFromAligned(foo, foo, foo, foo);
 		putSpSpinorFromAlignedViaLocal(out, i, tmp, scratch);
 	}
 }
+#endif /* UNIT_SP_SPINOR */
 
 
 typedef struct {
@@ -1289,6 +1657,7 @@ aligned8SpSpinor aligned8SpSpinorAdd(const aligned8SpSpinor left, const aligned8
 	);
 }
 
+#ifdef UNIT_SP_SPINOR
 __kernel void copyAligned8SpSpinorRestricted(__global aligned8SpSpinor * const restrict out, __global const aligned8SpSpinor * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1313,6 +1682,7 @@ __kernel void writeAligned8SpSpinorRestricted(__global aligned8SpSpinor * const
 		out[i] = make_aligned8SpSpinor(foo, foo, foo, foo);
 	}
 }
+#endif /* UNIT_SP_SPINOR */
 
 
 typedef struct {
@@ -1335,6 +1705,7 @@ aligned16SpSpinor aligned16SpSpinorAdd(const aligned16SpSpinor left, const align
 	);
 }
 
+#ifdef UNIT_SP_SPINOR
 __kernel void copyAligned16SpSpinorRestricted(__global aligned16SpSpinor * const restrict out, __global const aligned16SpSpinor * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1359,6 +1730,7 @@ __kernel void writeAligned16SpSpinorRestricted(__global aligned16SpSpinor * cons
 		out[i] = make_aligned16SpSpinor(foo, foo, foo, foo);
 	}
 }
+#endif /* UNIT_SP_SPINOR */
 
 
 typedef struct {
@@ -1381,6 +1753,7 @@ aligned32SpSpinor aligned32SpSpinorAdd(const aligned32SpSpinor left, const align
 	);
 }
 
+#ifdef UNIT_SP_SPINOR
 __kernel void copyAligned32SpSpinorRestricted(__global aligned32SpSpinor * const restrict out, __global const aligned32SpSpinor * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1405,6 +1778,7 @@ __kernel void writeAligned32SpSpinorRestricted(__global aligned32SpSpinor * cons
 		out[i] = make_aligned32SpSpinor(foo, foo, foo, foo);
 	}
 }
+#endif /* UNIT_SP_SPINOR */
 
 
 /*
@@ -1413,6 +1787,7 @@ __kernel void writeAligned32SpSpinorRestricted(__global aligned32SpSpinor * cons
 
 #ifdef DOUBLE_ENABLED
 
+#ifdef UNIT_DOUBLE
 __kernel void copyDouble(__global double * out, __global double * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1496,6 +1871,7 @@ __kernel void writeDouble4(__global double4 * out, const double in, const ulong
 		out[i] = in;
 	}
 }
+#endif /* UNIT_DOUBLE */
 
 /*
  * Double precision complex
@@ -1511,6 +1887,7 @@ dpComplex dpComplexAdd(const dpComplex left, const dpComplex right) {
 	return make_dpComplex(left.re + right.re, left.im + right.im);
 }
 
+#ifdef UNIT_DP_COMPLEX
 __kernel void copyDpComplex(__global dpComplex * out, __global dpComplex * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1552,6 +1929,8 @@ __kernel void writeDpComplexRestricted(__global dpComplex * const restrict out,
 		out[i] = make_dpComplex(in, in);
 	}
 }
+INDEXED_KERNELS(dpComplex, DpComplex, make_dpComplex(0.0, 0.0))
+#endif /* UNIT_DP_COMPLEX */
 
 typedef struct { double re; double im; } __attribute__((aligned (16))) alignedDpComplex;
 
@@ -1563,6 +1942,7 @@ alignedDpComplex alignedDpComplexAdd(const alignedDpComplex left, const alignedD
 	return make_alignedDpComplex(left.re + right.re, left.im + right.im);
 }
 
+#ifdef UNIT_DP_COMPLEX
 __kernel void copyAlignedDpComplex(__global alignedDpComplex * out, __global alignedDpComplex * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1604,6 +1984,7 @@ __kernel void writeAlignedDpComplexRestricted(__global alignedDpComplex * const
 		out[i] = make_alignedDpComplex(in, in);
 	}
 }
+#endif /* UNIT_DP_COMPLEX */
 
 
 /*
@@ -1629,6 +2010,7 @@ dpSu3vec dpSu3vecAdd(const dpSu3vec left, const dpSu3vec right) {
 	);
 }
 
+#ifdef UNIT_DP_SU3VEC
 __kernel void copyDpSu3vec(__global dpSu3vec * out, __global dpSu3vec * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1674,6 +2056,8 @@ __kernel void writeDpSu3vecRestricted(__global dpSu3vec * const restrict out, co
 		out[i] = make_dpSu3vec(bla, bla, bla);
 	}
 }
+INDEXED_KERNELS(dpSu3vec, DpSu3vec, make_dpSu3vec(make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0)))
+#endif /* UNIT_DP_SU3VEC */
 
 typedef struct {
 	alignedDpComplex e0;
@@ -1693,6 +2077,7 @@ aligned16DpSu3vec aligned16DpSu3vecAdd(const aligned16DpSu3vec left, const align
 	);
 }
 
+#ifdef UNIT_DP_SU3VEC
 __kernel void copyAligned16DpSu3vecRestricted(__global aligned16DpSu3vec * const restrict out, __global const aligned16DpSu3vec * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1715,6 +2100,7 @@ __kernel void writeAligned16DpSu3vecRestricted(__global aligned16DpSu3vec * cons
 		out[i] = make_aligned16DpSu3vec(bla, bla, bla);
 	}
 }
+#endif /* UNIT_DP_SU3VEC */
 
 typedef struct {
 	alignedDpComplex e0;
@@ -1734,6 +2120,7 @@ aligned32DpSu3vec aligned32DpSu3vecAdd(const aligned32DpSu3vec left, const align
 	);
 }
 
+#ifdef UNIT_DP_SU3VEC
 __kernel void copyAligned32DpSu3vecRestricted(__global aligned32DpSu3vec * const restrict out, __global const aligned32DpSu3vec * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1756,6 +2143,7 @@ __kernel void writeAligned32DpSu3vecRestricted(__global aligned32DpSu3vec * cons
 		out[i] = make_aligned32DpSu3vec(bla, bla, bla);
 	}
 }
+#endif /* UNIT_DP_SU3VEC */
 
 dpSu3vec getDpSu3vecSOA(__global const alignedDpComplex * const restrict in, const size_t i, const size_t stride)
 {
@@ -1769,6 +2157,7 @@ void putDpSu3vecSOA(__global alignedDpComplex * const restrict out, const size_t
 	out[ 2 * stride + i] = val.e2;
 }
 
+#ifdef UNIT_DP_SU3VEC
 __kernel void copyDpSu3vecSOARestricted(__global alignedDpComplex * const restrict out, __global const alignedDpComplex * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -1796,6 +2185,7 @@ __kernel void writeDpSu3vecSOARestricted(__global alignedDpComplex * const restr
 		putDpSu3vecSOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_DP_SU3VEC */
 
 
 dpSu3vec getDpSu3vecFullSOA(__global const double * const restrict in, const size_t i, const size_t stride)
@@ -1814,6 +2204,7 @@ void putDpSu3vecFullSOA(__global double * const restrict out, const size_t i, co
 	out[ 5 * stride + i] = val.e2.im;
 }
 
+#ifdef UNIT_DP_SU3VEC
 __kernel void copyDpSu3vecFullSOARestricted(__global double * const restrict out, __global const double * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -1841,6 +2232,7 @@ __kernel void writeDpSu3vecFullSOARestricted(__global double * const restrict ou
 		putDpSu3vecFullSOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_DP_SU3VEC */
 
 
 /*
@@ -1876,6 +2268,7 @@ dpSu3 dpSu3Add(const dpSu3 left, const dpSu3 right) {
 	);
 }
 
+#ifdef UNIT_DP_SU3
 __kernel void copyDpSu3(__global dpSu3 * out, __global dpSu3 * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1914,6 +2307,15 @@ __kernel void readDpSu3Restricted(__global dpSu3 * const restrict out, __global
 	}
 	out[get_global_id(0)] = tmp;
 }
+__kernel void readDpSu3Constant(__global dpSu3 * const restrict out, __constant dpSu3 * const restrict in, const ulong elems)
+{
+	alignedDpComplex bla = make_alignedDpComplex(0.0f, 0.0f);
+	dpSu3 tmp = make_dpSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = dpSu3Add(tmp, in[i]);
+	}
+	out[get_global_id(0)] = tmp;
+}
 __kernel void writeDpSu3Restricted(__global dpSu3 * const restrict out, const float in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1921,6 +2323,10 @@ __kernel void writeDpSu3Restricted(__global dpSu3 * const restrict out, const fl
 		out[i] = make_dpSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
 	}
 }
+INDEXED_KERNELS(dpSu3, DpSu3, make_dpSu3(make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0),
+               make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0),
+               make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0)))
+#endif /* UNIT_DP_SU3 */
 
 typedef struct {
 	alignedDpComplex e00, e01, e02;
@@ -1951,6 +2357,7 @@ aligned16DpSu3 aligned16DpSu3Add(const aligned16DpSu3 left, const aligned16DpSu3
 }
 
 
+#ifdef UNIT_DP_SU3
 __kernel void copyAligned16DpSu3Restricted(__global aligned16DpSu3 * const restrict out, __global const aligned16DpSu3 * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -1973,6 +2380,7 @@ __kernel void writeAligned16DpSu3Restricted(__global aligned16DpSu3 * const rest
 		out[i] = make_aligned16DpSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
 	}
 }
+#endif /* UNIT_DP_SU3 */
 
 typedef struct {
 	alignedDpComplex e00, e01, e02;
@@ -2002,6 +2410,7 @@ aligned32DpSu3 aligned32DpSu3Add(const aligned32DpSu3 left, const aligned32DpSu3
 	);
 }
 
+#ifdef UNIT_DP_SU3
 __kernel void copyAligned32DpSu3Restricted(__global aligned32DpSu3 * const restrict out, __global const aligned32DpSu3 * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -2024,6 +2433,7 @@ __kernel void writeAligned32DpSu3Restricted(__global aligned32DpSu3 * const rest
 		out[i] = make_aligned32DpSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
 	}
 }
+#endif /* UNIT_DP_SU3 */
 
 dpSu3 getDpSu3SOA(__global const alignedDpComplex * const restrict in, const size_t i, const size_t stride)
 {
@@ -2045,6 +2455,7 @@ void putDpSu3SOA(__global alignedDpComplex * const restrict out, const size_t i,
 	out[8 * stride + i] = val.e22;
 }
 
+#ifdef UNIT_DP_SU3
 __kernel void copyDpSu3SOARestricted(__global alignedDpComplex * const restrict out, __global const alignedDpComplex * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -2072,6 +2483,7 @@ __kernel void writeDpSu3SOARestricted(__global alignedDpComplex * const restrict
 		putDpSu3SOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_DP_SU3 */
 
 
 dpSu3 getDpSu3FullSOA(__global const double * const restrict in, const size_t i, const size_t stride)
@@ -2108,6 +2520,7 @@ void putDpSu3FullSOA(__global double * const restrict out, const size_t i, const
 	out[17 * stride + i] = val.e22.im;
 }
 
+#ifdef UNIT_DP_SU3
 __kernel void copyDpSu3FullSOARestricted(__global double * const restrict out, __global const double * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -2135,6 +2548,238 @@ __kernel void writeDpSu3FullSOARestricted(__global double * const restrict out,
 		putDpSu3FullSOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_DP_SU3 */
+
+/*
+ * Compressed double precision SU3 matrices
+ * The same storage schemes as for single precision
+ */
+
+typedef struct {
+	alignedDpComplex e00, e01, e02;
+	alignedDpComplex e10, e11, e12;
+} dpSu3Recon12;
+
+typedef struct {
+	alignedDpComplex e01, e02, e10;
+	alignedDpComplex phases; /* the phase of e00 as real and that of e20 as imaginary part */
+} dpSu3Recon8;
+
+dpSu3Recon12 make_dpSu3Recon12(const alignedDpComplex e00, const alignedDpComplex e01, const alignedDpComplex e02,
+                               const alignedDpComplex e10, const alignedDpComplex e11, const alignedDpComplex e12) {
+	return (dpSu3Recon12) {e00, e01, e02,
+	                       e10, e11, e12};
+}
+
+dpSu3Recon8 make_dpSu3Recon8(const alignedDpComplex e01, const alignedDpComplex e02, const alignedDpComplex e10, const alignedDpComplex phases) {
+	return (dpSu3Recon8) {e01, e02, e10, phases};
+}
+
+alignedDpComplex alignedDpComplexMult(const alignedDpComplex left, const alignedDpComplex right) {
+	return make_alignedDpComplex(left.re * right.re - left.im * right.im, left.re * right.im + left.im * right.re);
+}
+
+alignedDpComplex alignedDpComplexSub(const alignedDpComplex left, const alignedDpComplex right) {
+	return make_alignedDpComplex(left.re - right.re, left.im - right.im);
+}
+
+alignedDpComplex alignedDpComplexConj(const alignedDpComplex val) {
+	return make_alignedDpComplex(val.re, -val.im);
+}
+
+alignedDpComplex alignedDpComplexScale(const alignedDpComplex val, const double factor) {
+	return make_alignedDpComplex(val.re * factor, val.im * factor);
+}
+
+alignedDpComplex alignedDpComplexPolar(const double abs, const double arg) {
+	return make_alignedDpComplex(abs * cos(arg), abs * sin(arg));
+}
+
+double alignedDpComplexAbs2(const alignedDpComplex val) {
+	return val.re * val.re + val.im * val.im;
+}
+
+/* conj(a * b - c * d), an element of the conjugated cross product of two rows */
+alignedDpComplex alignedDpComplexConjCross(const alignedDpComplex a, const alignedDpComplex b, const alignedDpComplex c, const alignedDpComplex d) {
+	return alignedDpComplexConj(alignedDpComplexSub(alignedDpComplexMult(a, b), alignedDpComplexMult(c, d)));
+}
+
+dpSu3 reconstructDpSu3Recon12(const dpSu3Recon12 val)
+{
+	return make_dpSu3(val.e00, val.e01, val.e02,
+	                  val.e10, val.e11, val.e12,
+	                  alignedDpComplexConjCross(val.e01, val.e12, val.e02, val.e11),
+	                  alignedDpComplexConjCross(val.e02, val.e10, val.e00, val.e12),
+	                  alignedDpComplexConjCross(val.e00, val.e11, val.e01, val.e10));
+}
+
+dpSu3Recon12 compressDpSu3Recon12(const dpSu3 val)
+{
+	return make_dpSu3Recon12(val.e00, val.e01, val.e02,
+	                         val.e10, val.e11, val.e12);
+}
+
+dpSu3 reconstructDpSu3Recon8(const dpSu3Recon8 val)
+{
+	const double row = alignedDpComplexAbs2(val.e01) + alignedDpComplexAbs2(val.e02);
+	const alignedDpComplex e00 = alignedDpComplexPolar(sqrt(max(1.0 - row, 0.0)), val.phases.re);
+	const alignedDpComplex e20 = alignedDpComplexPolar(sqrt(max(row - alignedDpComplexAbs2(val.e10), 0.0)), val.phases.im);
+	const double scale = 1.0 / row;
+	const alignedDpComplex e00e10 = alignedDpComplexMult(alignedDpComplexConj(e00), val.e10);
+	const alignedDpComplex e00e20 = alignedDpComplexMult(alignedDpComplexConj(e00), e20);
+	return make_dpSu3(e00, val.e01, val.e02,
+	                  val.e10,
+	                  alignedDpComplexScale(alignedDpComplexAdd(alignedDpComplexMult(alignedDpComplexConj(e20), alignedDpComplexConj(val.e02)), alignedDpComplexMult(e00e10, val.e01)), -scale),
+	                  alignedDpComplexScale(alignedDpComplexSub(alignedDpComplexMult(alignedDpComplexConj(e20), alignedDpComplexConj(val.e01)), alignedDpComplexMult(e00e10, val.e02)), scale),
+	                  e20,
+	                  alignedDpComplexScale(alignedDpComplexSub(alignedDpComplexMult(alignedDpComplexConj(val.e10), alignedDpComplexConj(val.e02)), alignedDpComplexMult(e00e20, val.e01)), scale),
+	                  alignedDpComplexScale(alignedDpComplexAdd(alignedDpComplexMult(alignedDpComplexConj(val.e10), alignedDpComplexConj(val.e01)), alignedDpComplexMult(e00e20, val.e02)), -scale));
+}
+
+/* see packSpSu3Recon8() */
+dpSu3Recon8 packDpSu3Recon8(const dpSu3 val)
+{
+	return make_dpSu3Recon8(val.e11, val.e12, val.e21, val.e22);
+}
+
+/* see spSu3RotateRows() */
+dpSu3 dpSu3RotateRows(const dpSu3 val)
+{
+	return make_dpSu3(val.e10, val.e11, val.e12,
+	                  val.e20, val.e21, val.e22,
+	                  val.e00, val.e01, val.e02);
+}
+
+dpSu3Recon12 getDpSu3Recon12SOA(__global const alignedDpComplex * const restrict in, const size_t i, const size_t stride)
+{
+	return make_dpSu3Recon12(in[0 * stride + i], in[1 * stride + i], in[2 * stride + i],
+	                         in[3 * stride + i], in[4 * stride + i], in[5 * stride + i]);
+}
+
+void putDpSu3Recon12SOA(__global alignedDpComplex * const restrict out, const size_t i, const dpSu3Recon12 val, const size_t stride)
+{
+	out[0 * stride + i] = val.e00;
+	out[1 * stride + i] = val.e01;
+	out[2 * stride + i] = val.e02;
+	out[3 * stride + i] = val.e10;
+	out[4 * stride + i] = val.e11;
+	out[5 * stride + i] = val.e12;
+}
+
+dpSu3Recon8 getDpSu3Recon8SOA(__global const alignedDpComplex * const restrict in, const size_t i, const size_t stride)
+{
+	return make_dpSu3Recon8(in[0 * stride + i], in[1 * stride + i], in[2 * stride + i], in[3 * stride + i]);
+}
+
+void putDpSu3Recon8SOA(__global alignedDpComplex * const restrict out, const size_t i, const dpSu3Recon8 val, const size_t stride)
+{
+	out[0 * stride + i] = val.e01;
+	out[1 * stride + i] = val.e02;
+	out[2 * stride + i] = val.e10;
+	out[3 * stride + i] = val.phases;
+}
+
+#ifdef UNIT_DP_SU3
+__kernel void copyDpSu3Recon12Restricted(__global dpSu3Recon12 * const restrict out, __global const dpSu3Recon12 * const restrict in, const ulong elems)
+{
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		out[i] = compressDpSu3Recon12(dpSu3RotateRows(reconstructDpSu3Recon12(in[i])));
+	}
+}
+__kernel void readDpSu3Recon12Restricted(__global dpSu3Recon12 * const restrict out, __global const dpSu3Recon12 * const restrict in, const ulong elems)
+{
+	alignedDpComplex bla = make_alignedDpComplex(0.0f, 0.0f);
+	dpSu3 tmp = make_dpSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = dpSu3Add(tmp, reconstructDpSu3Recon12(in[i]));
+	}
+	out[get_global_id(0)] = compressDpSu3Recon12(dpSu3RotateRows(tmp));
+}
+__kernel void writeDpSu3Recon12Restricted(__global dpSu3Recon12 * const restrict out, const float in, const ulong elems)
+{
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		alignedDpComplex bla = make_alignedDpComplex(in, in);
+		out[i] = make_dpSu3Recon12(bla, bla, bla, bla, bla, bla);
+	}
+}
+
+__kernel void copyDpSu3Recon12SOARestricted(__global alignedDpComplex * const restrict out, __global const alignedDpComplex * const restrict in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		dpSu3 tmp = reconstructDpSu3Recon12(getDpSu3Recon12SOA(in, i, stride));
+		putDpSu3Recon12SOA(out, i, compressDpSu3Recon12(dpSu3RotateRows(tmp)), stride);
+	}
+}
+__kernel void readDpSu3Recon12SOARestricted(__global alignedDpComplex * const restrict out, __global const alignedDpComplex * const restrict in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	alignedDpComplex bla = make_alignedDpComplex(0.0f, 0.0f);
+	dpSu3 tmp = make_dpSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = dpSu3Add(tmp, reconstructDpSu3Recon12(getDpSu3Recon12SOA(in, i, stride)));
+	}
+	putDpSu3Recon12SOA(out, get_global_id(0), compressDpSu3Recon12(dpSu3RotateRows(tmp)), stride);
+}
+__kernel void writeDpSu3Recon12SOARestricted(__global alignedDpComplex * const restrict out, const float in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		alignedDpComplex bla = make_alignedDpComplex(in, in);
+		putDpSu3Recon12SOA(out, i, make_dpSu3Recon12(bla, bla, bla, bla, bla, bla), stride);
+	}
+}
+
+__kernel void copyDpSu3Recon8Restricted(__global dpSu3Recon8 * const restrict out, __global const dpSu3Recon8 * const restrict in, const ulong elems)
+{
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		out[i] = packDpSu3Recon8(reconstructDpSu3Recon8(in[i]));
+	}
+}
+__kernel void readDpSu3Recon8Restricted(__global dpSu3Recon8 * const restrict out, __global const dpSu3Recon8 * const restrict in, const ulong elems)
+{
+	alignedDpComplex bla = make_alignedDpComplex(0.0f, 0.0f);
+	dpSu3 tmp = make_dpSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = dpSu3Add(tmp, reconstructDpSu3Recon8(in[i]));
+	}
+	out[get_global_id(0)] = packDpSu3Recon8(tmp);
+}
+__kernel void writeDpSu3Recon8Restricted(__global dpSu3Recon8 * const restrict out, const float in, const ulong elems)
+{
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		alignedDpComplex bla = make_alignedDpComplex(in, in);
+		out[i] = make_dpSu3Recon8(bla, bla, bla, bla);
+	}
+}
+
+__kernel void copyDpSu3Recon8SOARestricted(__global alignedDpComplex * const restrict out, __global const alignedDpComplex * const restrict in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		dpSu3 tmp = reconstructDpSu3Recon8(getDpSu3Recon8SOA(in, i, stride));
+		putDpSu3Recon8SOA(out, i, packDpSu3Recon8(tmp), stride);
+	}
+}
+__kernel void readDpSu3Recon8SOARestricted(__global alignedDpComplex * const restrict out, __global const alignedDpComplex * const restrict in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	alignedDpComplex bla = make_alignedDpComplex(0.0f, 0.0f);
+	dpSu3 tmp = make_dpSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = dpSu3Add(tmp, reconstructDpSu3Recon8(getDpSu3Recon8SOA(in, i, stride)));
+	}
+	putDpSu3Recon8SOA(out, get_global_id(0), packDpSu3Recon8(tmp), stride);
+}
+__kernel void writeDpSu3Recon8SOARestricted(__global alignedDpComplex * const restrict out, const float in, const ulong elems, ulong stride)
+{
+	stride = (stride == 0) ? elems : stride;
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		alignedDpComplex bla = make_alignedDpComplex(in, in);
+		putDpSu3Recon8SOA(out, i, make_dpSu3Recon8(bla, bla, bla, bla), stride);
+	}
+}
+#endif /* UNIT_DP_SU3 */
 
 
 /*
@@ -2163,6 +2808,7 @@ dpSpinor dpSpinorAdd(const dpSpinor left, const dpSpinor right) {
 	);
 }
 
+#ifdef UNIT_DP_SPINOR
 __kernel void copyDpSpinor(__global dpSpinor * out, __global dpSpinor * in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -2204,6 +2850,16 @@ __kernel void readDpSpinorRestricted(__global dpSpinor * const restrict out, __g
 	}
 	out[get_global_id(0)] = tmp;
 }
+__kernel void readDpSpinorConstant(__global dpSpinor * const restrict out, __constant dpSpinor * const restrict in, const ulong elems)
+{
+	alignedDpComplex bla = make_alignedDpComplex(0.0f, 0.0f);
+	aligned16DpSu3vec foo = make_aligned16DpSu3vec(bla, bla, bla);
+	dpSpinor tmp = make_dpSpinor(foo, foo, foo, foo);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = dpSpinorAdd(tmp, in[i]);
+	}
+	out[get_global_id(0)] = tmp;
+}
 __kernel void writeDpSpinorRestricted(__global dpSpinor * const restrict out, const float in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -2212,6 +2868,11 @@ __kernel void writeDpSpinorRestricted(__global dpSpinor * const restrict out, co
 		out[i] = make_dpSpinor(foo, foo, foo, foo);
 	}
 }
+INDEXED_KERNELS(dpSpinor, DpSpinor, make_dpSpinor(make_aligned16DpSu3vec(make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0)),
+               make_aligned16DpSu3vec(make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0)),
+               make_aligned16DpSu3vec(make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0)),
+               make_aligned16DpSu3vec(make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0), make_alignedDpComplex(0.0, 0.0))))
+#endif /* UNIT_DP_SPINOR */
 
 typedef struct {
 	aligned16DpSu3vec e0;
@@ -2234,6 +2895,7 @@ aligned16DpSpinor aligned16DpSpinorAdd(const aligned16DpSpinor left, const align
 	);
 }
 
+#ifdef UNIT_DP_SPINOR
 __kernel void copyAligned16DpSpinorRestricted(__global aligned16DpSpinor * const restrict out, __global const aligned16DpSpinor * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -2258,6 +2920,7 @@ __kernel void writeAligned16DpSpinorRestricted(__global aligned16DpSpinor * cons
 		out[i] = make_aligned16DpSpinor(foo, foo, foo, foo);
 	}
 }
+#endif /* UNIT_DP_SPINOR */
 
 typedef struct {
 	aligned16DpSu3vec e0;
@@ -2280,6 +2943,7 @@ aligned32DpSpinor aligned32DpSpinorAdd(const aligned32DpSpinor left, const align
 	);
 }
 
+#ifdef UNIT_DP_SPINOR
 __kernel void copyAligned32DpSpinorRestricted(__global aligned32DpSpinor * const restrict out, __global const aligned32DpSpinor * const restrict in, const ulong elems)
 {
 	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
@@ -2304,6 +2968,7 @@ __kernel void writeAligned32DpSpinorRestricted(__global aligned32DpSpinor * cons
 		out[i] = make_aligned32DpSpinor(foo, foo, foo, foo);
 	}
 }
+#endif /* UNIT_DP_SPINOR */
 
 
 dpSpinor getDpSpinorSOA(__global const aligned16DpSu3vec * const restrict in, const size_t i, const size_t stride)
@@ -2319,6 +2984,7 @@ void putDpSpinorSOA(__global aligned16DpSu3vec * const restrict out, const size_
 	out[3 * stride + i] = val.e3;
 }
 
+#ifdef UNIT_DP_SPINOR
 __kernel void copyDpSpinorSOARestricted(__global aligned16DpSu3vec * const restrict out, __global const aligned16DpSu3vec * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -2348,6 +3014,7 @@ __kernel void writeDpSpinorSOARestricted(__global aligned16DpSu3vec * const rest
 		putDpSpinorSOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_DP_SPINOR */
 
 dpSpinor getDpSpinorFullSOA(__global const alignedDpComplex * const restrict in, const size_t i, const size_t stride)
 {
@@ -2372,6 +3039,7 @@ void putDpSpinorFullSOA(__global alignedDpComplex * const restrict out, const si
 	out[11 * stride + i] = val.e3.e2;
 }
 
+#ifdef UNIT_DP_SPINOR
 __kernel void copyDpSpinorFullSOARestricted(__global alignedDpComplex * const restrict out, __global const alignedDpComplex * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -2401,6 +3069,7 @@ __kernel void writeDpSpinorFullSOARestricted(__global alignedDpComplex * const r
 		putDpSpinorFullSOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_DP_SPINOR */
 
 dpSpinor getDpSpinorFullestSOA(__global const double * const restrict in, const size_t i, const size_t stride)
 {
@@ -2445,6 +3114,7 @@ void putDpSpinorFullestSOA(__global double * const restrict out, const size_t i,
 	out[23 * stride + i] = val.e3.e2.im;
 }
 
+#ifdef UNIT_DP_SPINOR
 __kernel void copyDpSpinorFullestSOARestricted(__global double * const restrict out, __global const double * const restrict in, const ulong elems, ulong stride)
 {
 	stride = (stride == 0) ? elems : stride;
@@ -2474,5 +3144,319 @@ __kernel void writeDpSpinorFullestSOARestricted(__global double * const restrict
 		putDpSpinorFullestSOA(out, i, tmp, stride);
 	}
 }
+#endif /* UNIT_DP_SPINOR */
+
+#endif /* DOUBLE_ENABLED */
+
+/*
+ * latency kernels
+ */
+
+#ifdef UNIT_LATENCY
+/*
+ * Follow the chain of indices starting at element 0 for the given number of steps.
+ * Each load depends on the previous one, so a single thread measures the latency of the memory.
+ */
+__kernel void chasePointers(__global uint * out, __global const uint * chain, const ulong steps)
+{
+	uint next = 0;
+	for(ulong i = 0; i < steps; ++i) {
+		next = chain[next];
+	}
+	out[get_global_id(0)] = next;
+}
+#endif /* UNIT_LATENCY */
+
+/*
+ * local memory kernels
+ */
+
+#ifdef UNIT_LOCAL
+/*
+ * Each thread accesses the element of scratch at its position in the work-group times stride,
+ * so strides sharing a factor with the number of banks provoke bank conflicts. The positions are
+ * rotated by one each iteration, keeping the pattern of the accesses but defeating loop invariant
+ * code motion. scratch holds local_threads * stride elements, twice that for the copy kernels.
+ */
+#define LOCAL_KERNELS(type, name) \
+__kernel void copyLocal##name(__global type * out, __local type * scratch, const uint stride, const uint iterations) \
+{ \
+	const uint threads = get_local_size(0); \
+	uint j = get_local_id(0); \
+	scratch[j * stride] = (type) (1.0f); \
+	barrier(CLK_LOCAL_MEM_FENCE); \
+	for(uint i = 0; i < iterations; ++i) { \
+		scratch[(threads + j) * stride] = scratch[j * stride]; \
+		j = (j + 1 == threads) ? 0 : j + 1; \
+	} \
+	barrier(CLK_LOCAL_MEM_FENCE); \
+	out[get_global_id(0)] = scratch[(threads + get_local_id(0)) * stride]; \
+} \
+__kernel void readLocal##name(__global type * out, __local type * scratch, const uint stride, const uint iterations) \
+{ \
+	const uint threads = get_local_size(0); \
+	uint j = get_local_id(0); \
+	scratch[j * stride] = (type) (1.0f); \
+	barrier(CLK_LOCAL_MEM_FENCE); \
+	type tmp = (type) (0.0f); \
+	for(uint i = 0; i < iterations; ++i) { \
+		tmp += scratch[j * stride]; \
+		j = (j + 1 == threads) ? 0 : j + 1; \
+	} \
+	out[get_global_id(0)] = tmp; \
+} \
+__kernel void writeLocal##name(__global type * out, const float in, __local type * scratch, const uint stride, const uint iterations) \
+{ \
+	const uint threads = get_local_size(0); \
+	uint j = get_local_id(0); \
+	const type val = (type) (in); \
+	for(uint i = 0; i < iterations; ++i) { \
+		scratch[j * stride] = val; \
+		j = (j + 1 == threads) ? 0 : j + 1; \
+	} \
+	barrier(CLK_LOCAL_MEM_FENCE); \
+	out[get_global_id(0)] = scratch[get_local_id(0) * stride]; \
+}
+
+LOCAL_KERNELS(float, Float)
+LOCAL_KERNELS(float2, Float2)
+LOCAL_KERNELS(float4, Float4)
+#ifdef DOUBLE_ENABLED
+LOCAL_KERNELS(double, Double)
+#endif /* DOUBLE_ENABLED */
+#endif /* UNIT_LOCAL */
+
+/*
+ * image kernels
+ *
+ * The elements are stored in consecutive RGBA texels of a 2D image of the given width,
+ * wrapping around into the next row. Single precision elements can be stored as float or half,
+ * read_imagef() converts both to float. Double precision elements are stored as float texels
+ * holding the bits of one complex number each.
+ */
+
+#if defined(UNIT_SP_IMAGE) || defined(UNIT_DP_IMAGE)
+int2 getTexelCoord(const size_t texel, const uint width)
+{
+	return (int2) (texel % width, texel / width);
+}
+#endif
+
+#ifdef UNIT_SP_IMAGE
+spSu3 getSpSu3Image(__read_only image2d_t in, const sampler_t sampler, const size_t i, const uint width)
+{
+	const float4 t0 = read_imagef(in, sampler, getTexelCoord(5 * i + 0, width));
+	const float4 t1 = read_imagef(in, sampler, getTexelCoord(5 * i + 1, width));
+	const float4 t2 = read_imagef(in, sampler, getTexelCoord(5 * i + 2, width));
+	const float4 t3 = read_imagef(in, sampler, getTexelCoord(5 * i + 3, width));
+	const float4 t4 = read_imagef(in, sampler, getTexelCoord(5 * i + 4, width));
+	return make_spSu3(make_spComplex(t0.x, t0.y), make_spComplex(t0.z, t0.w), make_spComplex(t1.x, t1.y),
+	                  make_spComplex(t1.z, t1.w), make_spComplex(t2.x, t2.y), make_spComplex(t2.z, t2.w),
+	                  make_spComplex(t3.x, t3.y), make_spComplex(t3.z, t3.w), make_spComplex(t4.x, t4.y));
+}
+__kernel void readSpSu3Image(__global spSu3 * const restrict out, __read_only image2d_t in, const sampler_t sampler, const ulong elems, const uint width)
+{
+	spComplex bla = make_spComplex(0.0f, 0.0f);
+	spSu3 tmp = make_spSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = spSu3Add(tmp, getSpSu3Image(in, sampler, i, width));
+	}
+	out[get_global_id(0)] = tmp;
+}
+__kernel void readSpSu3ImageHalf(__global spSu3 * const restrict out, __read_only image2d_t in, const sampler_t sampler, const ulong elems, const uint width)
+{
+	spComplex bla = make_spComplex(0.0f, 0.0f);
+	spSu3 tmp = make_spSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = spSu3Add(tmp, getSpSu3Image(in, sampler, i, width));
+	}
+	out[get_global_id(0)] = tmp;
+}
+
+spSpinor getSpSpinorImage(__read_only image2d_t in, const sampler_t sampler, const size_t i, const uint width)
+{
+	const float4 t0 = read_imagef(in, sampler, getTexelCoord(6 * i + 0, width));
+	const float4 t1 = read_imagef(in, sampler, getTexelCoord(6 * i + 1, width));
+	const float4 t2 = read_imagef(in, sampler, getTexelCoord(6 * i + 2, width));
+	const float4 t3 = read_imagef(in, sampler, getTexelCoord(6 * i + 3, width));
+	const float4 t4 = read_imagef(in, sampler, getTexelCoord(6 * i + 4, width));
+	const float4 t5 = read_imagef(in, sampler, getTexelCoord(6 * i + 5, width));
+	return make_spSpinor(make_spSu3vec(make_spComplex(t0.x, t0.y), make_spComplex(t0.z, t0.w), make_spComplex(t1.x, t1.y)),
+	                     make_spSu3vec(make_spComplex(t1.z, t1.w), make_spComplex(t2.x, t2.y), make_spComplex(t2.z, t2.w)),
+	                     make_spSu3vec(make_spComplex(t3.x, t3.y), make_spComplex(t3.z, t3.w), make_spComplex(t4.x, t4.y)),
+	                     make_spSu3vec(make_spComplex(t4.z, t4.w), make_spComplex(t5.x, t5.y), make_spComplex(t5.z, t5.w)));
+}
+__kernel void readSpSpinorImage(__global spSpinor * const restrict out, __read_only image2d_t in, const sampler_t sampler, const ulong elems, const uint width)
+{
+	spComplex bla = make_spComplex(0.0f, 0.0f);
+	spSu3vec foo = make_spSu3vec(bla, bla, bla);
+	spSpinor tmp = make_spSpinor(foo, foo, foo, foo);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = spSpinorAdd(tmp, getSpSpinorImage(in, sampler, i, width));
+	}
+	out[get_global_id(0)] = tmp;
+}
+__kernel void readSpSpinorImageHalf(__global spSpinor * const restrict out, __read_only image2d_t in, const sampler_t sampler, const ulong elems, const uint width)
+{
+	spComplex bla = make_spComplex(0.0f, 0.0f);
+	spSu3vec foo = make_spSu3vec(bla, bla, bla);
+	spSpinor tmp = make_spSpinor(foo, foo, foo, foo);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = spSpinorAdd(tmp, getSpSpinorImage(in, sampler, i, width));
+	}
+	out[get_global_id(0)] = tmp;
+}
+#endif /* UNIT_SP_IMAGE */
+
+#ifdef DOUBLE_ENABLED
+#ifdef UNIT_DP_IMAGE
+alignedDpComplex getDpComplexImage(__read_only image2d_t in, const sampler_t sampler, const size_t texel, const uint width)
+{
+	const double2 val = as_double2(read_imagef(in, sampler, getTexelCoord(texel, width)));
+	return make_alignedDpComplex(val.x, val.y);
+}
+dpSu3 getDpSu3Image(__read_only image2d_t in, const sampler_t sampler, const size_t i, const uint width)
+{
+	return make_dpSu3(getDpComplexImage(in, sampler, 9 * i + 0, width), getDpComplexImage(in, sampler, 9 * i + 1, width), getDpComplexImage(in, sampler, 9 * i + 2, width),
+	                  getDpComplexImage(in, sampler, 9 * i + 3, width), getDpComplexImage(in, sampler, 9 * i + 4, width), getDpComplexImage(in, sampler, 9 * i + 5, width),
+	                  getDpComplexImage(in, sampler, 9 * i + 6, width), getDpComplexImage(in, sampler, 9 * i + 7, width), getDpComplexImage(in, sampler, 9 * i + 8, width));
+}
+__kernel void readDpSu3Image(__global dpSu3 * const restrict out, __read_only image2d_t in, const sampler_t sampler, const ulong elems, const uint width)
+{
+	alignedDpComplex bla = make_alignedDpComplex(0.0f, 0.0f);
+	dpSu3 tmp = make_dpSu3(bla, bla, bla, bla, bla, bla, bla, bla, bla);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = dpSu3Add(tmp, getDpSu3Image(in, sampler, i, width));
+	}
+	out[get_global_id(0)] = tmp;
+}
 
+aligned16DpSu3vec getDpSu3vecImage(__read_only image2d_t in, const sampler_t sampler, const size_t texel, const uint width)
+{
+	return make_aligned16DpSu3vec(getDpComplexImage(in, sampler, texel + 0, width), getDpComplexImage(in, sampler, texel + 1, width), getDpComplexImage(in, sampler, texel + 2, width));
+}
+dpSpinor getDpSpinorImage(__read_only image2d_t in, const sampler_t sampler, const size_t i, const uint width)
+{
+	return make_dpSpinor(getDpSu3vecImage(in, sampler, 12 * i + 0, width), getDpSu3vecImage(in, sampler, 12 * i + 3, width),
+	                     getDpSu3vecImage(in, sampler, 12 * i + 6, width), getDpSu3vecImage(in, sampler, 12 * i + 9, width));
+}
+__kernel void readDpSpinorImage(__global dpSpinor * const restrict out, __read_only image2d_t in, const sampler_t sampler, const ulong elems, const uint width)
+{
+	alignedDpComplex bla = make_alignedDpComplex(0.0f, 0.0f);
+	aligned16DpSu3vec foo = make_aligned16DpSu3vec(bla, bla, bla);
+	dpSpinor tmp = make_dpSpinor(foo, foo, foo, foo);
+	for(size_t i = get_global_id(0); i < elems; i += get_global_size(0)) {
+		tmp = dpSpinorAdd(tmp, getDpSpinorImage(in, sampler, i, width));
+	}
+	out[get_global_id(0)] = tmp;
+}
+#endif /* UNIT_DP_IMAGE */
+#endif /* DOUBLE_ENABLED */
+
+/*
+ * lattice stencil kernels
+ *
+ * The Wilson hopping term of lattice QCD: each site sums its 8 neighbouring spinors, each multiplied
+ * by the gauge link connecting the sites, or its adjoint in backward direction. Spin projection is
+ * omitted, the memory accesses are those of the real operator.
+ *
+ * The lattice is given by its extents nx, ny, nz and nt, x running fastest. With even-odd
+ * preconditioning the kernel computes the even sites from the odd ones, the sites of each parity
+ * stored consecutively in lexicographic order. Links are stored as a single field of all four
+ * directions, each direction holding the links of all sites, the even ones first if preconditioned.
+ *
+ * Spinors and links are accessed as arrays of reals. Each element is split into parts of part
+ * consecutive reals, part i of all elements of a field stored after each other. A part of the whole
+ * element gives AoS, smaller parts give the SOA layouts.
+ */
+
+#ifdef UNIT_STENCIL
+#define STENCIL_INDEX(part, elems, i, r) (((r) / (part) * (elems) + (i)) * (part) + (r) % (part))
+
+uint4 getStencilCoords(const size_t i, const uint4 dims, const uint even_odd)
+{
+	if(even_odd) {
+		const size_t row = i / (dims.x / 2);
+		const uint y = row % dims.y;
+		const uint z = row / dims.y % dims.z;
+		const uint t = row / dims.y / dims.z;
+		return (uint4) (2 * (i % (dims.x / 2)) + ((y + z + t) & 1), y, z, t);
+	} else {
+		return (uint4) (i % dims.x, i / dims.x % dims.y, i / dims.x / dims.y % dims.z, i / dims.x / dims.y / dims.z);
+	}
+}
+
+size_t getStencilLexIndex(const uint4 coords, const uint4 dims)
+{
+	return (((size_t) coords.w * dims.z + coords.z) * dims.y + coords.y) * dims.x + coords.x;
+}
+
+size_t getStencilSiteIndex(const uint4 coords, const uint4 dims, const uint even_odd)
+{
+	const size_t lex = getStencilLexIndex(coords, dims);
+	if(even_odd) {
+		const size_t volume = (size_t) dims.x * dims.y * dims.z * dims.w;
+		return ((coords.x + coords.y + coords.z + coords.w) & 1) * (volume / 2) + lex / 2;
+	} else {
+		return lex;
+	}
+}
+
+#define STENCIL_KERNEL(name, real, spinor_part, link_part) \
+__kernel void name(__global real * const restrict out, __global const real * const restrict in, __global const real * const restrict links, \
+                   const uint nx, const uint ny, const uint nz, const uint nt, const uint even_odd) \
+{ \
+	const uint4 dims = (uint4) (nx, ny, nz, nt); \
+	const size_t volume = (size_t) nx * ny * nz * nt; \
+	const size_t sites = even_odd ? volume / 2 : volume; \
+	for(size_t i = get_global_id(0); i < sites; i += get_global_size(0)) { \
+		const uint4 coords = getStencilCoords(i, dims, even_odd); \
+		real acc[24]; \
+		for(uint r = 0; r < 24; ++r) { \
+			acc[r] = 0; \
+		} \
+		for(uint mu = 0; mu < 4; ++mu) { \
+			const uint4 shift = (uint4) (mu == 0, mu == 1, mu == 2, mu == 3); \
+			for(int dir = 1; dir >= -1; dir -= 2) { \
+				const uint4 neighbour = (dir > 0) ? (coords + shift) % dims : (coords + dims - shift) % dims; \
+				/* the spinor field holds all sites or, if preconditioned, those of the other parity */ \
+				const size_t site = even_odd ? getStencilLexIndex(neighbour, dims) / 2 : getStencilLexIndex(neighbour, dims); \
+				const size_t link = mu * volume + getStencilSiteIndex((dir > 0) ? coords : neighbour, dims, even_odd); \
+				real psi[24]; \
+				real u[18]; \
+				for(uint r = 0; r < 24; ++r) { \
+					psi[r] = in[STENCIL_INDEX(spinor_part, sites, site, r)]; \
+				} \
+				for(uint r = 0; r < 18; ++r) { \
+					u[r] = links[STENCIL_INDEX(link_part, 4 * volume, link, r)]; \
+				} \
+				for(uint c = 0; c < 4; ++c) { \
+					for(uint a = 0; a < 3; ++a) { \
+						for(uint b = 0; b < 3; ++b) { \
+							const uint k = (dir > 0) ? 2 * (3 * a + b) : 2 * (3 * b + a); \
+							const real re = u[k]; \
+							const real im = (dir > 0) ? u[k + 1] : -u[k + 1]; \
+							acc[6 * c + 2 * a] += re * psi[6 * c + 2 * b] - im * psi[6 * c + 2 * b + 1]; \
+							acc[6 * c + 2 * a + 1] += re * psi[6 * c + 2 * b + 1] + im * psi[6 * c + 2 * b]; \
+						} \
+					} \
+				} \
+			} \
+		} \
+		for(uint r = 0; r < 24; ++r) { \
+			out[STENCIL_INDEX(spinor_part, sites, i, r)] = acc[r]; \
+		} \
+	} \
+}
+
+STENCIL_KERNEL(dslashSp, float, 24, 18)
+STENCIL_KERNEL(dslashSpSOA, float, 6, 2)
+STENCIL_KERNEL(dslashSpFullSOA, float, 2, 1)
+STENCIL_KERNEL(dslashSpFullestSOA, float, 1, 1)
+#ifdef DOUBLE_ENABLED
+STENCIL_KERNEL(dslashDp, double, 24, 18)
+STENCIL_KERNEL(dslashDpSOA, double, 6, 2)
+STENCIL_KERNEL(dslashDpFullSOA, double, 2, 1)
+STENCIL_KERNEL(dslashDpFullestSOA, double, 1, 1)
 #endif /* DOUBLE_ENABLED */
+#endif /* UNIT_STENCIL */
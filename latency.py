@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import pyopencl as cl
+import numpy as np
+from collections import namedtuple
+
+from runner import DataPoint, Launch, get_time
+
+KERNEL = 'chasePointers'
+INDEX_SIZE = 4 # bytes of one index of the chain
+STRIDE = 128 # bytes between the elements of the chain, one per cache line
+STEPS = 1 << 16 # accesses per kernel run
+THRESHOLD = 0.3 # relative latency increase between plateaus considered a cache boundary
+
+# The stride is the spacing of the chain elements in bytes
+LatencyDataPoint = namedtuple('LatencyDataPoint', DataPoint._fields + ('stride',))
+
+def get_chain(elems, stride, seed = 0):
+	"""
+	Returns a chain of indices visiting elems elements, spaced by stride bytes, in random order
+	and then returning to the first one. Element 0 is part of the chain, the rest of the array is unused.
+	"""
+	spacing = stride / INDEX_SIZE
+	order = np.random.RandomState(seed).permutation(np.arange(1, elems, dtype=np.uint32))
+	order = np.concatenate((np.zeros(1, np.uint32), order)) * spacing
+	chain = np.zeros(elems * spacing, np.uint32)
+	chain[order] = np.roll(order, -1)
+	return chain
+
+def get_latency(datapoint, estimator = 'mean'):
+	"""
+	Returns the time of a single access in nanos.
+	"""
+	return get_time(datapoint, estimator) * INDEX_SIZE / datapoint.bytes_transferred
+
+def find_boundaries(datapoints, threshold = THRESHOLD, estimator = 'mean'):
+	"""
+	Detect the boundaries of the cache levels in a sweep over the working set size.
+
+	Neighbouring sizes whose latency rises by more than half the threshold form a transition, as the
+	rise is usually spread over a few sizes. Transitions rising by more than threshold in total are
+	reported as a tuple of the last size before the transition and the latencies before and after it.
+	"""
+	points = sorted(datapoints, key = lambda p: p.mem_size)
+	latencies = map(lambda p: get_latency(p, estimator), points)
+	boundaries = []
+	start = None
+	for i in range(1, len(points) + 1):
+		rising = i < len(points) and latencies[i] > latencies[i - 1] * (1 + threshold / 2)
+		if rising and start == None:
+			start = i - 1
+		elif not rising and start != None:
+			if latencies[i - 1] > latencies[start] * (1 + threshold):
+				boundaries.append((points[start].mem_size, latencies[start], latencies[i - 1]))
+			start = None
+	return boundaries
+
+class LatencyBenchmark:
+	"""
+	Measures the latency of the memory by chasing pointers through a chain of random indices.
+
+	A single thread follows the chain, so each load has to wait for the previous one. The chain is built
+	on the host and uploaded into the input buffer of the given runner, only when the size changes.
+	"""
+
+	def __init__(self, runner, stride = STRIDE, steps = STEPS):
+		if stride % INDEX_SIZE:
+			raise ValueError('The stride has to be a multiple of {0} bytes'.format(INDEX_SIZE))
+		self.runner = runner
+		self.stride = stride
+		self.steps = steps
+		self.max_size = runner.in_buf.tiles[0].size
+		self.mem_size = None # size of the chain currently uploaded
+
+		prg, cached, error = runner.build_unit('latency')
+		if error:
+			raise error
+		runner.programs['latency'] = prg
+		self.kernel = getattr(prg, KERNEL)
+
+	def upload(self, mem_size):
+		if mem_size != self.mem_size:
+			chain = get_chain(mem_size / self.stride, self.stride)
+			cl.enqueue_copy(self.runner.queue, self.runner.in_buf.tiles[0], chain).wait()
+			self.mem_size = mem_size
+
+	def benchmark(self, mem_size, sampler = None):
+		"""
+		Benchmark a chain spanning mem_size bytes. The transferred bytes are those of the loaded indices.
+		"""
+		if not sampler:
+			sampler = self.runner.sampler
+		if mem_size > self.max_size:
+			raise ValueError('The memory size of {0} bytes exceeds the buffer size of {1} bytes'.format(mem_size, self.max_size))
+		if mem_size < 2 * self.stride:
+			raise ValueError('The memory size of {0} bytes holds less than two elements of {1} bytes'.format(mem_size, self.stride))
+		self.upload(mem_size)
+		args = [self.runner.out_buf.tiles[0], self.runner.in_buf.tiles[0], np.uint64(self.steps)]
+		launch = Launch(KERNEL, self.kernel, [args], 1, 1, mem_size, self.steps * INDEX_SIZE)
+
+		event_times, warmup = sampler.sample(lambda runs: self.runner.enqueue_runs(launch, runs))
+		# the peak bandwidth of the memory is no bound for dependent loads
+		datapoint = self.runner.get_datapoint(launch, event_times)._replace(efficiency = None)
+		return LatencyDataPoint(*datapoint, stride = self.stride)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import pyopencl as cl
+import numpy as np
+from collections import namedtuple, OrderedDict
+
+from registry import ACCESS_MODES
+from runner import DataPoint, Launch
+
+# element type -> (bytes per element, requires double precision)
+TYPES = OrderedDict([
+	('Float', (4, False)),
+	('Float2', (8, False)),
+	('Float4', (16, False)),
+	('Double', (8, True)),
+])
+
+STRIDES = (1, 2, 3, 4, 8, 16, 32) # odd strides never conflict, powers of two conflict more the larger they get
+LOCAL_THREADS = (64, 128, 256)
+ITERATIONS = 1024 # accesses per thread and kernel run
+GROUPS_PER_CU = 8 # work-groups launched per compute unit
+
+# The stride is given in elements, bytes_per_cycle is the bandwidth per clock cycle and compute unit
+LocalDataPoint = namedtuple('LocalDataPoint', DataPoint._fields + ('stride', 'bytes_per_cycle'))
+
+def get_kernel_name(access, elemtype):
+	return '{0}Local{1}'.format(access, elemtype)
+
+def get_kernel_names():
+	return [get_kernel_name(access, elemtype) for elemtype in TYPES for access in ACCESS_MODES]
+
+def parse_kernel_name(kernelname):
+	"""
+	Returns the access mode and element type of a local memory kernel.
+	"""
+	for elemtype in TYPES:
+		for access in ACCESS_MODES:
+			if get_kernel_name(access, elemtype) == kernelname:
+				return (access, elemtype)
+	raise NameError("Don't know how to run {0}".format(kernelname))
+
+def get_bytes_per_cycle(bandwidth, clock, compute_units):
+	"""
+	Convert a bandwidth in GB/s into bytes per cycle and compute unit, given the clock in MHz.
+	"""
+	return bandwidth * 1000 / clock / compute_units
+
+class LocalMemoryBenchmark:
+	"""
+	Measures the bandwidth of local memory, using the output buffer of the given runner to keep the
+	results of the kernels alive.
+
+	Each work-group accesses a scratch buffer of local_threads elements spaced by stride. The bandwidth
+	counts the bytes read and written by the threads in their loop, the initialization is neglected.
+	"""
+
+	def __init__(self, runner, iterations = ITERATIONS, groups_per_cu = GROUPS_PER_CU):
+		self.runner = runner
+		self.iterations = iterations
+		self.groups_per_cu = groups_per_cu
+		self.kernels = {}
+
+		prg, cached, error = runner.build_unit('local')
+		if error:
+			raise error
+		runner.programs['local'] = prg
+		self.program = prg
+
+	def get_kernel(self, kernelname):
+		if kernelname not in self.kernels:
+			self.kernels[kernelname] = getattr(self.program, kernelname)
+		return self.kernels[kernelname]
+
+	def prepare(self, kernelname, local_threads, stride):
+		"""
+		Check the parameters against the limits of the device and return the resulting Launch.
+		The memory size of the launch is the size of the scratch buffer of a work-group.
+		"""
+		access, elemtype = parse_kernel_name(kernelname)
+		elem_size, fp64 = TYPES[elemtype]
+		device = self.runner.device
+		if fp64 and not self.runner.hasDoublePrecisionSupport():
+			raise ValueError('{0} requires double precision support'.format(kernelname))
+
+		scratch_size = local_threads * stride * elem_size * (2 if access == 'copy' else 1)
+		if scratch_size > device.local_mem_size:
+			raise ValueError('The scratch buffer of {0} bytes exceeds the local memory of {1} bytes'.format(scratch_size, device.local_mem_size))
+		kernel = self.get_kernel(kernelname)
+		max_threads = kernel.get_work_group_info(cl.kernel_work_group_info.WORK_GROUP_SIZE, device)
+		if local_threads > max_threads:
+			raise ValueError('{0} supports at most {1} local threads'.format(kernelname, max_threads))
+
+		global_threads = local_threads * device.max_compute_units * self.groups_per_cu
+		out_buf = self.runner.out_buf.tiles[0]
+		if global_threads * elem_size > out_buf.size:
+			raise ValueError('The output of {0} threads of {1} exceeds the buffer size of {2} bytes'.format(global_threads, kernelname, out_buf.size))
+
+		args = [out_buf]
+		if access == 'write':
+			args.append(np.float32(1.))
+		args += [cl.LocalMemory(scratch_size), np.uint32(stride), np.uint32(self.iterations)]
+		bytes_transferred = global_threads * self.iterations * elem_size * (2 if access == 'copy' else 1)
+		return Launch(kernelname, kernel, [args], global_threads, local_threads, scratch_size, bytes_transferred)
+
+	def benchmark(self, kernelname, local_threads, stride, sampler = None):
+		if not sampler:
+			sampler = self.runner.sampler
+		launch = self.prepare(kernelname, local_threads, stride)
+
+		event_times, warmup = sampler.sample(lambda runs: self.runner.enqueue_runs(launch, runs))
+		# the peak bandwidth of global memory is no bound for local memory
+		datapoint = self.runner.get_datapoint(launch, event_times)._replace(efficiency = None)
+		device = self.runner.device
+		bytes_per_cycle = get_bytes_per_cycle(datapoint.bandwidth, device.max_clock_frequency, device.max_compute_units)
+		return LocalDataPoint(*datapoint, stride = stride, bytes_per_cycle = bytes_per_cycle)
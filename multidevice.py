@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import multiprocessing
+import Queue
+
+from runner import Runner, get_device_indices
+
+# Most OpenCL implementations do not survive a fork once they have been initialized.
+# Therefore the parent process never uses OpenCL itself, all of it happens in child processes.
+
+def resolve_devices(selector):
+	"""
+	Resolve the given device selector into a list of (platform, device) index tuples,
+	see runner.get_device_indices(). The platforms are queried in a child process.
+	"""
+	pool = multiprocessing.Pool(1)
+	try:
+		return pool.apply(get_device_indices, (selector,))
+	finally:
+		pool.close()
+		pool.join()
+
+def run_worker(job):
+	device, runner_args, func, func_args, datapoint_queue = job
+	runner_args = dict(runner_args)
+	runner_args['device'] = device
+	runner = Runner(**runner_args)
+	if datapoint_queue:
+		return func(runner, *func_args, report = datapoint_queue.put)
+	return func(runner, *func_args)
+
+def run_on_devices(devices, runner_args, func, *func_args, **kwargs):
+	"""
+	Run func(runner, *func_args) on each of the given devices at the same time.
+
+	Each device is driven by its own worker process with its own Runner created from runner_args.
+	func has to be a module level function returning a list of DataPoints. The returned list
+	contains the datapoints of all devices, ordered by device. As each DataPoint carries the
+	id of its device they can be told apart after merging.
+
+	If the keyword argument report is given, func is passed a report function as well, which it has
+	to call with each datapoint as soon as it has been measured. report is then called with these
+	datapoints in the parent process while the workers are still running.
+	"""
+	report = kwargs.get('report')
+	manager = multiprocessing.Manager() if report else None
+	datapoint_queue = manager.Queue() if report else None
+	pool = multiprocessing.Pool(len(devices))
+	try:
+		jobs = [(device, runner_args, func, func_args, datapoint_queue) for device in devices]
+		# waiting with a timeout keeps the workers interruptible by Ctrl-C
+		pending = pool.map_async(run_worker, jobs)
+		if report:
+			while not pending.ready():
+				try:
+					report(datapoint_queue.get(True, 0.1))
+				except Queue.Empty:
+					pass
+		results = pending.get(365 * 24 * 3600)
+		if report:
+			while not datapoint_queue.empty():
+				report(datapoint_queue.get())
+		pool.close()
+	except:
+		pool.terminate()
+		raise
+	finally:
+		pool.join()
+		if manager:
+			manager.shutdown()
+
+	datapoints = []
+	for result in results:
+		datapoints.extend(result)
+	return datapoints
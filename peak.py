@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import pyopencl as cl
+import json
+import os
+
+PEAK_FILE = os.path.join(os.path.expanduser('~'), '.config', 'clBandwidth', 'peaks.json')
+
+# Theoretical peak bandwidth in GB/s of devices whose name identifies a single memory configuration,
+# taken from the vendor data sheets
+KNOWN_PEAKS = {
+	'Tesla C2050': 144.0,
+	'Tesla C2070': 144.0,
+	'Tesla M2090': 177.6,
+	'GeForce GTX 480': 177.4,
+	'GeForce GTX 580': 192.4,
+	'Tesla K20c': 208.0,
+	'Tesla K40c': 288.0,
+}
+
+def get_device_names(device):
+	"""
+	Returns the names the device is looked up by in the peak tables, most specific first.
+
+	AMD devices report the name of their chip, e.g. Cypress, which is shared by boards with different
+	memory. If available, the board name of cl_amd_device_attribute_query is tried first.
+	"""
+	names = []
+	if 'cl_amd_device_attribute_query' in device.extensions and hasattr(cl.device_info, 'BOARD_NAME_AMD'):
+		try:
+			names.append(device.get_info(cl.device_info.BOARD_NAME_AMD).strip())
+		except (cl.RuntimeError, cl.LogicError):
+			pass
+	names.append(device.name.strip())
+	return names
+
+def load_peak_table(filename = PEAK_FILE):
+	"""
+	Load a user supplied table of peak bandwidths, a JSON object mapping device names to GB/s.
+	"""
+	if not filename or not os.path.exists(filename):
+		return {}
+	f = open(filename, 'r')
+	try:
+		return dict((name, float(peak)) for name, peak in json.load(f).iteritems())
+	finally:
+		f.close()
+
+def get_peak_bandwidth(device, filename = PEAK_FILE):
+	"""
+	Returns the theoretical peak bandwidth of the device's global memory in GB/s or None if it is unknown.
+
+	Neither cl_amd_device_attribute_query nor cl_nv_device_attribute_query report the memory clock,
+	so the peak cannot be calculated from the bus width. Instead it is looked up in the user supplied
+	table, which takes precedence, and then in KNOWN_PEAKS.
+	"""
+	table = load_peak_table(filename)
+	for peaks in (table, KNOWN_PEAKS):
+		for name in get_device_names(device):
+			if name in peaks:
+				return peaks[name]
+	return None
+
+def plot_peaks(plt, peaks):
+	"""
+	Mark the given peak bandwidths in the current plot. None values are ignored.
+
+	If there is a single peak, a second axis shows the efficiency. Call this last, after the limits
+	of the plot have been set, as it makes the second axis the current one.
+	"""
+	peaks = sorted(set(filter(None, peaks)))
+	for peak in peaks:
+		plt.axhline(y=peak, color='g', linestyle='--')
+	if len(peaks) == 1:
+		ymin, ymax = plt.ylim()
+		ymax = max(ymax, peaks[0] * 1.05)
+		plt.ylim(ymin, ymax)
+		axis = plt.twinx()
+		axis.set_ylim(ymin * 100 / peaks[0], ymax * 100 / peaks[0])
+		axis.set_ylabel('% of Peak')
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import pyopencl as cl
+import hashlib
+import os
+import tempfile
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'clBandwidth')
+MAX_CACHE_SIZE = 256 * 1024 * 1024 # 256 MiB
+CACHE_SUFFIX = '.clbin'
+
+class ProgramCache:
+	"""
+	Persistent cache of OpenCL program binaries.
+
+	Entries are keyed by the program source, the build options and the device, driver and platform
+	they were built for, so any change in one of those automatically misses the cache. Once the
+	cache grows beyond max_size the least recently used entries are evicted.
+	"""
+
+	def __init__(self, path = CACHE_DIR, max_size = MAX_CACHE_SIZE):
+		self.path = path
+		self.max_size = max_size
+		if not os.path.isdir(path):
+			os.makedirs(path)
+
+	def get_key(self, source, options, device):
+		h = hashlib.sha1()
+		for part in (source, options, device.name, device.driver_version, device.version, device.platform.name, device.platform.version):
+			h.update(part.encode('utf8') if isinstance(part, unicode) else part)
+			h.update('\0')
+		return h.hexdigest()
+
+	def get_file(self, key):
+		return os.path.join(self.path, key + CACHE_SUFFIX)
+
+	def load(self, key):
+		"""
+		Returns the cached binary for the given key or None.
+		"""
+		filename = self.get_file(key)
+		try:
+			f = open(filename, 'rb')
+		except IOError:
+			return None
+		try:
+			binary = f.read()
+		finally:
+			f.close()
+		os.utime(filename, None) # mark as recently used
+		return binary
+
+	def store(self, key, binary):
+		# write to a temporary file first so concurrent runs never see partial binaries
+		fd, tmpname = tempfile.mkstemp(dir=self.path)
+		f = os.fdopen(fd, 'wb')
+		try:
+			f.write(binary)
+		finally:
+			f.close()
+		os.rename(tmpname, self.get_file(key))
+		self.evict()
+
+	def invalidate(self, key):
+		try:
+			os.remove(self.get_file(key))
+		except OSError:
+			pass
+
+	def clear(self):
+		for entry in self.get_entries():
+			self.invalidate(entry[2])
+
+	def get_entries(self):
+		"""
+		Returns a list of (mtime, size, key) tuples for all cache entries.
+		"""
+		entries = []
+		for filename in os.listdir(self.path):
+			if not filename.endswith(CACHE_SUFFIX):
+				continue
+			try:
+				stat = os.stat(os.path.join(self.path, filename))
+			except OSError:
+				continue # removed concurrently
+			entries.append((stat.st_mtime, stat.st_size, filename[:-len(CACHE_SUFFIX)]))
+		return entries
+
+	def evict(self):
+		entries = sorted(self.get_entries())
+		total = sum(map(lambda entry: entry[1], entries))
+		while total > self.max_size and entries:
+			mtime, size, key = entries.pop(0)
+			self.invalidate(key)
+			total -= size
+
+	def build(self, ctx, source, options = ''):
+		"""
+		Build the given source for the single device of ctx, using a cached binary if possible.
+
+		Returns a tuple of the program and whether it was loaded from the cache.
+		"""
+		devices = ctx.devices
+		if len(devices) != 1:
+			raise ValueError('The program cache only supports contexts with a single device')
+		device = devices[0]
+		key = self.get_key(source, options, device)
+
+		binary = self.load(key)
+		if binary != None:
+			try:
+				return (cl.Program(ctx, devices, [binary]).build(options), True)
+			except (cl.RuntimeError, cl.LogicError):
+				# driver refused the binary, fall back to building from source
+				self.invalidate(key)
+
+		prg = cl.Program(ctx, source).build(options)
+		self.store(key, prg.get_info(cl.program_info.BINARIES)[0])
+		return (prg, False)
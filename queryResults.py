@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import optparse
+import time
+from datetime import datetime
+
+import results
+
+def parse_date(value):
+	"""
+	Convert a date given as YYYY-MM-DD into a unix time.
+	"""
+	return time.mktime(datetime.strptime(value, '%Y-%m-%d').timetuple())
+
+def format_time(value):
+	return datetime.fromtimestamp(value).strftime('%Y-%m-%d %H:%M')
+
+if __name__ == '__main__':
+	parser = optparse.OptionParser(usage='%prog [options] DATABASE', description='Query the results recorded by the benchmark scripts with --database')
+	parser.add_option('-d', '--device', dest='devices', action='append', metavar='NAME', help='Only show results of devices whose name contains NAME, can be given multiple times')
+	parser.add_option('-k', '--kernel', dest='kernels', action='append', metavar='KERNEL', help='Only show results of the given kernel, can be given multiple times')
+	parser.add_option('-s', '--mem-size', dest='mem_sizes', type=int, action='append', metavar='BYTE', help='Only show results of the given memory size, can be given multiple times')
+	parser.add_option('--host', dest='hosts', action='append', metavar='NAME', help='Only show results of hosts whose name contains NAME, can be given multiple times')
+	parser.add_option('--since', metavar='YYYY-MM-DD', help='Only show results of runs started on or after the given day')
+	parser.add_option('--until', metavar='YYYY-MM-DD', help='Only show results of runs started before the given day')
+	parser.add_option('--runs', action='store_true', default=False, help='List the recorded runs instead of their results')
+	parser.add_option('-p', '--plot', action='store_true', default=False, help='Plot the bandwidth of each kernel, memory size and device over time')
+	parser.add_option('-o', '--plot-file', metavar='FILE', help='File to store the plot in (Display if unset)')
+
+	(args, rem) = parser.parse_args()
+	if len(rem) != 1:
+		parser.error('Exactly one database has to be given')
+	database = rem[0]
+
+	if args.runs:
+		print '#Run Started Host Script Device Driver Datapoints'
+		for run in results.get_runs(database):
+			print '{0[id]} {1} {0[host]} {0[script]} {0[device]} {0[driver_version]} {0[datapoints]}'.format(run, format_time(run['started']))
+		raise SystemExit
+
+	rows = results.query(database, args.devices, args.kernels, args.mem_sizes, args.hosts,
+	                     parse_date(args.since) if args.since else None, parse_date(args.until) if args.until else None)
+
+	print '#Run Started Host Device Driver Kernel Bytes nanos (rel err) GB/s'
+	for row in rows:
+		print '{0[run]} {1} {0[host]} {0[device]} {0[driver_version]} {0[kernel]} {0[mem_size]} {0[time]:.0f} ({2:.1%}) {0[bandwidth]}'.format(row, format_time(row['started']), row['time_std'] / row['time'])
+
+	if args.plot:
+		import matplotlib.pyplot as plt # by including it here we won't need it unless we want to plot
+
+		series = []
+		for row in rows:
+			key = (row['device'], row['kernel'], row['mem_size'])
+			if key not in series:
+				series.append(key)
+
+		for key in series:
+			points = filter(lambda row: (row['device'], row['kernel'], row['mem_size']) == key, rows)
+			dates = map(lambda row: datetime.fromtimestamp(row['started']), points)
+			bandwidths = map(lambda row: row['bandwidth'], points)
+			plt.plot(dates, bandwidths, '.-', label='{0} {1} {2}'.format(*key))
+
+		plt.title('Bandwidth History')
+		plt.xlabel('Date')
+		plt.ylabel('GB/s')
+		if len(series) > 1:
+			plt.legend(loc='lower right')
+		plt.gcf().autofmt_xdate()
+
+		if args.plot_file:
+			plt.savefig(args.plot_file)
+		else:
+			plt.show()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import math
+import numpy as np
+
+TOLERANCE = 0.05 # relative bandwidth change between neighbouring points that gets refined
+STEPS_PER_OCTAVE = 4 # points per doubling of the size in the initial grid
+MAX_MODULUS = 64 # largest period in strides searched for resonances, see find_resonances()
+MIN_F = 4. # F statistic the residues of a resonance have to be separated by, about the 99% quantile for few residues
+
+def get_sizes(min_size, max_size, steps_per_octave, granularity = 1):
+	"""
+	Returns sizes from min_size up to max_size, evenly spaced on a logarithmic scale
+	and rounded to multiples of granularity.
+	"""
+	sizes = []
+	i = 0
+	while True:
+		size = int(round(min_size * 2 ** (float(i) / steps_per_octave) / granularity)) * granularity
+		if size > max_size:
+			return sizes
+		if size not in sizes:
+			sizes.append(size)
+		i += 1
+
+def needs_refinement(a, b, tolerance):
+	"""
+	Returns whether the interval between the datapoints a and b has to be refined, because the bandwidth
+	changes by more than tolerance between them or either of them varies by more than tolerance.
+	"""
+	change = abs(a.bandwidth - b.bandwidth) / max(a.bandwidth, b.bandwidth)
+	noise = max(a.time_std / a.time, b.time_std / b.time)
+	return change > tolerance or noise > tolerance
+
+def get_refinements(datapoints, tolerance = TOLERANCE, granularity = 1, key = lambda p: p.mem_size):
+	"""
+	Returns the sizes bisecting each interval between neighbouring datapoints that needs refinement.
+
+	Sizes are rounded to multiples of granularity, intervals that cannot be split any further are skipped.
+	key returns the size of a datapoint.
+	"""
+	points = sorted(datapoints, key = key)
+	sizes = []
+	for a, b in zip(points[:-1], points[1:]):
+		if not needs_refinement(a, b, tolerance):
+			continue
+		middle = (key(a) + key(b)) / 2 / granularity * granularity
+		if key(a) < middle < key(b):
+			sizes.append(middle)
+	return sizes
+
+# A two dimensional grid is given as a list of (size, first_stride, count) tuples, one for each size,
+# holding count strides spaced by granularity from first_stride on. Points of the grid are (size, stride)
+# tuples. Grids can hold far too many points to list them, so only the points to measure are created.
+
+def get_lattice_step(count, points):
+	"""
+	Returns the step of a lattice over count points holding about the given number of points, see get_lattice().
+
+	The step is odd, so the strides of the lattice cover all residues modulo powers of two.
+	"""
+	step = max(1, int(math.ceil(math.sqrt(float(count) / max(points, 1)))))
+	return step if step % 2 else step + 1
+
+def get_lattice(grid, granularity, step, offset = 0):
+	"""
+	Returns the points of every step-th size of the grid and of those every step-th stride, starting at offset.
+	"""
+	points = []
+	for size, first_stride, count in grid[offset::step]:
+		points.extend((size, first_stride + i * granularity) for i in range(offset, count, step))
+	return points
+
+def find_resonances(datapoints, granularity, tolerance = TOLERANCE, max_modulus = MAX_MODULUS):
+	"""
+	Detect stride resonances, like the banding of partition camping, in measurements of a grid.
+
+	Each bandwidth is normalized by the median bandwidth of its size. For each power of two up to
+	max_modulus, the datapoints are grouped by their stride in units of granularity modulo that
+	modulus. The modulus separating the groups best by the F statistic of an analysis of variance
+	is chosen, provided its F exceeds MIN_F. Returns a tuple of the modulus and the residues whose median
+	normalized bandwidth deviates by more than tolerance from the overall median, or None if there are none.
+	"""
+	sizes = np.array(map(lambda p: p.mem_size, datapoints))
+	strides = np.array(map(lambda p: p.stride / granularity, datapoints))
+	bandwidths = np.array(map(lambda p: float(p.bandwidth), datapoints))
+
+	normalized = np.empty(len(datapoints))
+	for size in np.unique(sizes):
+		median = np.median(bandwidths[sizes == size])
+		normalized[sizes == size] = bandwidths[sizes == size] / median if median > 0 else np.nan
+	strides = strides[np.isfinite(normalized)]
+	normalized = normalized[np.isfinite(normalized)]
+
+	best = None
+	modulus = 2
+	while modulus <= max_modulus:
+		residues = strides % modulus
+		groups = map(lambda r: normalized[residues == r], range(modulus))
+		if min(map(len, groups)) < 2:
+			break # too few datapoints to tell the residues apart
+		between = sum(map(lambda group: len(group) * (np.mean(group) - np.mean(normalized)) ** 2, groups)) / (modulus - 1)
+		within = sum(map(lambda group: np.sum((group - np.mean(group)) ** 2), groups)) / max(len(normalized) - modulus, 1)
+		f = between / within if within > 0 else float('inf')
+		if f > MIN_F and (best == None or f > best[0]):
+			best = (f, modulus, [r for r, group in enumerate(groups) if abs(np.median(group) - np.median(normalized)) > tolerance])
+		modulus *= 2
+
+	if best == None or not best[2]:
+		return None
+	return (best[1], best[2])
+
+def get_resonance_indices(first_stride, count, granularity, resonances):
+	"""
+	Returns the indices of the strides of a row of the grid that lie on one of the resonances returned by find_resonances().
+	"""
+	modulus, residues = resonances
+	start = first_stride / granularity
+	return sorted(i for residue in residues for i in range((residue - start) % modulus, count, modulus))
+
+def get_resonance_points(grid, granularity, resonances, points):
+	"""
+	Returns about the given number of points of the grid whose stride lies on one of the resonances,
+	taken from a lattice over the sizes and the resonating strides of each size.
+	"""
+	modulus, residues = resonances
+	step = get_lattice_step(sum(map(lambda row: row[2], grid)) * len(residues) / modulus, points)
+	result = []
+	for size, first_stride, count in grid[::step]:
+		indices = get_resonance_indices(first_stride, count, granularity, resonances)
+		result.extend((size, first_stride + i * granularity) for i in indices[::step])
+	return result
+
+def thin_out(points, count):
+	"""
+	Returns count points evenly spread over the given list of points, or all of them if there are fewer.
+	"""
+	if len(points) <= count:
+		return list(points)
+	return [points[i] for i in np.unique(np.linspace(0, len(points) - 1, count).astype(int))]
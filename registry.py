@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import numpy as np
+import os
+from collections import namedtuple, OrderedDict
+
+import generator
+from indices import INDEX_SIZE, PATTERNS
+
+ACCESS_MODES = ('copy', 'read', 'write')
+
+# Kinds of memory read by the kernels: global buffers, constant buffers and 2D images of
+# RGBA float or half texels, see Runner.get_image()
+MEMORIES = ('global', 'constant', 'image', 'imageHalf')
+
+# Description of a single kernel in kernels.cl.
+# unit is the compile unit of kernels.cl containing the kernel.
+# storage_size is the number of bytes one element occupies in the buffer (including padding),
+# elem_size the number of bytes actually moved per element. scalar_type is the type of the
+# value written by write kernels. stride and local tell whether the kernel takes an SOA stride
+# or a local scratch buffer of local_threads elements as additional arguments.
+# memory is the kind of memory the kernel reads from, one of MEMORIES. pattern is the index pattern
+# of gather and scatter kernels, see indices.PATTERNS, and None for all other kernels.
+_KernelInfo = namedtuple('KernelInfo', 'name unit access storage_size elem_size scalar_type stride local fp64 memory pattern')
+
+class KernelInfo(_KernelInfo):
+	__slots__ = ()
+
+	def get_elems(self, mem_size):
+		return mem_size / self.storage_size
+
+	def get_bytes_transferred(self, elems, global_threads):
+		# gather and scatter kernels additionally read one index per element
+		indices = elems * INDEX_SIZE if self.pattern else 0
+		if self.access == 'copy':
+			return elems * self.elem_size * 2 + indices
+		elif self.access == 'read':
+			# each thread writes back one element to keep the compiler from optimizing the reads away
+			return (elems + global_threads) * self.elem_size + indices
+		else:
+			return elems * self.elem_size
+
+# Compile units of kernels.cl and the preprocessor macros selecting them
+UNITS = OrderedDict([
+	('float', 'UNIT_FLOAT'),
+	('spComplex', 'UNIT_SP_COMPLEX'),
+	('spSu3vec', 'UNIT_SP_SU3VEC'),
+	('spSu3', 'UNIT_SP_SU3'),
+	('spSpinor', 'UNIT_SP_SPINOR'),
+	('double', 'UNIT_DOUBLE'),
+	('dpComplex', 'UNIT_DP_COMPLEX'),
+	('dpSu3vec', 'UNIT_DP_SU3VEC'),
+	('dpSu3', 'UNIT_DP_SU3'),
+	('dpSpinor', 'UNIT_DP_SPINOR'),
+	('spImage', 'UNIT_SP_IMAGE'),
+	('dpImage', 'UNIT_DP_IMAGE'),
+	('latency', 'UNIT_LATENCY'),
+	('local', 'UNIT_LOCAL'),
+	('stencil', 'UNIT_STENCIL'),
+])
+
+# Pseudo unit of the driver primitives, see add_driver_kernels()
+DRIVER_UNIT = 'driver'
+
+KERNELS = OrderedDict()
+
+# kernel name -> bytes of the element a compressed kernel reconstructs, see add_compressed_family()
+RECONSTRUCTED_SIZES = {}
+
+KERNELS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kernels.cl')
+
+def get_unit_options(unit):
+	"""
+	Build options to compile only the given unit of kernels.cl.
+	"""
+	return '-D UNITS_SELECTED -D {0}'.format(UNITS[unit])
+
+def get_unit_source(unit):
+	"""
+	Returns a tuple of the source and the build options of the given compile unit.
+	Units not part of kernels.cl are produced by the kernel generator.
+	"""
+	if unit in UNITS:
+		f = open(KERNELS_FILE, 'r')
+		try:
+			return (f.read(), get_unit_options(unit))
+		finally:
+			f.close()
+	else:
+		return (generator.generate_source(unit), '')
+
+def is_generated(info):
+	return info.unit not in UNITS and info.unit != DRIVER_UNIT
+
+def is_driver(info):
+	return info.unit == DRIVER_UNIT
+
+def is_image(info):
+	return info.memory in ('image', 'imageHalf')
+
+def get_function_name(info):
+	"""
+	Returns the name of the kernel function in the source. Gather and scatter kernels share the
+	function of all index patterns, their names only carry the pattern to tell the results apart.
+	"""
+	return info.name[:-len(info.pattern)] if info.pattern else info.name
+
+def add_family(unit, base, storage_size, elem_size = None, scalar_type = np.float32, stride = False, local = False, fp64 = False):
+	"""
+	Register the copy, read and write kernel of the given base name, e.g. SpSu3Restricted.
+	"""
+	if elem_size == None:
+		elem_size = storage_size
+	for access in ACCESS_MODES:
+		name = access + base
+		KERNELS[name] = KernelInfo(name, unit, access, storage_size, elem_size, scalar_type, stride, local, fp64, 'global', None)
+
+def add_compressed_family(unit, base, storage_size, reconstructed_size, stride = False, fp64 = False):
+	"""
+	Register the copy, read and write kernel of a compressed type, e.g. SpSu3Recon12Restricted.
+	The transferred bytes are those of the compressed storage, see get_element_rate() of the runner
+	for the rate of reconstructed elements.
+	"""
+	add_family(unit, base, storage_size, stride = stride, fp64 = fp64)
+	for access in ACCESS_MODES:
+		RECONSTRUCTED_SIZES[access + base] = reconstructed_size
+
+def add_indexed_family(unit, base, storage_size, scalar_type = np.float32, fp64 = False):
+	"""
+	Register the gather and scatter copy and the gather read kernel of the given base name for
+	each index pattern, e.g. copySpSu3GatherRandom.
+	"""
+	for access, mode in (('copy', 'Gather'), ('copy', 'Scatter'), ('read', 'Gather')):
+		for pattern in PATTERNS:
+			name = access + base + mode + pattern
+			KERNELS[name] = KernelInfo(name, unit, access, storage_size, storage_size, scalar_type, False, False, fp64, 'global', pattern)
+
+def add_read_kernel(unit, name, storage_size, elem_size, memory, fp64 = False):
+	"""
+	Register a read kernel fetching from the given kind of memory.
+
+	Image elements are padded to whole texels. Half texels store the values with half the size,
+	but the elements are counted with the size of the type they are read as, so the bandwidth is
+	directly comparable with that of the corresponding global memory kernel.
+	"""
+	KERNELS[name] = KernelInfo(name, unit, 'read', storage_size, elem_size, np.float64 if fp64 else np.float32, False, False, fp64, memory, None)
+
+def add_driver_kernels():
+	"""
+	Register the driver's buffer copy and fill as pseudo-kernels moving floats.
+	They are not built from source but run directly by the Runner, giving a reference for the copy and write kernels.
+	"""
+	KERNELS['driverCopy'] = KernelInfo('driverCopy', DRIVER_UNIT, 'copy', 4, 4, np.float32, False, False, False, 'global', None)
+	KERNELS['driverFill'] = KernelInfo('driverFill', DRIVER_UNIT, 'write', 4, 4, np.float32, False, False, False, 'global', None)
+
+def get_kernel_info(kernelname):
+	try:
+		return KERNELS[kernelname]
+	except KeyError:
+		raise NameError( "Don't know how to run {0}".format(kernelname) )
+
+#
+# driver primitives
+add_driver_kernels()
+
+#
+# single precision kernels
+#
+add_family('float', 'Float', 4)
+add_family('float', 'FloatRestricted', 4)
+add_family('float', 'Float2', 8)
+add_family('float', 'Float4', 16)
+add_family('spComplex', 'SpComplex', 8)
+add_family('spComplex', 'SpComplexRestricted', 8)
+add_family('spComplex', 'AlignedSpComplex', 8)
+add_family('spComplex', 'AlignedSpComplexRestricted', 8)
+add_indexed_family('spComplex', 'SpComplex', 8)
+add_family('spSu3vec', 'SpSu3vec', 24)
+add_family('spSu3vec', 'SpSu3vecRestricted', 24)
+add_family('spSu3vec', 'AlignedSpSu3vecRestricted', 32, 24)
+add_family('spSu3vec', 'Aligned8SpSu3vecRestricted', 24)
+add_family('spSu3vec', 'Aligned16SpSu3vecRestricted', 32, 24)
+add_family('spSu3vec', 'Aligned32SpSu3vecRestricted', 32, 24)
+add_family('spSu3vec', 'SpSu3vecFromAlignedRestricted', 24)
+add_indexed_family('spSu3vec', 'SpSu3vec', 24)
+add_family('spSu3', 'SpSu3', 72)
+add_family('spSu3', 'SpSu3Restricted', 72)
+add_family('spSu3', 'SpSu3FromAlignedRestricted', 72)
+add_family('spSu3', 'Aligned8SpSu3Restricted', 72)
+add_family('spSu3', 'SpSu3SOARestricted', 72, stride = True)
+add_family('spSu3', 'SpSu3FromAlignedSOARestricted', 72, stride = True)
+add_family('spSu3', 'SpSu3ViaLocalRestricted', 72, local = True)
+add_family('spSu3', 'SpSu3FromAlignedViaLocalRestricted', 72, local = True)
+add_read_kernel('spSu3', 'readSpSu3Constant', 72, 72, 'constant')
+add_compressed_family('spSu3', 'SpSu3Recon12Restricted', 48, 72)
+add_compressed_family('spSu3', 'SpSu3Recon12SOARestricted', 48, 72, stride = True)
+add_compressed_family('spSu3', 'SpSu3Recon8Restricted', 32, 72)
+add_compressed_family('spSu3', 'SpSu3Recon8SOARestricted', 32, 72, stride = True)
+add_read_kernel('spImage', 'readSpSu3Image', 80, 72, 'image')
+add_read_kernel('spImage', 'readSpSu3ImageHalf', 40, 72, 'imageHalf')
+add_indexed_family('spSu3', 'SpSu3', 72)
+add_family('spSpinor', 'SpSpinor', 96)
+add_family('spSpinor', 'SpSpinorRestricted', 96)
+add_family('spSpinor', 'SpSpinorFromAlignedRestricted', 96)
+add_family('spSpinor', 'Aligned8SpSpinorRestricted', 96)
+add_family('spSpinor', 'Aligned16SpSpinorRestricted', 96)
+add_family('spSpinor', 'Aligned32SpSpinorRestricted', 96)
+add_family('spSpinor', 'SpSpinorSOARestricted', 96, stride = True)
+add_family('spSpinor', 'SpSpinorFullSOARestricted', 96, stride = True)
+add_family('spSpinor', 'SpSpinorFullAlignedSOARestricted', 96, stride = True)
+add_family('spSpinor', 'SpSpinorFromAlignedSOARestricted', 96, stride = True)
+add_family('spSpinor', 'SpSpinorViaLocalRestricted', 96, local = True)
+add_read_kernel('spSpinor', 'readSpSpinorConstant', 96, 96, 'constant')
+add_read_kernel('spImage', 'readSpSpinorImage', 96, 96, 'image')
+add_read_kernel('spImage', 'readSpSpinorImageHalf', 48, 96, 'imageHalf')
+add_indexed_family('spSpinor', 'SpSpinor', 96)
+
+#
+# double precision kernels
+#
+add_family('double', 'Double', 8, scalar_type = np.float64, fp64 = True)
+add_family('double', 'DoubleRestricted', 8, scalar_type = np.float64, fp64 = True)
+add_family('double', 'Double2', 16, scalar_type = np.float64, fp64 = True)
+add_family('double', 'Double4', 32, scalar_type = np.float64, fp64 = True)
+add_family('dpComplex', 'DpComplex', 16, scalar_type = np.float64, fp64 = True)
+add_family('dpComplex', 'DpComplexRestricted', 16, scalar_type = np.float64, fp64 = True)
+add_family('dpComplex', 'AlignedDpComplex', 16, scalar_type = np.float64, fp64 = True)
+add_family('dpComplex', 'AlignedDpComplexRestricted', 16, scalar_type = np.float64, fp64 = True)
+add_indexed_family('dpComplex', 'DpComplex', 16, scalar_type = np.float64, fp64 = True)
+add_family('dpSu3vec', 'DpSu3vec', 48, fp64 = True)
+add_family('dpSu3vec', 'DpSu3vecRestricted', 48, fp64 = True)
+add_family('dpSu3vec', 'Aligned16DpSu3vecRestricted', 48, fp64 = True)
+add_family('dpSu3vec', 'Aligned32DpSu3vecRestricted', 64, 48, fp64 = True)
+add_family('dpSu3vec', 'DpSu3vecSOARestricted', 48, stride = True, fp64 = True)
+add_family('dpSu3vec', 'DpSu3vecFullSOARestricted', 48, stride = True, fp64 = True)
+add_indexed_family('dpSu3vec', 'DpSu3vec', 48, fp64 = True)
+add_family('dpSu3', 'DpSu3', 144, fp64 = True)
+add_family('dpSu3', 'DpSu3Restricted', 144, fp64 = True)
+add_family('dpSu3', 'Aligned16DpSu3Restricted', 144, fp64 = True)
+add_family('dpSu3', 'Aligned32DpSu3Restricted', 160, 144, fp64 = True)
+add_family('dpSu3', 'DpSu3SOARestricted', 144, stride = True, fp64 = True)
+add_family('dpSu3', 'DpSu3FullSOARestricted', 144, stride = True, fp64 = True)
+add_read_kernel('dpSu3', 'readDpSu3Constant', 144, 144, 'constant', fp64 = True)
+add_compressed_family('dpSu3', 'DpSu3Recon12Restricted', 96, 144, fp64 = True)
+add_compressed_family('dpSu3', 'DpSu3Recon12SOARestricted', 96, 144, stride = True, fp64 = True)
+add_compressed_family('dpSu3', 'DpSu3Recon8Restricted', 64, 144, fp64 = True)
+add_compressed_family('dpSu3', 'DpSu3Recon8SOARestricted', 64, 144, stride = True, fp64 = True)
+add_read_kernel('dpImage', 'readDpSu3Image', 144, 144, 'image', fp64 = True)
+add_indexed_family('dpSu3', 'DpSu3', 144, fp64 = True)
+add_family('dpSpinor', 'DpSpinor', 192, fp64 = True)
+add_family('dpSpinor', 'DpSpinorRestricted', 192, fp64 = True)
+add_family('dpSpinor', 'Aligned16DpSpinorRestricted', 192, fp64 = True)
+add_family('dpSpinor', 'Aligned32DpSpinorRestricted', 192, fp64 = True)
+add_family('dpSpinor', 'DpSpinorSOARestricted', 192, stride = True, fp64 = True)
+add_family('dpSpinor', 'DpSpinorFullSOARestricted', 192, stride = True, fp64 = True)
+add_family('dpSpinor', 'DpSpinorFullestSOARestricted', 192, stride = True, fp64 = True)
+add_read_kernel('dpSpinor', 'readDpSpinorConstant', 192, 192, 'constant', fp64 = True)
+add_read_kernel('dpImage', 'readDpSpinorImage', 192, 192, 'image', fp64 = True)
+add_indexed_family('dpSpinor', 'DpSpinor', 192, fp64 = True)
+
+#
+# generated kernels
+#
+for kernel in generator.get_kernels():
+	KERNELS[kernel.name] = KernelInfo(*kernel)
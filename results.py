@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import json
+import numpy as np
+import os
+import socket
+import sqlite3
+import time
+
+from registry import get_unit_source
+
+LOCK_TIMEOUT = 60 # seconds to wait for other processes writing to the database
+
+# columns of the datapoints table besides run and raw, in the order of DataPoint with the stride of sweepStride.py added
+DATAPOINT_COLUMNS = ('kernel', 'global_threads', 'local_threads', 'bytes_transferred', 'time', 'time_std', 'bandwidth', 'device', 'samples',
+                     'time_median', 'time_min', 'time_p5', 'time_p95', 'time_robust', 'mem_size', 'efficiency', 'stride')
+
+RUN_COLUMNS = ('started', 'host', 'script', 'device', 'device_name', 'vendor', 'driver_version', 'device_version',
+               'platform', 'platform_version', 'build_options', 'parameters')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+	id INTEGER PRIMARY KEY,
+	started REAL, host TEXT, script TEXT,
+	device TEXT, device_name TEXT, vendor TEXT, driver_version TEXT, device_version TEXT,
+	platform TEXT, platform_version TEXT,
+	build_options TEXT, parameters TEXT
+);
+CREATE TABLE IF NOT EXISTS datapoints (
+	run INTEGER REFERENCES runs(id),
+	kernel TEXT, global_threads INTEGER, local_threads INTEGER, bytes_transferred INTEGER,
+	time REAL, time_std REAL, bandwidth REAL, device TEXT, samples INTEGER,
+	time_median REAL, time_min REAL, time_p5 REAL, time_p95 REAL, time_robust REAL,
+	mem_size INTEGER, efficiency REAL, stride INTEGER, raw BLOB
+);
+CREATE INDEX IF NOT EXISTS datapoints_lookup ON datapoints (device, kernel, mem_size);
+CREATE INDEX IF NOT EXISTS datapoints_run ON datapoints (run);
+'''
+
+def connect(filename):
+	"""
+	Open the results database, creating it if required.
+	"""
+	directory = os.path.dirname(filename)
+	if directory and not os.path.isdir(directory):
+		os.makedirs(directory)
+	connection = sqlite3.connect(filename, timeout = LOCK_TIMEOUT)
+	connection.row_factory = sqlite3.Row
+	connection.executescript(SCHEMA)
+	return connection
+
+def to_sql(value):
+	# sqlite cannot store numpy scalars
+	return value.item() if isinstance(value, np.generic) else value
+
+def get_raw(row):
+	"""
+	Returns the time of each run of a datapoint row returned by query() or None if it has not been recorded.
+	"""
+	return np.frombuffer(row['raw'], np.uint64) if row['raw'] != None else None
+
+def get_parameters(runner):
+	"""
+	Returns the parameters the runner was created with as a dict.
+	"""
+	sampler = runner.sampler
+	return {
+		'local_threads': runner.local_threads,
+		'global_threads': runner.global_threads,
+		'max_mem_size': runner.max_mem_size,
+		'use_tuning': runner.use_tuning,
+		'autotune': runner.autotune,
+		'build_cache': runner.build_cache != None,
+		'peak_bandwidth': runner.peak_bandwidth,
+		'precision': sampler.precision,
+		'min_runs': sampler.min_runs,
+		'max_runs': sampler.max_runs,
+		'time_budget': sampler.time_budget,
+	}
+
+class ResultsRecorder:
+	"""
+	Records a run of one of the benchmark scripts on the device of the given runner in the results database.
+
+	Each datapoint is committed right away, so the write lock of the database is only held briefly and multiple
+	processes can record into the same database at once. close() also records the build options of all compile
+	units built during the run.
+	"""
+
+	def __init__(self, filename, runner, script):
+		self.runner = runner
+		self.connection = connect(filename)
+
+		device = runner.device
+		platform = device.platform
+		values = (time.time(), socket.gethostname(), script, runner.device_id, device.name.strip(), device.vendor.strip(),
+		          device.driver_version.strip(), device.version.strip(), platform.name.strip(), platform.version.strip(),
+		          None, json.dumps(get_parameters(runner), sort_keys=True))
+		cursor = self.connection.execute('INSERT INTO runs ({0}) VALUES ({1})'.format(', '.join(RUN_COLUMNS), ', '.join('?' * len(RUN_COLUMNS))), values)
+		self.run = cursor.lastrowid
+		self.connection.commit()
+
+	def write(self, datapoint):
+		values = [self.run] + [to_sql(getattr(datapoint, column, None)) for column in DATAPOINT_COLUMNS]
+		values.append(sqlite3.Binary(np.asarray(datapoint.raw, np.uint64).tobytes()) if datapoint.raw is not None else None)
+		self.connection.execute('INSERT INTO datapoints (run, {0}, raw) VALUES ({1})'.format(', '.join(DATAPOINT_COLUMNS), ', '.join('?' * len(values))), values)
+		self.connection.commit()
+
+	def close(self):
+		build_options = dict((unit, get_unit_source(unit)[1]) for unit in self.runner.programs)
+		self.connection.execute('UPDATE runs SET build_options = ? WHERE id = ?', (json.dumps(build_options, sort_keys=True), self.run))
+		self.connection.commit()
+		self.connection.close()
+
+def query(filename, devices = None, kernels = None, mem_sizes = None, hosts = None, since = None, until = None):
+	"""
+	Returns the datapoints matching all given filters joined with their run, ordered by time of the run.
+
+	devices and hosts are lists of substrings, kernels and mem_sizes lists of exact values,
+	since and until unix times. Each row maps the column names of both tables to their values.
+	"""
+	conditions = []
+	params = []
+	def any_of(expression, values):
+		conditions.append('(' + ' OR '.join([expression] * len(values)) + ')')
+		params.extend(values)
+	if devices:
+		any_of('d.device LIKE ?', ['%{0}%'.format(device) for device in devices])
+	if hosts:
+		any_of('r.host LIKE ?', ['%{0}%'.format(host) for host in hosts])
+	if kernels:
+		any_of('d.kernel = ?', kernels)
+	if mem_sizes:
+		any_of('d.mem_size = ?', mem_sizes)
+	if since != None:
+		conditions.append('r.started >= ?')
+		params.append(since)
+	if until != None:
+		conditions.append('r.started < ?')
+		params.append(until)
+
+	connection = connect(filename)
+	try:
+		sql = 'SELECT d.*, {0} FROM datapoints d JOIN runs r ON d.run = r.id'.format(', '.join('r.' + column for column in RUN_COLUMNS if column != 'device'))
+		if conditions:
+			sql += ' WHERE ' + ' AND '.join(conditions)
+		sql += ' ORDER BY r.started, d.rowid'
+		return connection.execute(sql, params).fetchall()
+	finally:
+		connection.close()
+
+def get_runs(filename):
+	"""
+	Returns all recorded runs with the number of their datapoints, oldest first.
+	"""
+	connection = connect(filename)
+	try:
+		return connection.execute('SELECT r.*, COUNT(d.run) AS datapoints FROM runs r LEFT JOIN datapoints d ON d.run = r.id GROUP BY r.id ORDER BY r.started').fetchall()
+	finally:
+		connection.close()
@@ -20,1204 +20,810 @@
 
 import pyopencl as cl
 import numpy as np
-from collections import namedtuple
+import csv
+import os
+import struct
+import time
+from collections import namedtuple, OrderedDict
+from multiprocessing.pool import ThreadPool
+
+from registry import KERNELS, get_kernel_info, get_unit_source, get_function_name, is_generated, is_driver, is_image
+from indices import get_indices
+from programcache import ProgramCache
+from sampling import AdaptiveSampler, get_statistics
+from autotune import TuningCache, tune, get_mem_size_bucket
+from buffers import TiledBuffer, get_tile_size
+from peak import PEAK_FILE, get_peak_bandwidth
 
 MAX_MEM_SIZE = 10 * 1024 * 1024 # 10 MiB
 LOCAL_THREADS = 128
 GLOBAL_THREADS = 20 * 8 * LOCAL_THREADS
 
+# bytes per texel and channel type of the images of the image kernels, see registry.MEMORIES
+IMAGE_TEXEL_SIZES = {'image': 16, 'imageHalf': 8}
+IMAGE_CHANNEL_TYPES = {'image': cl.channel_type.FLOAT, 'imageHalf': cl.channel_type.HALF_FLOAT}
+
 # Result of kernel invocation for a given set of parameters. time is in nanos, bandwidth in GB/s
-DataPoint = namedtuple('DataPoint', 'kernel global_threads local_threads bytes_transferred time time_std bandwidth')
+# device identifies the device the measurement was taken on, see get_device_id()
+# samples is the number of runs the time is averaged over, warmup runs excluded
+# time_median to time_robust are further estimates of the time, see ESTIMATORS, raw holds the time of each run
+# mem_size is the memory size in bytes the kernel was run on
+# efficiency is the bandwidth in percent of the theoretical peak bandwidth of the device, if that is known
+DataPoint = namedtuple('DataPoint', 'kernel global_threads local_threads bytes_transferred time time_std bandwidth device samples time_median time_min time_p5 time_p95 time_robust mem_size efficiency raw')
+DataPoint.__new__.__defaults__ = (None,) * 10
+
+SYNC_INTERVAL = 10 # seconds between syncs of exported datapoints to disk
+PIPELINE_DEPTH = 64 # kernel launches kept in flight by Runner.benchmark_many()
+
+# types of the datapoint fields in binary exports, all others are floats, see get_dtype()
+DATAPOINT_TYPES = {
+	'kernel': 'S64',
+	'device': 'S128',
+	'global_threads': 'i8',
+	'local_threads': 'i8',
+	'bytes_transferred': 'i8',
+	'samples': 'i8',
+	'mem_size': 'i8',
+	'stride': 'i8',
+	'lattice': 'S32',
+	'even_odd': 'i8',
+}
+NPY_HEADER_SIZE = 4096 # bytes reserved for the header of binary exports, see BinaryDataPointWriter
+SAMPLES_DTYPE = np.dtype('<u8') # type of the raw sample files, see SamplesWriter
+
+# A benchmark to run by Runner.benchmark_many(), unset parameters are chosen as by Runner.benchmark()
+BenchmarkRequest = namedtuple('BenchmarkRequest', 'kernel mem_size global_threads local_threads stride')
+BenchmarkRequest.__new__.__defaults__ = (None,) * 4
+
+# The resolved parameters of a benchmark, see Runner.prepare(). tiles holds the kernel arguments for each buffer tile.
+Launch = namedtuple('Launch', 'kernelname kernel tiles global_threads local_threads mem_size bytes_transferred')
+
+# estimators of the kernel time and the DataPoint field holding them
+ESTIMATORS = OrderedDict([
+	('mean', 'time'),
+	('median', 'time_median'),
+	('min', 'time_min'),
+	('p5', 'time_p5'),
+	('p95', 'time_p95'),
+	('robust', 'time_robust'), # mean after rejecting outliers by their median absolute deviation
+])
+
+def get_time(datapoint, estimator = 'mean'):
+	"""
+	Returns the kernel time of the datapoint in nanos using the given estimator, see ESTIMATORS.
+	"""
+	return float(getattr(datapoint, ESTIMATORS[estimator]))
+
+def get_bandwidth(datapoint, estimator = 'mean'):
+	"""
+	Returns the bandwidth of the datapoint in GB/s using the given estimator, see ESTIMATORS.
+	"""
+	return float(datapoint.bytes_transferred) / get_time(datapoint, estimator)
+
+def get_element_rate(datapoint, estimator = 'mean'):
+	"""
+	Returns the elements processed per nanosecond, i.e. in G/s, by the kernel of the datapoint using the given estimator.
+	"""
+	elems = get_kernel_info(datapoint.kernel).get_elems(datapoint.mem_size)
+	return float(elems) / get_time(datapoint, estimator)
+
+def get_efficiency(datapoint, estimator = 'mean'):
+	"""
+	Returns the bandwidth of the datapoint in percent of the peak bandwidth using the given estimator
+	or None if the peak bandwidth is unknown.
+	"""
+	if datapoint.efficiency == None:
+		return None
+	return datapoint.efficiency * get_time(datapoint) / get_time(datapoint, estimator)
+
+def get_peaks(datapoints):
+	"""
+	Returns the distinct peak bandwidths of a structured array of datapoints, see get_peak() and get_dtype().
+	"""
+	peaks = np.round(datapoints['bandwidth'] * 100 / datapoints['efficiency'], 3)
+	return np.unique(peaks[np.isfinite(peaks)]).tolist()
+
+def format_efficiency(datapoint, estimator = 'mean'):
+	"""
+	Returns the efficiency of the datapoint as a column of the result tables, empty if it is unknown.
+	"""
+	efficiency = get_efficiency(datapoint, estimator)
+	return ' [{0:.0f}%]'.format(efficiency) if efficiency != None else ''
+
+def get_peak(datapoint):
+	"""
+	Returns the peak bandwidth in GB/s the efficiency of the datapoint relates to or None if it is unknown.
+	"""
+	if not datapoint.efficiency:
+		return None
+	# rounded to make up for the rounding error of the efficiency, so datapoints of a device share their peak
+	return round(datapoint.bandwidth * 100 / datapoint.efficiency, 3)
+
+def get_device_indices(selector):
+	"""
+	Parse a device selector into a list of (platform, device) index tuples.
+
+	The selector is either 'all', PLATFORM:DEVICE or a plain device index counting over the
+	devices of all platforms. Multiple selectors can be given separated by commas.
+	"""
+	platforms = cl.get_platforms()
+	all_devices = [(p, d) for p in range(len(platforms)) for d in range(len(platforms[p].get_devices()))]
+
+	if isinstance(selector, tuple):
+		return [selector]
+	if isinstance(selector, int):
+		return [all_devices[selector]]
+
+	indices = []
+	for part in selector.split(','):
+		part = part.strip()
+		if part == 'all':
+			indices.extend(all_devices)
+		elif ':' in part:
+			p, d = part.split(':')
+			indices.append((int(p), int(d)))
+		else:
+			indices.append(all_devices[int(part)])
+	for p, d in indices:
+		if p >= len(platforms) or d >= len(platforms[p].get_devices()):
+			raise ValueError('There is no device {0}:{1}'.format(p, d))
+	return indices
+
+def get_device_id(device):
+	"""
+	Returns a string identifying the given device, consisting of its name and its PLATFORM:DEVICE index.
+	"""
+	for p, platform in enumerate(cl.get_platforms()):
+		for d, candidate in enumerate(platform.get_devices()):
+			if candidate == device:
+				return '{0} ({1}:{2})'.format(device.name.strip(), p, d)
+	return device.name.strip()
+
+def unique(values):
+	"""
+	Returns the distinct values in the order of their first occurrence.
+	"""
+	seen = set()
+	result = []
+	for value in values:
+		if value not in seen:
+			seen.add(value)
+			result.append(value)
+	return result
+
+def get_samples_file(filename):
+	return filename + '.samples.npy'
+
+def parse_value(value):
+	"""
+	Convert a value read from a CSV file back into a number if possible. Empty values become None.
+	"""
+	if value == None or value == '':
+		return None
+	for conversion in (int, float):
+		try:
+			return conversion(value)
+		except ValueError:
+			pass
+	return value
+
+def from_array_value(value):
+	"""
+	Convert a value of a structured array back into a plain value, see get_dtype(). Unset values become None.
+	"""
+	value = value.item()
+	if value == -1 or value == '' or (isinstance(value, float) and np.isnan(value)):
+		return None
+	return value
+
+def write_npy_header(file, descr, length):
+	"""
+	Write the header of a one dimensional .npy file of the given length, padded to NPY_HEADER_SIZE bytes,
+	so it can be rewritten while records get appended. The position in the file is kept, but never left in the header.
+	"""
+	header = "{{'descr': {0!r}, 'fortran_order': False, 'shape': ({1},), }}".format(descr, length)
+	header = header.ljust(NPY_HEADER_SIZE - len(np.lib.format.magic(1, 0)) - 3) + '\n'
+	position = file.tell()
+	file.seek(0)
+	file.write(np.lib.format.magic(1, 0) + struct.pack('<H', len(header)) + header.encode('latin1'))
+	file.seek(max(position, NPY_HEADER_SIZE))
+
+def open_npy_for_append(filename, dtype):
+	"""
+	Open a .npy file written with write_npy_header() for appending and return the file and its length.
+	Records written after the header was last synced are not covered by it and get dropped.
+	"""
+	existing = np.load(filename, mmap_mode='r')
+	if existing.dtype != dtype:
+		raise ValueError('{0} holds records of another type'.format(filename))
+	if existing.offset != NPY_HEADER_SIZE:
+		raise ValueError('{0} has not been written by clBandwidth and cannot be appended to'.format(filename))
+	length = len(existing)
+	del existing
+	file = open(filename, 'r+b')
+	file.seek(NPY_HEADER_SIZE + length * dtype.itemsize)
+	file.truncate()
+	return file, length
+
+def split_samples(samples):
+	"""
+	Returns the raw samples of each datapoint from the contents of a samples file, see SamplesWriter.
+	"""
+	raws = []
+	i = 0
+	while i < len(samples):
+		count = int(samples[i])
+		raws.append(np.array(samples[i + 1:i + 1 + count]))
+		i += 1 + count
+	return raws
+
+class SamplesWriter:
+	"""
+	Appends the raw samples of datapoints to a .npy file of 64 bit integers, holding for each datapoint
+	its number of runs followed by their times.
+
+	Samples are kept in memory only until the next sync, which appends them to the file and rewrites
+	its header. If append is set and the file covers fewer than datapoints datapoints, e.g. because the
+	measurement was aborted before a sync, the missing ones are padded with empty samples.
+	"""
+
+	def __init__(self, filename, append = False, datapoints = 0):
+		self.pending = []
+		if append and os.path.exists(filename) and os.path.getsize(filename) > 0:
+			self.file, self.length = open_npy_for_append(filename, SAMPLES_DTYPE)
+			self.file.seek(NPY_HEADER_SIZE)
+			covered = len(split_samples(np.fromfile(self.file, SAMPLES_DTYPE)))
+			self.pending = [None] * max(0, datapoints - covered)
+		else:
+			self.file = open(filename, 'w+b')
+			self.length = 0
+			write_npy_header(self.file, SAMPLES_DTYPE.str, self.length)
+			self.pending = [None] * datapoints
+
+	def write(self, raw):
+		self.pending.append(raw)
+
+	def sync(self):
+		if self.pending:
+			raws = [raw if raw is not None else np.zeros(0, np.uint64) for raw in self.pending]
+			chunk = np.concatenate([np.concatenate(([len(raw)], raw)) for raw in raws]).astype(SAMPLES_DTYPE)
+			self.file.write(chunk.tobytes())
+			self.length += len(chunk)
+			self.pending = []
+		self.file.flush()
+		write_npy_header(self.file, SAMPLES_DTYPE.str, self.length)
+		self.file.flush()
+		os.fsync(self.file.fileno())
+
+	def close(self):
+		self.sync()
+		self.file.close()
+
+class DataPointWriter:
+	"""
+	Writes datapoints to a CSV file as soon as they are measured.
+
+	Each datapoint is flushed right away and the file is synced to disk every sync_interval seconds,
+	so an aborted measurement loses at most the last few datapoints. The raw samples are appended to a
+	companion file on each sync, see get_samples_file() and SamplesWriter. If append is set, datapoints are
+	added to an existing file, using the columns it was written with.
+	"""
+
+	def __init__(self, filename, cls = DataPoint, append = False, sync_interval = SYNC_INTERVAL):
+		self.filename = filename
+		self.sync_interval = sync_interval
+
+		if append and os.path.exists(filename) and os.path.getsize(filename) > 0:
+			reader = csv.reader(open(filename, 'rb'))
+			fields = reader.next()
+			existing = sum(1 for row in reader)
+			self.file = open(filename, 'ab')
+			self.writer = csv.DictWriter(self.file, fields, extrasaction='ignore', quoting=csv.QUOTE_MINIMAL)
+		else:
+			fields = [field for field in cls._fields if field != 'raw']
+			existing = 0
+			self.file = open(filename, 'wb')
+			self.writer = csv.DictWriter(self.file, fields, extrasaction='ignore', quoting=csv.QUOTE_MINIMAL)
+			self.writer.writerow(dict(zip(fields, fields)))
+		self.samples = SamplesWriter(get_samples_file(filename), append, existing)
+		self.last_sync = time.time()
+
+	def write(self, datapoint):
+		self.writer.writerow(datapoint._asdict())
+		self.samples.write(datapoint.raw)
+		self.file.flush()
+		if time.time() - self.last_sync >= self.sync_interval:
+			self.sync()
+
+	def sync(self):
+		self.file.flush()
+		os.fsync(self.file.fileno())
+		self.samples.sync()
+		self.last_sync = time.time()
+
+	def close(self):
+		self.sync()
+		self.file.close()
+		self.samples.close()
+
+class BinaryDataPointWriter(DataPointWriter):
+	"""
+	Writes datapoints to a .npy file of a structured array as soon as they are measured, see get_dtype().
+
+	The header of the file is rewritten with the number of datapoints on each sync. It is padded to a
+	fixed size, so the records never have to be moved.
+	"""
+
+	def __init__(self, filename, cls = DataPoint, append = False, sync_interval = SYNC_INTERVAL):
+		self.filename = filename
+		self.sync_interval = sync_interval
+		self.dtype = get_dtype(cls)
+
+		if append and os.path.exists(filename) and os.path.getsize(filename) > 0:
+			# records written after the last sync are not covered by the header, they get dropped
+			self.file, self.count = open_npy_for_append(filename, self.dtype)
+		else:
+			self.count = 0
+			self.file = open(filename, 'w+b')
+			self.write_header()
+		self.samples = SamplesWriter(get_samples_file(filename), append, self.count)
+		self.last_sync = time.time()
+
+	def write_header(self):
+		write_npy_header(self.file, self.dtype.descr, self.count)
+
+	def write(self, datapoint):
+		self.file.write(to_datapoint_array([datapoint], self.dtype).tobytes())
+		self.count += 1
+		self.samples.write(datapoint.raw)
+		self.file.flush()
+		if time.time() - self.last_sync >= self.sync_interval:
+			self.sync()
+
+	def sync(self):
+		self.file.flush()
+		self.write_header()
+		self.file.flush()
+		os.fsync(self.file.fileno())
+		self.samples.sync()
+		self.last_sync = time.time()
+
+def is_binary(filename):
+	"""
+	Returns whether datapoints are stored in the given file as a structured array instead of CSV.
+	"""
+	return filename.endswith('.npy')
+
+def get_writer(filename, cls = DataPoint, append = False):
+	"""
+	Returns a writer for the format given by the file name, see is_binary().
+	"""
+	if is_binary(filename):
+		return BinaryDataPointWriter(filename, cls, append)
+	return DataPointWriter(filename, cls, append)
+
+def get_dtype(cls = DataPoint):
+	"""
+	Returns the structured numpy type of the datapoints of the given class, the raw samples excluded.
+
+	Unset integers are stored as -1, unset floats as NaN.
+	"""
+	return np.dtype([(field, DATAPOINT_TYPES.get(field, 'f8')) for field in cls._fields if field != 'raw'])
+
+def to_datapoint_array(datapoints, dtype):
+	"""
+	Convert a list of datapoints into a structured array of the given type, see get_dtype().
+	"""
+	missing = [-1 if dtype[field].kind == 'i' else ('' if dtype[field].kind == 'S' else np.nan) for field in dtype.names]
+	rows = [tuple(value if value is not None else default for value, default in zip(map(lambda field: getattr(datapoint, field), dtype.names), missing)) for datapoint in datapoints]
+	return np.array(rows, dtype)
+
+def read_datapoint_array(filename, cls = DataPoint):
+	"""
+	Read datapoints into a structured array, see get_dtype(). Binary files are memory-mapped, CSV files converted.
+	"""
+	if is_binary(filename):
+		return np.load(filename, mmap_mode='r')
+	return to_datapoint_array(read_datapoints(filename, cls), get_dtype(cls))
+
+def write_datapoints(filename, datapoints):
+	"""
+	Write datapoints to a CSV or .npy file, see is_binary(). The raw samples go to a companion file, see get_samples_file().
+	"""
+	writer = get_writer(filename, type(datapoints[0]))
+	for datapoint in datapoints:
+		writer.write(datapoint)
+	writer.close()
+
+def read_datapoints(filename, cls = DataPoint):
+	"""
+	Read datapoints from a CSV or .npy file written by one of the benchmark scripts.
+	Columns missing in files written by older versions are set to None.
+	"""
+	if is_binary(filename):
+		array = np.load(filename, mmap_mode='r')
+		datapoints = [cls(**dict((field, from_array_value(row[field]) if field in array.dtype.names else None) for field in cls._fields)) for row in array]
+	else:
+		reader = csv.DictReader(open(filename, 'rb'))
+		datapoints = [cls(**dict((field, parse_value(row.get(field)) if field != 'raw' else None) for field in cls._fields)) for row in reader]
+
+	samples_file = get_samples_file(filename)
+	if os.path.exists(samples_file):
+		raws = split_samples(np.load(samples_file, mmap_mode='r'))
+		# the samples of the last datapoints might not have been synced before an abort
+		datapoints = [datapoint._replace(raw = raw if len(raw) else None) for datapoint, raw in zip(datapoints, raws)] + datapoints[len(raws):]
+	return datapoints
 
 class Runner:
 
-	def __init__(self, device = None, local_threads = LOCAL_THREADS, global_threads = GLOBAL_THREADS, max_mem_size = MAX_MEM_SIZE):
+	def __init__(self, device = None, local_threads = None, global_threads = None, max_mem_size = MAX_MEM_SIZE, build_cache = True, sampler = None, tuning_cache = True, autotune = False, peak_table = PEAK_FILE):
 		if device != None:
-			platforms = cl.get_platforms()
-			if len(platforms) > 1:
-				raise Exception('Found more then one platform, giving up.')
-			platform = platforms[0]
+			indices = get_device_indices(device)
+			if len(indices) != 1:
+				raise ValueError('A Runner can only use a single device, use multidevice.run_on_devices() for multiple devices.')
+			platform_index, device_index = indices[0]
+			platform = cl.get_platforms()[platform_index]
 			properties = [(cl.context_properties.PLATFORM, platform)]
-			devices = [platform.get_devices()[device]]
+			devices = [platform.get_devices()[device_index]]
 			self.ctx = cl.Context(devices, properties)
 		else:
 			self.ctx = cl.create_some_context()
 		self.queue = cl.CommandQueue(self.ctx, properties=cl.command_queue_properties.PROFILING_ENABLE)
 
 		self.device = self.queue.device
-		print '#Device: {0}'.format(self.device.name)
+		self.device_id = get_device_id(self.device)
+		print '#Device: {0}'.format(self.device_id)
 		print '#Memory size: {0} KiB'.format(self.device.global_mem_size / 1024)
 		print '#Maximum buffer size: {0} KiB'.format(self.device.max_mem_alloc_size / 1024)
 
-		f = open('kernels.cl', 'r')
-		fstr = "".join(f.readlines())
-		self.prg = cl.Program(self.ctx, fstr).build()
-
-		self.in_buf = cl.Buffer(self.ctx, cl.mem_flags.READ_ONLY, max_mem_size)
-		self.out_buf = cl.Buffer(self.ctx, cl.mem_flags.WRITE_ONLY, max_mem_size)
-
-		self.local_threads = local_threads
-		self.global_threads = global_threads
+		# efficiencies are given relative to the theoretical peak, see peak.get_peak_bandwidth()
+		self.peak_bandwidth = get_peak_bandwidth(self.device, peak_table)
+		if self.peak_bandwidth:
+			print '#Peak bandwidth: {0} GB/s'.format(self.peak_bandwidth)
+		# buffers fitting into the cache can exceed the peak bandwidth of the memory
+		if self.device.global_mem_cache_size:
+			print '#Global memory cache: {0} KiB'.format(self.device.global_mem_cache_size / 1024)
+
+		# kernels are only built on demand, see build()
+		self.build_cache = ProgramCache() if build_cache else None
+		self.programs = {}
+		self.build_errors = {}
+		self.kernels = {}
+
+		# buffers larger than a single allocation are split into tiles, each kernel is then launched once per tile
+		if 2 * max_mem_size > self.device.global_mem_size:
+			raise ValueError('Two buffers of {0} bytes exceed the device memory of {1} bytes'.format(max_mem_size, self.device.global_mem_size))
+		tile_size = get_tile_size(max_mem_size, self.device.max_mem_alloc_size, set(map(lambda info: info.storage_size, KERNELS.values())))
+		self.in_buf = TiledBuffer(self.ctx, cl.mem_flags.READ_ONLY, max_mem_size, tile_size)
+		self.out_buf = TiledBuffer(self.ctx, cl.mem_flags.WRITE_ONLY, max_mem_size, tile_size)
+		# images are only created for the image kernels, see get_image()
+		self.image = None
+		self.image_sampler = None
+		# index tables of the gather and scatter kernels, see get_index_buffer()
+		self.index_buffers = {}
+		if len(self.in_buf.tiles) > 1:
+			print '#Buffer tiles: {0} of {1} KiB'.format(len(self.in_buf.tiles), tile_size / 1024)
+
+		# explicitly given thread numbers take precedence over tuned ones
+		self.use_tuning = local_threads == None and global_threads == None
+		self.tuning_cache = TuningCache() if tuning_cache else TuningCache(None)
+		self.autotune = autotune
+
+		self.local_threads = local_threads if local_threads else LOCAL_THREADS
+		self.global_threads = global_threads if global_threads else GLOBAL_THREADS
 		self.max_mem_size = max_mem_size
+		self.sampler = sampler if sampler else AdaptiveSampler()
 
 	def hasDoublePrecisionSupport(self):
 		extensions = self.device.extensions
 		return 'cl_khr_fp64' in extensions or 'cl_amd_fp64' in extensions
 
-	def get_kernel_names(self):
+	def hasFillSupport(self):
+		# clEnqueueFillBuffer was introduced with OpenCL 1.2
+		version = self.device.version.split()[1]
+		return hasattr(cl, 'enqueue_fill_buffer') and map(int, version.split('.')) >= [1, 2]
+
+	def get_kernel_names(self, generated = False):
 		# all_kernels() is broken in pyopencl 2011.* :(
 		# return map(lambda kernel: kernel.info.function_name, self.prg.all_kernels())
-		kernels = [
-		 'copyFloat',
-		 'readFloat',
-		 'writeFloat',
-		 'copyFloatRestricted',
-		 'readFloatRestricted',
-		 'writeFloatRestricted',
-		 'copyFloat2',
-		 'readFloat2',
-		 'writeFloat2',
-		 'copyFloat4',
-		 'readFloat4',
-		 'writeFloat4',
-		 'copySpComplex',
-		 'readSpComplex',
-		 'writeSpComplex',
-		 'copySpComplexRestricted',
-		 'readSpComplexRestricted',
-		 'writeSpComplexRestricted',
-		 'copyAlignedSpComplex',
-		 'readAlignedSpComplex',
-		 'writeAlignedSpComplex',
-		 'copyAlignedSpComplexRestricted',
-		 'readAlignedSpComplexRestricted',
-		 'writeAlignedSpComplexRestricted',
-		 'copySpSu3vec',
-		 'readSpSu3vec',
-		 'writeSpSu3vec',
-		 'copySpSu3vecRestricted',
-		 'readSpSu3vecRestricted',
-		 'writeSpSu3vecRestricted',
-		 'copyAlignedSpSu3vecRestricted',
-		 'readAlignedSpSu3vecRestricted',
-		 'writeAlignedSpSu3vecRestricted',
-		 'copyAligned8SpSu3vecRestricted',
-		 'readAligned8SpSu3vecRestricted',
-		 'writeAligned8SpSu3vecRestricted',
-		 'copyAligned16SpSu3vecRestricted',
-		 'readAligned16SpSu3vecRestricted',
-		 'writeAligned16SpSu3vecRestricted',
-		 'copyAligned32SpSu3vecRestricted',
-		 'readAligned32SpSu3vecRestricted',
-		 'writeAligned32SpSu3vecRestricted',
-		 'copySpSu3vecFromAlignedRestricted',
-		 'readSpSu3vecFromAlignedRestricted',
-		 'writeSpSu3vecFromAlignedRestricted',
-		 'copySpSu3',
-		 'readSpSu3',
-		 'writeSpSu3',
-		 'copySpSu3Restricted',
-		 'readSpSu3Restricted',
-		 'writeSpSu3Restricted',
-		 'copySpSu3FromAlignedRestricted',
-		 'readSpSu3FromAlignedRestricted',
-		 'writeSpSu3FromAlignedRestricted',
-		 'copyAligned8SpSu3Restricted',
-		 'readAligned8SpSu3Restricted',
-		 'writeAligned8SpSu3Restricted',
-		 'copySpSu3SOARestricted',
-		 'readSpSu3SOARestricted',
-		 'writeSpSu3SOARestricted',
-		 'copySpSu3FromAlignedSOARestricted',
-		 'readSpSu3FromAlignedSOARestricted',
-		 'writeSpSu3FromAlignedSOARestricted',
-		 'copySpSu3ViaLocalRestricted',
-		 'readSpSu3ViaLocalRestricted',
-		 'writeSpSu3ViaLocalRestricted',
-		 'copySpSu3FromAlignedViaLocalRestricted',
-		 'readSpSu3FromAlignedViaLocalRestricted',
-		 'writeSpSu3FromAlignedViaLocalRestricted',
-		 'copySpSpinor',
-		 'readSpSpinor',
-		 'writeSpSpinor',
-		 'copySpSpinorRestricted',
-		 'readSpSpinorRestricted',
-		 'writeSpSpinorRestricted',
-		 'copySpSpinorFromAlignedRestricted',
-		 'readSpSpinorFromAlignedRestricted',
-		 'writeSpSpinorFromAlignedRestricted',
-		 'copyAligned8SpSpinorRestricted',
-		 'readAligned8SpSpinorRestricted',
-		 'writeAligned8SpSpinorRestricted',
-		 'copyAligned16SpSpinorRestricted',
-		 'readAligned16SpSpinorRestricted',
-		 'writeAligned16SpSpinorRestricted',
-		 'copyAligned32SpSpinorRestricted',
-		 'readAligned32SpSpinorRestricted',
-		 'writeAligned32SpSpinorRestricted',
-		 'copySpSpinorSOARestricted',
-		 'readSpSpinorSOARestricted',
-		 'writeSpSpinorSOARestricted',
-		 'copySpSpinorFullSOARestricted',
-		 'readSpSpinorFullSOARestricted',
-		 'writeSpSpinorFullSOARestricted',
-		 'copySpSpinorFullAlignedSOARestricted',
-		 'readSpSpinorFullAlignedSOARestricted',
-		 'writeSpSpinorFullAlignedSOARestricted',
-		 'copySpSpinorFromAlignedSOARestricted',
-		 'readSpSpinorFromAlignedSOARestricted',
-		 'writeSpSpinorFromAlignedSOARestricted',
-		 'copySpSpinorViaLocalRestricted',
-		 'readSpSpinorViaLocalRestricted',
-		 'writeSpSpinorViaLocalRestricted',
-		]
-
-		if self.hasDoublePrecisionSupport():
-			kernels.extend([
-			 'copyDouble',
-			 'readDouble',
-			 'writeDouble',
-			 'copyDoubleRestricted',
-			 'readDoubleRestricted',
-			 'writeDoubleRestricted',
-			 'copyDouble2',
-			 'readDouble2',
-			 'writeDouble2',
-			 'copyDouble4',
-			 'readDouble4',
-			 'writeDouble4',
-			 'copyDpComplex',
-			 'readDpComplex',
-			 'writeDpComplex',
-			 'copyDpComplexRestricted',
-			 'readDpComplexRestricted',
-			 'writeDpComplexRestricted',
-			 'copyAlignedDpComplex',
-			 'readAlignedDpComplex',
-			 'writeAlignedDpComplex',
-			 'copyAlignedDpComplexRestricted',
-			 'readAlignedDpComplexRestricted',
-			 'writeAlignedDpComplexRestricted',
-			 'copyDpSu3vec',
-			 'readDpSu3vec',
-			 'writeDpSu3vec',
-			 'copyDpSu3vecRestricted',
-			 'readDpSu3vecRestricted',
-			 'writeDpSu3vecRestricted',
-			 'copyAligned16DpSu3vecRestricted',
-			 'readAligned16DpSu3vecRestricted',
-			 'writeAligned16DpSu3vecRestricted',
-			 'copyAligned32DpSu3vecRestricted',
-			 'readAligned32DpSu3vecRestricted',
-			 'writeAligned32DpSu3vecRestricted',
-			 'copyDpSu3vecSOARestricted',
-			 'readDpSu3vecSOARestricted',
-			 'writeDpSu3vecSOARestricted',
-			 'copyDpSu3vecFullSOARestricted',
-			 'readDpSu3vecFullSOARestricted',
-			 'writeDpSu3vecFullSOARestricted',
-			 'copyDpSu3',
-			 'readDpSu3',
-			 'writeDpSu3',
-			 'copyDpSu3Restricted',
-			 'readDpSu3Restricted',
-			 'writeDpSu3Restricted',
-			 'copyAligned16DpSu3Restricted',
-			 'readAligned16DpSu3Restricted',
-			 'writeAligned16DpSu3Restricted',
-			 'copyAligned32DpSu3Restricted',
-			 'readAligned32DpSu3Restricted',
-			 'writeAligned32DpSu3Restricted',
-			 'copyDpSu3SOARestricted',
-			 'readDpSu3SOARestricted',
-			 'writeDpSu3SOARestricted',
-			 'copyDpSu3FullSOARestricted',
-			 'readDpSu3FullSOARestricted',
-			 'writeDpSu3FullSOARestricted',
-			 'copyDpSpinor',
-			 'readDpSpinor',
-			 'writeDpSpinor',
-			 'copyDpSpinorRestricted',
-			 'readDpSpinorRestricted',
-			 'writeDpSpinorRestricted',
-			 'copyAligned16DpSpinorRestricted',
-			 'readAligned16DpSpinorRestricted',
-			 'writeAligned16DpSpinorRestricted',
-			 'copyAligned32DpSpinorRestricted',
-			 'readAligned32DpSpinorRestricted',
-			 'writeAligned32DpSpinorRestricted',
-			 'copyDpSpinorSOARestricted',
-			 'readDpSpinorSOARestricted',
-			 'writeDpSpinorSOARestricted',
-			 'copyDpSpinorFullSOARestricted',
-			 'readDpSpinorFullSOARestricted',
-			 'writeDpSpinorFullSOARestricted',
-			 'copyDpSpinorFullestSOARestricted',
-			 'readDpSpinorFullestSOARestricted',
-			 'writeDpSpinorFullestSOARestricted',
-			])
-
-		return kernels
-
-	def benchmark(self, kernelname, mem_size = None, global_threads = None, local_threads = None, stride = None):
-		BENCH_RUNS = 10
-		WARMUP_RUNS = 2
-
+		fp64 = self.hasDoublePrecisionSupport()
+		fill = self.hasFillSupport()
+		images = self.device.image_support
+		return [name for name, info in KERNELS.iteritems() if (fp64 or not info.fp64) and (generated or not is_generated(info))
+		        and (fill or not (is_driver(info) and info.access == 'write')) and (images or not is_image(info))]
+
+	def build_unit(self, unit):
+		"""
+		Build a single compile unit. Returns a tuple of the program, whether it was
+		loaded from the cache and the build error, if any.
+		"""
+		source, options = get_unit_source(unit)
+		try:
+			if self.build_cache:
+				prg, cached = self.build_cache.build(self.ctx, source, options)
+			else:
+				prg, cached = cl.Program(self.ctx, source).build(options), False
+			return (prg, cached, None)
+		except (cl.RuntimeError, cl.LogicError) as ex:
+			return (None, False, ex)
+
+	def build(self, kernelnames):
+		"""
+		Build all compile units containing the given kernels that have not been built yet.
+
+		The units are built in parallel. A unit that fails to build does not affect the others,
+		its error is only raised once one of its kernels is requested.
+		"""
+		units = []
+		for kernelname in kernelnames:
+			info = get_kernel_info(kernelname)
+			if is_driver(info):
+				continue # run by the driver, nothing to build
+			if info.unit not in units and info.unit not in self.programs and info.unit not in self.build_errors:
+				units.append(info.unit)
+		if not units:
+			return
+
+		pool = ThreadPool(len(units))
+		try:
+			results = pool.map(self.build_unit, units)
+		finally:
+			pool.close()
+
+		for unit, (prg, cached, error) in zip(units, results):
+			if error:
+				print '#Building {0} kernels failed: {1}'.format(unit, error)
+				self.build_errors[unit] = error
+			else:
+				self.programs[unit] = prg
+				if self.build_cache:
+					print '#Program cache for {0} kernels: {1}'.format(unit, 'hit' if cached else 'miss')
+
+	def get_kernel(self, kernelname):
+		"""
+		Get the kernel object of the given name, building its compile unit if required.
+		Kernel objects are only created once per kernel function and then reused. Driver pseudo-kernels have no kernel object.
+		"""
+		info = get_kernel_info(kernelname)
+		function = get_function_name(info)
+		try:
+			return self.kernels[function]
+		except KeyError:
+			if is_driver(info):
+				return None
+			self.build([kernelname])
+			if info.unit in self.build_errors:
+				raise self.build_errors[info.unit]
+			kernel = getattr(self.programs[info.unit], function)
+			self.kernels[function] = kernel
+			return kernel
+
+	def get_image(self, info, elems):
+		"""
+		Returns a tuple of an image holding elems elements of the given image kernel and its width in texels.
+
+		The texels of the elements are laid out row by row, each row as wide as the device allows.
+		Only the image of the last configuration is kept, it is replaced when another is needed.
+		"""
+		texel_size = IMAGE_TEXEL_SIZES[info.memory]
+		texels = elems * info.storage_size / texel_size
+		width = min(texels, self.device.image2d_max_width)
+		height = -(-texels / width)
+		if height > self.device.image2d_max_height:
+			raise ValueError('{0} texels exceed the maximum image size of {1}x{2}'.format(texels, self.device.image2d_max_width, self.device.image2d_max_height))
+		key = (info.memory, width, height)
+		if not self.image or self.image[0] != key:
+			image_format = cl.ImageFormat(cl.channel_order.RGBA, IMAGE_CHANNEL_TYPES[info.memory])
+			self.image = (key, cl.Image(self.ctx, cl.mem_flags.READ_ONLY, image_format, (width, height)))
+		if not self.image_sampler:
+			# each texel is fetched exactly as stored, at integer coordinates inside the image
+			self.image_sampler = cl.Sampler(self.ctx, False, cl.addressing_mode.NONE, cl.filter_mode.NEAREST)
+		return (self.image[1], width)
+
+	def get_index_buffer(self, pattern, elems):
+		"""
+		Returns a buffer holding the index table of the given pattern for elems elements, see indices.PATTERNS.
+		The table is generated and uploaded once and reused until another number of elements is requested.
+		"""
+		if pattern not in self.index_buffers or self.index_buffers[pattern][0] != elems:
+			indices = get_indices(pattern, elems)
+			buf = cl.Buffer(self.ctx, cl.mem_flags.READ_ONLY | cl.mem_flags.COPY_HOST_PTR, hostbuf=indices)
+			self.index_buffers[pattern] = (elems, buf)
+		return self.index_buffers[pattern][1]
+
+	def get_kernel_args(self, info, in_buf, out_buf, elems, stride, local_threads):
+		if is_driver(info):
+			return [out_buf, in_buf, elems * info.storage_size]
+		if is_image(info):
+			image, width = in_buf
+			return [out_buf, image, self.image_sampler, np.uint64(elems), np.uint32(width)]
+		if info.access == 'write':
+			args = [out_buf, info.scalar_type(1.), np.uint64(elems)]
+		elif info.pattern:
+			args = [out_buf, in_buf, self.get_index_buffer(info.pattern, elems), np.uint64(elems)]
+		else:
+			args = [out_buf, in_buf, np.uint64(elems)]
+		if info.stride:
+			args.append(np.uint64(stride))
+		if info.local:
+			args.append(cl.LocalMemory(local_threads * info.storage_size))
+		return args
+
+	def get_tuned_threads(self, kernelname, mem_size):
+		"""
+		Returns the tuned (global_threads, local_threads) for the given kernel and memory size or None.
+		If autotuning is enabled, configurations missing from the tuning cache are tuned on demand.
+		"""
+		config = self.tuning_cache.get(self.device, kernelname, mem_size)
+		if not config and self.autotune:
+			config = tune(self, kernelname, mem_size)
+			self.tuning_cache.store(self.device, kernelname, mem_size, *config)
+			print '#Tuned {0} for {1} bytes: {2} global, {3} local threads'.format(kernelname, get_mem_size_bucket(mem_size), *config)
+		return config
+
+	def prepare(self, kernelname, mem_size = None, global_threads = None, local_threads = None, stride = None):
+		"""
+		Resolve the parameters of a benchmark, using the defaults of this runner for unset ones,
+		and return the resulting Launch.
+		"""
+		if not mem_size:
+			mem_size = self.max_mem_size
+		info = get_kernel_info(kernelname)
+		if info.memory == 'constant' and mem_size > self.device.max_constant_buffer_size:
+			# constant kernels run on as much memory as fits into a constant buffer, the datapoint records the actual size
+			limit = self.device.max_constant_buffer_size
+			mem_size = limit - limit % info.storage_size
+		if not global_threads and not local_threads and self.use_tuning and not is_driver(info):
+			config = self.get_tuned_threads(kernelname, mem_size)
+			if config:
+				global_threads, local_threads = config
 		if not global_threads:
 			global_threads = self.global_threads
 		if not local_threads:
 			local_threads = self.local_threads
-		if not mem_size:
-			mem_size = self.max_mem_size
 		if not stride:
 			stride = 0
 
+		if mem_size > self.max_mem_size:
+			raise ValueError('The memory size of {0} bytes exceeds the buffer size of {1} bytes'.format(mem_size, self.max_mem_size))
+		elems = info.get_elems(mem_size)
+		kernel = self.get_kernel(kernelname)
+
+		in_tiles = self.in_buf.split(elems, info.storage_size)
+		out_tiles = self.out_buf.split(elems, info.storage_size)
+		if is_image(info):
+			# images are not tiled, but read as a whole
+			in_tiles = [(self.get_image(info, elems), elems)]
+			out_tiles = out_tiles[:1]
+		if len(in_tiles) > 1 and info.stride and stride:
+			raise ValueError('{0} with an explicit stride cannot be split into multiple tiles'.format(kernelname))
+		if len(in_tiles) > 1 and info.pattern:
+			raise ValueError('{0} cannot be split into multiple tiles, as its indices span all elements'.format(kernelname))
+		if info.access == 'read':
+			# read kernels write one element per thread, independent of the number of elements read
+			out_tiles = [(self.out_buf.tiles[0], tile_elems) for in_buf, tile_elems in in_tiles]
+			if global_threads * max(info.storage_size, info.elem_size) > self.out_buf.tiles[0].size:
+				raise ValueError('The output of {0} threads of {1} exceeds the buffer size of {2} bytes'.format(global_threads, kernelname, self.out_buf.tiles[0].size))
+
+		tiles = []
+		bytes_transferred = 0
+		for (in_buf, tile_elems), (out_buf, out_elems) in zip(in_tiles, out_tiles):
+			tiles.append(self.get_kernel_args(info, in_buf, out_buf, tile_elems, stride, local_threads))
+			bytes_transferred += info.get_bytes_transferred(tile_elems, global_threads)
+		return Launch(kernelname, kernel, tiles, global_threads, local_threads, mem_size, bytes_transferred)
+
+	def enqueue(self, launch, runs):
+		"""
+		Enqueue the given number of runs of the launch. Returns a list holding the events of each run,
+		one per tile.
+		"""
+		if launch.kernel == None:
+			access = get_kernel_info(launch.kernelname).access
+			return [[self.enqueue_driver(access, *args) for args in launch.tiles] for i in range(runs)]
+
+		# the arguments are captured on enqueue, so other launches of the same kernel may reset them afterwards
+		if len(launch.tiles) == 1:
+			launch.kernel.set_args(*launch.tiles[0])
+		global_size = (launch.global_threads,)
+		local_size = (launch.local_threads,)
 		events = []
-		for i in range(BENCH_RUNS + WARMUP_RUNS):
-
-			# Kernel launching logic
-			# This was supposed to be in an own function, but when you return the events
-			# you cannot call the function more than once for some unkown reason
-			if kernelname == 'copyFloat':
-				kernel = self.prg.copyFloat;
-				elems = mem_size / 4
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 4 * 2
-			elif kernelname == 'readFloat':
-				kernel = self.prg.readFloat;
-				elems = mem_size / 4
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 4
-			elif kernelname == 'writeFloat':
-				kernel = self.prg.writeFloat;
-				elems = mem_size / 4
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 4
-			elif kernelname == 'copyFloatRestricted':
-				kernel = self.prg.copyFloatRestricted;
-				elems = mem_size / 4
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 4 * 2
-			elif kernelname == 'readFloatRestricted':
-				kernel = self.prg.readFloatRestricted;
-				elems = mem_size / 4
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 4
-			elif kernelname == 'writeFloatRestricted':
-				kernel = self.prg.writeFloatRestricted;
-				elems = mem_size / 4
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 4
-			elif kernelname == 'copyFloat2':
-				kernel = self.prg.copyFloat2;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 8 * 2
-			elif kernelname == 'readFloat2':
-				kernel = self.prg.readFloat2;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 8
-			elif kernelname == 'writeFloat2':
-				kernel = self.prg.writeFloat2;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 8
-			elif kernelname == 'copyFloat4':
-				kernel = self.prg.copyFloat4;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 16 * 2
-			elif kernelname == 'readFloat4':
-				kernel = self.prg.readFloat4;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 16
-			elif kernelname == 'writeFloat4':
-				kernel = self.prg.writeFloat4;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 16
-
-			elif kernelname == 'copySpComplex':
-				kernel = self.prg.copySpComplex;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 8 * 2
-			elif kernelname == 'readSpComplex':
-				kernel = self.prg.readSpComplex;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 8
-			elif kernelname == 'writeSpComplex':
-				kernel = self.prg.writeSpComplex;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 8
-			elif kernelname == 'copySpComplexRestricted':
-				kernel = self.prg.copySpComplexRestricted;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 8 * 2
-			elif kernelname == 'readSpComplexRestricted':
-				kernel = self.prg.readSpComplexRestricted;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 8
-			elif kernelname == 'writeSpComplexRestricted':
-				kernel = self.prg.writeSpComplexRestricted;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 8
-
-			elif kernelname == 'copyAlignedSpComplex':
-				kernel = self.prg.copyAlignedSpComplex;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 8 * 2
-			elif kernelname == 'readAlignedSpComplex':
-				kernel = self.prg.readAlignedSpComplex;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 8
-			elif kernelname == 'writeAlignedSpComplex':
-				kernel = self.prg.writeAlignedSpComplex;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 8
-			elif kernelname == 'copyAlignedSpComplexRestricted':
-				kernel = self.prg.copyAlignedSpComplexRestricted;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 8 * 2
-			elif kernelname == 'readAlignedSpComplexRestricted':
-				kernel = self.prg.readAlignedSpComplexRestricted;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 8
-			elif kernelname == 'writeAlignedSpComplexRestricted':
-				kernel = self.prg.writeAlignedSpComplexRestricted;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 8
-
-			elif kernelname == 'copySpSu3vec':
-				kernel = self.prg.copySpSu3vec;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 24 * 2
-			elif kernelname == 'readSpSu3vec':
-				kernel = self.prg.readSpSu3vec;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 24
-			elif kernelname == 'writeSpSu3vec':
-				kernel = self.prg.writeSpSu3vec;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 24
-			elif kernelname == 'copySpSu3vecRestricted':
-				kernel = self.prg.copySpSu3vecRestricted;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 24 * 2
-			elif kernelname == 'readSpSu3vecRestricted':
-				kernel = self.prg.readSpSu3vecRestricted;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 24
-			elif kernelname == 'writeSpSu3vecRestricted':
-				kernel = self.prg.writeSpSu3vecRestricted;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 24
-
-			elif kernelname == 'copySpSu3vecFromAlignedRestricted':
-				kernel = self.prg.copySpSu3vecFromAlignedRestricted;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 24 * 2
-			elif kernelname == 'readSpSu3vecFromAlignedRestricted':
-				kernel = self.prg.readSpSu3vecFromAlignedRestricted;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 24
-			elif kernelname == 'writeSpSu3vecFromAlignedRestricted':
-				kernel = self.prg.writeSpSu3vecFromAlignedRestricted;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 24
-
-			elif kernelname == 'copyAlignedSpSu3vecRestricted':
-				kernel = self.prg.copyAlignedSpSu3vecRestricted;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 24 * 2
-			elif kernelname == 'readAlignedSpSu3vecRestricted':
-				kernel = self.prg.readAlignedSpSu3vecRestricted;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 24
-			elif kernelname == 'writeAlignedSpSu3vecRestricted':
-				kernel = self.prg.writeAlignedSpSu3vecRestricted;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 24
-			elif kernelname == 'copyAligned8SpSu3vecRestricted':
-				kernel = self.prg.copyAligned8SpSu3vecRestricted;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 24 * 2
-			elif kernelname == 'readAligned8SpSu3vecRestricted':
-				kernel = self.prg.readAligned8SpSu3vecRestricted;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 24
-			elif kernelname == 'writeAligned8SpSu3vecRestricted':
-				kernel = self.prg.writeAligned8SpSu3vecRestricted;
-				elems = mem_size / 24
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 24
-			elif kernelname == 'copyAligned16SpSu3vecRestricted':
-				kernel = self.prg.copyAligned16SpSu3vecRestricted;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 24 * 2
-			elif kernelname == 'readAligned16SpSu3vecRestricted':
-				kernel = self.prg.readAligned16SpSu3vecRestricted;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 24
-			elif kernelname == 'writeAligned16SpSu3vecRestricted':
-				kernel = self.prg.writeAligned16SpSu3vecRestricted;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 24
-			elif kernelname == 'copyAligned32SpSu3vecRestricted':
-				kernel = self.prg.copyAligned32SpSu3vecRestricted;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 24 * 2
-			elif kernelname == 'readAligned32SpSu3vecRestricted':
-				kernel = self.prg.readAligned32SpSu3vecRestricted;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 24
-			elif kernelname == 'writeAligned32SpSu3vecRestricted':
-				kernel = self.prg.writeAligned32SpSu3vecRestricted;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 24
-
-			elif kernelname == 'copySpSu3':
-				kernel = self.prg.copySpSu3;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 72 * 2
-			elif kernelname == 'readSpSu3':
-				kernel = self.prg.readSpSu3;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 72
-			elif kernelname == 'writeSpSu3':
-				kernel = self.prg.writeSpSu3;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 72
-			elif kernelname == 'copySpSu3Restricted':
-				kernel = self.prg.copySpSu3Restricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 72 * 2
-			elif kernelname == 'readSpSu3Restricted':
-				kernel = self.prg.readSpSu3Restricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 72
-			elif kernelname == 'writeSpSu3Restricted':
-				kernel = self.prg.writeSpSu3Restricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 72
-			elif kernelname == 'copySpSu3SOARestricted':
-				kernel = self.prg.copySpSu3SOARestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 72 * 2
-			elif kernelname == 'readSpSu3SOARestricted':
-				kernel = self.prg.readSpSu3SOARestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 72
-			elif kernelname == 'writeSpSu3SOARestricted':
-				kernel = self.prg.writeSpSu3SOARestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 72
-			elif kernelname == 'copySpSu3ViaLocalRestricted':
-				kernel = self.prg.copySpSu3ViaLocalRestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), cl.LocalMemory(local_threads * 72))
-				bytes_transferred = elems * 72 * 2
-			elif kernelname == 'readSpSu3ViaLocalRestricted':
-				kernel = self.prg.readSpSu3ViaLocalRestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), cl.LocalMemory(local_threads * 72))
-				bytes_transferred = (elems + global_threads) * 72
-			elif kernelname == 'writeSpSu3ViaLocalRestricted':
-				kernel = self.prg.writeSpSu3ViaLocalRestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), cl.LocalMemory(local_threads * 72))
-				bytes_transferred = elems * 72
-			elif kernelname == 'copySpSu3FromAlignedViaLocalRestricted':
-				kernel = self.prg.copySpSu3FromAlignedViaLocalRestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), cl.LocalMemory(local_threads * 72))
-				bytes_transferred = elems * 72 * 2
-			elif kernelname == 'readSpSu3FromAlignedViaLocalRestricted':
-				kernel = self.prg.readSpSu3FromAlignedViaLocalRestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), cl.LocalMemory(local_threads * 72))
-				bytes_transferred = (elems + global_threads) * 72
-			elif kernelname == 'writeSpSu3FromAlignedViaLocalRestricted':
-				kernel = self.prg.writeSpSu3FromAlignedViaLocalRestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), cl.LocalMemory(local_threads * 72))
-				bytes_transferred = elems * 72
-
-			elif kernelname == 'copySpSu3FromAlignedRestricted':
-				kernel = self.prg.copySpSu3FromAlignedRestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 72 * 2
-			elif kernelname == 'readSpSu3FromAlignedRestricted':
-				kernel = self.prg.readSpSu3FromAlignedRestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 72
-			elif kernelname == 'writeSpSu3FromAlignedRestricted':
-				kernel = self.prg.writeSpSu3FromAlignedRestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 72
-			elif kernelname == 'copySpSu3FromAlignedSOARestricted':
-				kernel = self.prg.copySpSu3FromAlignedSOARestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 72 * 2
-			elif kernelname == 'readSpSu3FromAlignedSOARestricted':
-				kernel = self.prg.readSpSu3FromAlignedSOARestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 72
-			elif kernelname == 'writeSpSu3FromAlignedSOARestricted':
-				kernel = self.prg.writeSpSu3FromAlignedSOARestricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 72
-			elif kernelname == 'copyAligned8SpSu3Restricted':
-				kernel = self.prg.copyAligned8SpSu3Restricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 72 * 2
-			elif kernelname == 'readAligned8SpSu3Restricted':
-				kernel = self.prg.readAligned8SpSu3Restricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 72
-			elif kernelname == 'writeAligned8SpSu3Restricted':
-				kernel = self.prg.writeAligned8SpSu3Restricted;
-				elems = mem_size / 72
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 72
-
-			elif kernelname == 'copySpSpinor':
-				kernel = self.prg.copySpSpinor;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 96 * 2
-			elif kernelname == 'readSpSpinor':
-				kernel = self.prg.readSpSpinor;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 96
-			elif kernelname == 'writeSpSpinor':
-				kernel = self.prg.writeSpSpinor;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 96
-			elif kernelname == 'copySpSpinorRestricted':
-				kernel = self.prg.copySpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 96 * 2
-			elif kernelname == 'readSpSpinorRestricted':
-				kernel = self.prg.readSpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 96
-			elif kernelname == 'writeSpSpinorRestricted':
-				kernel = self.prg.writeSpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 96
-			elif kernelname == 'copySpSpinorSOARestricted':
-				kernel = self.prg.copySpSpinorSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 96 * 2
-			elif kernelname == 'readSpSpinorSOARestricted':
-				kernel = self.prg.readSpSpinorSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 96
-			elif kernelname == 'writeSpSpinorSOARestricted':
-				kernel = self.prg.writeSpSpinorSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 96
-			elif kernelname == 'copySpSpinorFullSOARestricted':
-				kernel = self.prg.copySpSpinorFullSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 96 * 2
-			elif kernelname == 'readSpSpinorFullSOARestricted':
-				kernel = self.prg.readSpSpinorFullSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 96
-			elif kernelname == 'writeSpSpinorFullSOARestricted':
-				kernel = self.prg.writeSpSpinorFullSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 96
-			elif kernelname == 'copySpSpinorFullAlignedSOARestricted':
-				kernel = self.prg.copySpSpinorFullAlignedSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 96 * 2
-			elif kernelname == 'readSpSpinorFullAlignedSOARestricted':
-				kernel = self.prg.readSpSpinorFullAlignedSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 96
-			elif kernelname == 'writeSpSpinorFullAlignedSOARestricted':
-				kernel = self.prg.writeSpSpinorFullAlignedSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 96
-			elif kernelname == 'copySpSpinorViaLocalRestricted':
-				kernel = self.prg.copySpSpinorViaLocalRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), cl.LocalMemory(local_threads * 96))
-				bytes_transferred = elems * 96 * 2
-			elif kernelname == 'readSpSpinorViaLocalRestricted':
-				kernel = self.prg.readSpSpinorViaLocalRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), cl.LocalMemory(local_threads * 96))
-				bytes_transferred = (elems + global_threads) * 96
-			elif kernelname == 'writeSpSpinorViaLocalRestricted':
-				kernel = self.prg.writeSpSpinorViaLocalRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), cl.LocalMemory(local_threads * 96))
-				bytes_transferred = elems * 96
-			elif kernelname == 'copySpSpinorFromAlignedRestricted':
-				kernel = self.prg.copySpSpinorFromAlignedRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 96 * 2
-			elif kernelname == 'readSpSpinorFromAlignedRestricted':
-				kernel = self.prg.readSpSpinorFromAlignedRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 96
-			elif kernelname == 'writeSpSpinorFromAlignedRestricted':
-				kernel = self.prg.writeSpSpinorFromAlignedRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 96
-			elif kernelname == 'copySpSpinorFromAlignedSOARestricted':
-				kernel = self.prg.copySpSpinorFromAlignedSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 96 * 2
-			elif kernelname == 'readSpSpinorFromAlignedSOARestricted':
-				kernel = self.prg.readSpSpinorFromAlignedSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 96
-			elif kernelname == 'writeSpSpinorFromAlignedSOARestricted':
-				kernel = self.prg.writeSpSpinorFromAlignedSOARestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 96
-			elif kernelname == 'copyAligned8SpSpinorRestricted':
-				kernel = self.prg.copyAligned8SpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 96 * 2
-			elif kernelname == 'readAligned8SpSpinorRestricted':
-				kernel = self.prg.readAligned8SpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 96
-			elif kernelname == 'writeAligned8SpSpinorRestricted':
-				kernel = self.prg.writeAligned8SpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 96
-			elif kernelname == 'copyAligned16SpSpinorRestricted':
-				kernel = self.prg.copyAligned16SpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 96 * 2
-			elif kernelname == 'readAligned16SpSpinorRestricted':
-				kernel = self.prg.readAligned16SpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 96
-			elif kernelname == 'writeAligned16SpSpinorRestricted':
-				kernel = self.prg.writeAligned16SpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 96
-			elif kernelname == 'copyAligned32SpSpinorRestricted':
-				kernel = self.prg.copyAligned32SpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 96 * 2
-			elif kernelname == 'readAligned32SpSpinorRestricted':
-				kernel = self.prg.readAligned32SpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 96
-			elif kernelname == 'writeAligned32SpSpinorRestricted':
-				kernel = self.prg.writeAligned32SpSpinorRestricted;
-				elems = mem_size / 96
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 96
-
-			elif kernelname == 'copyDouble':
-				kernel = self.prg.copyDouble;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 8 * 2
-			elif kernelname == 'readDouble':
-				kernel = self.prg.readDouble;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 8
-			elif kernelname == 'writeDouble':
-				kernel = self.prg.writeDouble;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float64(1.), np.uint64(elems))
-				bytes_transferred = elems * 8
-			elif kernelname == 'copyDoubleRestricted':
-				kernel = self.prg.copyDoubleRestricted;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 8 * 2
-			elif kernelname == 'readDoubleRestricted':
-				kernel = self.prg.readDoubleRestricted;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 8
-			elif kernelname == 'writeDoubleRestricted':
-				kernel = self.prg.writeDoubleRestricted;
-				elems = mem_size / 8
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float64(1.), np.uint64(elems))
-				bytes_transferred = elems * 8
-			elif kernelname == 'copyDouble2':
-				kernel = self.prg.copyDouble2;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 16 * 2
-			elif kernelname == 'readDouble2':
-				kernel = self.prg.readDouble2;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 16
-			elif kernelname == 'writeDouble2':
-				kernel = self.prg.writeDouble2;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float64(1.), np.uint64(elems))
-				bytes_transferred = elems * 16
-			elif kernelname == 'copyDouble4':
-				kernel = self.prg.copyDouble4;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 32 * 2
-			elif kernelname == 'readDouble4':
-				kernel = self.prg.readDouble4;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 32
-			elif kernelname == 'writeDouble4':
-				kernel = self.prg.writeDouble4;
-				elems = mem_size / 32
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float64(1.), np.uint64(elems))
-				bytes_transferred = elems * 32
-
-			elif kernelname == 'copyDpComplex':
-				kernel = self.prg.copyDpComplex;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 16 * 2
-			elif kernelname == 'readDpComplex':
-				kernel = self.prg.readDpComplex;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 16
-			elif kernelname == 'writeDpComplex':
-				kernel = self.prg.writeDpComplex;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float64(1.), np.uint64(elems))
-				bytes_transferred = elems * 16
-			elif kernelname == 'copyDpComplexRestricted':
-				kernel = self.prg.copyDpComplexRestricted;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 16 * 2
-			elif kernelname == 'readDpComplexRestricted':
-				kernel = self.prg.readDpComplexRestricted;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 16
-			elif kernelname == 'writeDpComplexRestricted':
-				kernel = self.prg.writeDpComplexRestricted;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float64(1.), np.uint64(elems))
-				bytes_transferred = elems * 16
-			elif kernelname == 'copyAlignedDpComplex':
-				kernel = self.prg.copyAlignedDpComplex;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 16 * 2
-			elif kernelname == 'readAlignedDpComplex':
-				kernel = self.prg.readAlignedDpComplex;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 16
-			elif kernelname == 'writeAlignedDpComplex':
-				kernel = self.prg.writeAlignedDpComplex;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float64(1.), np.uint64(elems))
-				bytes_transferred = elems * 16
-			elif kernelname == 'copyAlignedDpComplexRestricted':
-				kernel = self.prg.copyAlignedDpComplexRestricted;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 16 * 2
-			elif kernelname == 'readAlignedDpComplexRestricted':
-				kernel = self.prg.readAlignedDpComplexRestricted;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 16
-			elif kernelname == 'writeAlignedDpComplexRestricted':
-				kernel = self.prg.writeAlignedDpComplexRestricted;
-				elems = mem_size / 16
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float64(1.), np.uint64(elems))
-				bytes_transferred = elems * 16
-
-			elif kernelname == 'copyDpSu3vec':
-				kernel = self.prg.copyDpSu3vec;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 48 * 2
-			elif kernelname == 'readDpSu3vec':
-				kernel = self.prg.readDpSu3vec;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 48
-			elif kernelname == 'writeDpSu3vec':
-				kernel = self.prg.writeDpSu3vec;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 48
-			elif kernelname == 'copyDpSu3vecRestricted':
-				kernel = self.prg.copyDpSu3vecRestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 48 * 2
-			elif kernelname == 'readDpSu3vecRestricted':
-				kernel = self.prg.readDpSu3vecRestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 48
-			elif kernelname == 'writeDpSu3vecRestricted':
-				kernel = self.prg.writeDpSu3vecRestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 48
-			elif kernelname == 'copyAligned16DpSu3vecRestricted':
-				kernel = self.prg.copyAligned16DpSu3vecRestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 48 * 2
-			elif kernelname == 'readAligned16DpSu3vecRestricted':
-				kernel = self.prg.readAligned16DpSu3vecRestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 48
-			elif kernelname == 'writeAligned16DpSu3vecRestricted':
-				kernel = self.prg.writeAligned16DpSu3vecRestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 48
-			elif kernelname == 'copyAligned32DpSu3vecRestricted':
-				kernel = self.prg.copyAligned32DpSu3vecRestricted;
-				elems = mem_size / 64
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 48 * 2
-			elif kernelname == 'readAligned32DpSu3vecRestricted':
-				kernel = self.prg.readAligned32DpSu3vecRestricted;
-				elems = mem_size / 64
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 48
-			elif kernelname == 'writeAligned32DpSu3vecRestricted':
-				kernel = self.prg.writeAligned32DpSu3vecRestricted;
-				elems = mem_size / 64
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 48
-			elif kernelname == 'copyDpSu3vecSOARestricted':
-				kernel = self.prg.copyDpSu3vecSOARestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 48 * 2
-			elif kernelname == 'readDpSu3vecSOARestricted':
-				kernel = self.prg.readDpSu3vecSOARestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 48
-			elif kernelname == 'writeDpSu3vecSOARestricted':
-				kernel = self.prg.writeDpSu3vecSOARestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 48
-			elif kernelname == 'copyDpSu3vecFullSOARestricted':
-				kernel = self.prg.copyDpSu3vecFullSOARestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 48 * 2
-			elif kernelname == 'readDpSu3vecFullSOARestricted':
-				kernel = self.prg.readDpSu3vecFullSOARestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 48
-			elif kernelname == 'writeDpSu3vecFullSOARestricted':
-				kernel = self.prg.writeDpSu3vecFullSOARestricted;
-				elems = mem_size / 48
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 48
-
-			elif kernelname == 'copyDpSu3':
-				kernel = self.prg.copyDpSu3;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 144 * 2
-			elif kernelname == 'readDpSu3':
-				kernel = self.prg.readDpSu3;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 144
-			elif kernelname == 'writeDpSu3':
-				kernel = self.prg.writeDpSu3;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 144
-			elif kernelname == 'copyDpSu3Restricted':
-				kernel = self.prg.copyDpSu3Restricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 144 * 2
-			elif kernelname == 'readDpSu3Restricted':
-				kernel = self.prg.readDpSu3Restricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 144
-			elif kernelname == 'writeDpSu3Restricted':
-				kernel = self.prg.writeDpSu3Restricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 144
-			elif kernelname == 'copyAligned16DpSu3Restricted':
-				kernel = self.prg.copyAligned16DpSu3Restricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 144 * 2
-			elif kernelname == 'readAligned16DpSu3Restricted':
-				kernel = self.prg.readAligned16DpSu3Restricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 144
-			elif kernelname == 'writeAligned16DpSu3Restricted':
-				kernel = self.prg.writeAligned16DpSu3Restricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 144
-			elif kernelname == 'copyAligned32DpSu3Restricted':
-				kernel = self.prg.copyAligned32DpSu3Restricted;
-				elems = mem_size / 160
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 144 * 2
-			elif kernelname == 'readAligned32DpSu3Restricted':
-				kernel = self.prg.readAligned32DpSu3Restricted;
-				elems = mem_size / 160
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 144
-			elif kernelname == 'writeAligned32DpSu3Restricted':
-				kernel = self.prg.writeAligned32DpSu3Restricted;
-				elems = mem_size / 160
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 144
-			elif kernelname == 'copyDpSu3SOARestricted':
-				kernel = self.prg.copyDpSu3SOARestricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 144 * 2
-			elif kernelname == 'readDpSu3SOARestricted':
-				kernel = self.prg.readDpSu3SOARestricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 144
-			elif kernelname == 'writeDpSu3SOARestricted':
-				kernel = self.prg.writeDpSu3SOARestricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 144
-			elif kernelname == 'copyDpSu3FullSOARestricted':
-				kernel = self.prg.copyDpSu3FullSOARestricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 144 * 2
-			elif kernelname == 'readDpSu3FullSOARestricted':
-				kernel = self.prg.readDpSu3FullSOARestricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 144
-			elif kernelname == 'writeDpSu3FullSOARestricted':
-				kernel = self.prg.writeDpSu3FullSOARestricted;
-				elems = mem_size / 144
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 144
-
-			elif kernelname == 'copyDpSpinor':
-				kernel = self.prg.copyDpSpinor;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 192 * 2
-			elif kernelname == 'readDpSpinor':
-				kernel = self.prg.readDpSpinor;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 192
-			elif kernelname == 'writeDpSpinor':
-				kernel = self.prg.writeDpSpinor;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 192
-			elif kernelname == 'copyDpSpinorRestricted':
-				kernel = self.prg.copyDpSpinorRestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 192 * 2
-			elif kernelname == 'readDpSpinorRestricted':
-				kernel = self.prg.readDpSpinorRestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 192
-			elif kernelname == 'writeDpSpinorRestricted':
-				kernel = self.prg.writeDpSpinorRestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 192
-			elif kernelname == 'copyAligned16DpSpinorRestricted':
-				kernel = self.prg.copyAligned16DpSpinorRestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 192 * 2
-			elif kernelname == 'readAligned16DpSpinorRestricted':
-				kernel = self.prg.readAligned16DpSpinorRestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 192
-			elif kernelname == 'writeAligned16DpSpinorRestricted':
-				kernel = self.prg.writeAligned16DpSpinorRestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 192
-			elif kernelname == 'copyAligned32DpSpinorRestricted':
-				kernel = self.prg.copyAligned32DpSpinorRestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = elems * 192 * 2
-			elif kernelname == 'readAligned32DpSpinorRestricted':
-				kernel = self.prg.readAligned32DpSpinorRestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems))
-				bytes_transferred = (elems + global_threads) * 192
-			elif kernelname == 'writeAligned32DpSpinorRestricted':
-				kernel = self.prg.writeAligned32DpSpinorRestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems))
-				bytes_transferred = elems * 192
-			elif kernelname == 'copyDpSpinorSOARestricted':
-				kernel = self.prg.copyDpSpinorSOARestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 192 * 2
-			elif kernelname == 'readDpSpinorSOARestricted':
-				kernel = self.prg.readDpSpinorSOARestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 192
-			elif kernelname == 'writeDpSpinorSOARestricted':
-				kernel = self.prg.writeDpSpinorSOARestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 192
-			elif kernelname == 'copyDpSpinorFullSOARestricted':
-				kernel = self.prg.copyDpSpinorFullSOARestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 192 * 2
-			elif kernelname == 'readDpSpinorFullSOARestricted':
-				kernel = self.prg.readDpSpinorFullSOARestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 192
-			elif kernelname == 'writeDpSpinorFullSOARestricted':
-				kernel = self.prg.writeDpSpinorFullSOARestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 192
-			elif kernelname == 'copyDpSpinorFullestSOARestricted':
-				kernel = self.prg.copyDpSpinorFullestSOARestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 192 * 2
-			elif kernelname == 'readDpSpinorFullestSOARestricted':
-				kernel = self.prg.readDpSpinorFullestSOARestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, self.in_buf, np.uint64(elems), np.uint64(stride))
-				bytes_transferred = (elems + global_threads) * 192
-			elif kernelname == 'writeDpSpinorFullestSOARestricted':
-				kernel = self.prg.writeDpSpinorFullestSOARestricted;
-				elems = mem_size / 192
-				event = kernel(self.queue, (global_threads,), (local_threads,), self.out_buf, np.float32(1.), np.uint64(elems), np.uint64(stride))
-				bytes_transferred = elems * 192
-
-			else:
-				raise NameError( "Don't know how to run {0}".format(kernelname) )
-
-			events.append(event)
-
-		cl.wait_for_events(events)
-
-		# throw away warmup runs
-		events = events[WARMUP_RUNS:]
-		event_times = map(lambda event: (event.profile.end - event.profile.start), events)
-		elapsed = np.mean(event_times)
-		elapsed_std = np.std(event_times)
-
-		return DataPoint(kernelname, global_threads, local_threads, bytes_transferred, elapsed, elapsed_std, bytes_transferred / elapsed)
+		for i in range(runs):
+			run = []
+			for args in launch.tiles:
+				if len(launch.tiles) > 1:
+					launch.kernel.set_args(*args)
+				run.append(cl.enqueue_nd_range_kernel(self.queue, launch.kernel, global_size, local_size))
+			events.append(run)
+		return events
+
+	def enqueue_driver(self, access, out_buf, in_buf, size):
+		"""
+		Enqueue the driver primitive of a pseudo-kernel, see registry.add_driver_kernels().
+		"""
+		if access == 'copy':
+			return cl.enqueue_copy(self.queue, out_buf, in_buf, byte_count=size)
+		else:
+			return cl.enqueue_fill_buffer(self.queue, out_buf, np.float32(1.), 0, size)
+
+	def get_run_times(self, events):
+		"""
+		Wait for the runs returned by enqueue() and return the time of each in nanos, summed over its tiles.
+		"""
+		cl.wait_for_events([event for run in events for event in run])
+		return [sum(map(lambda event: event.profile.end - event.profile.start, run)) for run in events]
+
+	def enqueue_runs(self, launch, runs):
+		"""
+		Run the launch the given number of times and return the time of each run in nanos.
+		"""
+		return self.get_run_times(self.enqueue(launch, runs))
+
+	def get_datapoint(self, launch, event_times):
+		elapsed, elapsed_std, median, minimum, p5, p95, robust = get_statistics(event_times)
+		bytes_transferred = launch.bytes_transferred
+		bandwidth = bytes_transferred / elapsed
+		efficiency = bandwidth * 100 / self.peak_bandwidth if self.peak_bandwidth else None
+		return DataPoint(launch.kernelname, launch.global_threads, launch.local_threads, bytes_transferred, elapsed, elapsed_std, bandwidth, self.device_id, len(event_times),
+		                 median, minimum, p5, p95, robust, launch.mem_size, efficiency, event_times)
+
+	def benchmark(self, kernelname, mem_size = None, global_threads = None, local_threads = None, stride = None, sampler = None):
+		if not sampler:
+			sampler = self.sampler
+		launch = self.prepare(kernelname, mem_size, global_threads, local_threads, stride)
+
+		# repeat until the mean is precise enough, warmup runs are detected and dropped by the sampler
+		event_times, warmup = sampler.sample(lambda runs: self.enqueue_runs(launch, runs))
+		return self.get_datapoint(launch, event_times)
+
+	def benchmark_many(self, requests, sampler = None, depth = PIPELINE_DEPTH):
+		"""
+		Benchmark the given BenchmarkRequests, yielding a (request, DataPoint) tuple for each in order.
+
+		Instead of waiting for each benchmark to finish before starting the next, up to depth kernel
+		launches are kept in flight. While the device works through them, the host collects the times
+		of the oldest launches and enqueues further runs or the next requests. If a request fails, the
+		exception is yielded in place of its DataPoint.
+		"""
+		if not sampler:
+			sampler = self.sampler
+		requests = iter(requests)
+		in_flight = [] # [index, request, launch, sampling state, events] in enqueue order
+		results = {}
+		next_index = 0
+		next_result = 0
+		exhausted = False
+
+		while True:
+			while not exhausted and sum(map(lambda entry: len(entry[4]) * len(entry[2].tiles), in_flight)) < depth:
+				try:
+					request = next(requests)
+				except StopIteration:
+					exhausted = True
+					break
+				index = next_index
+				next_index += 1
+				try:
+					launch = self.prepare(*request)
+					state = sampler.start()
+					in_flight.append([index, request, launch, state, self.enqueue(launch, min(state.get_runs(), depth))])
+				except (cl.RuntimeError, cl.LogicError, ValueError) as ex:
+					results[index] = (request, ex)
+
+			if in_flight:
+				index, request, launch, state, events = in_flight.pop(0)
+				try:
+					# the queue is in order, so the oldest launches complete first
+					state.add(self.get_run_times(events))
+					runs = state.get_runs()
+					if runs:
+						in_flight.append([index, request, launch, state, self.enqueue(launch, min(runs, depth))])
+					else:
+						results[index] = (request, self.get_datapoint(launch, state.get_result()[0]))
+				except (cl.RuntimeError, cl.LogicError) as ex:
+					results[index] = (request, ex)
+			elif exhausted and next_result == next_index:
+				return
+
+			while next_result in results:
+				yield results.pop(next_result)
+				next_result += 1
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import numpy as np
+
+PRECISION = 0.02 # relative half width of the 95% confidence interval
+MIN_RUNS = 5
+MAX_RUNS = 200
+MAX_WARMUP_RUNS = 5
+TIME_BUDGET = 2. # seconds of kernel time per measurement
+
+# two-sided 95% quantiles of Student's t-distribution by degrees of freedom
+T_95 = [None, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+def get_t_95(dof):
+	if dof < len(T_95):
+		return T_95[dof]
+	return 1.96
+
+def get_relative_ci(times):
+	"""
+	Returns the half width of the 95% confidence interval of the mean of times relative to the mean.
+	"""
+	n = len(times)
+	if n < 2:
+		return float('inf')
+	mean = np.mean(times)
+	if mean == 0:
+		return float('inf')
+	return get_t_95(n - 1) * np.std(times, ddof=1) / np.sqrt(n) / mean
+
+def is_significant(mean_a, std_a, runs_a, mean_b, std_b, runs_b):
+	"""
+	Returns whether the means of two measurements differ significantly at the 95% level.
+
+	Uses Welch's t-test on the stored statistics, std being the population standard deviation
+	of the runs as returned by get_statistics().
+	"""
+	if runs_a < 2 or runs_b < 2:
+		return False
+	var_a = std_a ** 2 * runs_a / (runs_a - 1) / runs_a
+	var_b = std_b ** 2 * runs_b / (runs_b - 1) / runs_b
+	if var_a + var_b == 0:
+		return mean_a != mean_b
+	t = abs(mean_a - mean_b) / np.sqrt(var_a + var_b)
+	dof = (var_a + var_b) ** 2 / (var_a ** 2 / (runs_a - 1) + var_b ** 2 / (runs_b - 1))
+	return t > get_t_95(int(dof))
+
+def detect_warmup(times, max_warmup = MAX_WARMUP_RUNS):
+	"""
+	Returns the number of leading samples to discard as warmup.
+
+	A leading sample counts as warmup if it is significantly slower than the samples following it,
+	judged by the median and median absolute deviation of those.
+	"""
+	times = np.asarray(times, dtype=float)
+	limit = min(max_warmup, len(times) - 2)
+	for i in range(max(limit, 0)):
+		rest = times[i + 1:]
+		median = np.median(rest)
+		mad = np.median(np.abs(rest - median))
+		if times[i] <= median + max(3 * 1.4826 * mad, 0.05 * median):
+			return i
+	return max(limit, 0)
+
+def reject_outliers(times):
+	"""
+	Returns the samples that are within three standard deviations of the median,
+	the standard deviation being estimated from the median absolute deviation.
+	"""
+	times = np.asarray(times, dtype=float)
+	median = np.median(times)
+	mad = np.median(np.abs(times - median))
+	return times[np.abs(times - median) <= 3 * 1.4826 * mad]
+
+def get_statistics(times):
+	"""
+	Returns a tuple of mean, standard deviation, median, minimum, 5th and 95th percentile
+	and the outlier-rejected mean of the given times.
+	"""
+	times = np.asarray(times, dtype=float)
+	p5, p95 = np.percentile(times, [5, 95])
+	return (np.mean(times), np.std(times), np.median(times), np.min(times), p5, p95, np.mean(reject_outliers(times)))
+
+class AdaptiveSampler:
+	"""
+	Repeats a measurement until the confidence interval of its mean is narrow enough.
+
+	Sampling stops once the relative half width of the 95% confidence interval drops below precision,
+	but not before min_runs valid samples have been taken and not after max_runs samples or once
+	the runs took time_budget seconds in total. Warmup samples are detected from the data and discarded.
+	"""
+
+	def __init__(self, precision = PRECISION, min_runs = MIN_RUNS, max_runs = MAX_RUNS, time_budget = TIME_BUDGET, max_warmup = MAX_WARMUP_RUNS):
+		self.precision = precision
+		self.min_runs = min_runs
+		self.max_runs = max_runs
+		self.time_budget = time_budget
+		self.max_warmup = max_warmup
+
+	def start(self):
+		"""
+		Returns a SamplingState to sample a measurement step by step.
+		"""
+		return SamplingState(self)
+
+	def sample(self, measure):
+		"""
+		Sample using measure(n), which has to perform n runs and return their times in nanos.
+
+		Returns a tuple of the valid samples as a numpy array and the number of discarded warmup runs.
+		"""
+		state = self.start()
+		runs = state.get_runs()
+		while runs:
+			state.add(measure(runs))
+			runs = state.get_runs()
+		return state.get_result()
+
+class SamplingState:
+	"""
+	The samples of a single measurement taken by an AdaptiveSampler.
+
+	get_runs() tells how many more runs to perform, add() takes their times in nanos. This allows the runs
+	of multiple measurements to be interleaved, see Runner.benchmark_many().
+	"""
+
+	def __init__(self, sampler):
+		self.sampler = sampler
+		self.times = []
+
+	def add(self, times):
+		self.times.extend(times)
+
+	def get_runs(self):
+		"""
+		Returns the number of runs to perform next, 0 once sampling is finished.
+		"""
+		sampler = self.sampler
+		if not self.times:
+			return sampler.min_runs + 2
+
+		warmup = detect_warmup(self.times, sampler.max_warmup)
+		valid = self.times[warmup:]
+		elapsed = sum(self.times) / 1e9
+		if len(valid) >= sampler.min_runs:
+			rel_ci = get_relative_ci(valid)
+			if rel_ci <= sampler.precision or len(valid) >= sampler.max_runs or elapsed >= sampler.time_budget:
+				return 0
+			# the confidence interval shrinks with the square root of the number of samples
+			needed = int(np.ceil(len(valid) * (rel_ci / sampler.precision) ** 2)) - len(valid)
+		else:
+			needed = sampler.min_runs - len(valid)
+		# don't overshoot the limits and don't stall on tiny batches either
+		runs = min(max(needed, 2), sampler.max_runs - len(valid))
+		if elapsed > 0:
+			runs = min(runs, int((sampler.time_budget - elapsed) / (elapsed / len(self.times))))
+		return max(runs, 1)
+
+	def get_result(self):
+		"""
+		Returns a tuple of the valid samples as a numpy array and the number of discarded warmup runs.
+		"""
+		warmup = detect_warmup(self.times, self.sampler.max_warmup)
+		return (np.array(self.times[warmup:], dtype=np.uint64), warmup)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+
+import pyopencl as cl
+import numpy as np
+from collections import namedtuple, OrderedDict
+
+from runner import DataPoint, Launch
+
+LAYOUTS = ('AoS', 'SOA', 'FullSOA', 'FullestSOA') # see the stencil kernels in kernels.cl
+# precision -> bytes per real
+PRECISIONS = OrderedDict([
+	('sp', 4),
+	('dp', 8),
+])
+SPINOR_REALS = 24
+LINK_REALS = 18
+LATTICES = ('4x4x4x4', '8x8x8x8', '12x12x12x12', '16x16x16x16', '24x12x12x12')
+
+# lattice gives the extents as NTxNXxNYxNZ, even_odd is 1 for even-odd preconditioned runs
+StencilDataPoint = namedtuple('StencilDataPoint', DataPoint._fields + ('lattice', 'even_odd'))
+
+def get_kernel_name(precision, layout):
+	return 'dslash{0}{1}'.format(precision.capitalize(), '' if layout == 'AoS' else layout)
+
+def parse_lattice(lattice):
+	"""
+	Returns the extents (NT, NX, NY, NZ) of a lattice given as NTxNXxNYxNZ.
+	"""
+	try:
+		extents = tuple(map(int, lattice.split('x')))
+	except ValueError:
+		extents = ()
+	if len(extents) != 4 or min(extents) < 1:
+		raise ValueError('A lattice has to be given as NTxNXxNYxNZ, not {0}'.format(lattice))
+	return extents
+
+def get_sites(extents, even_odd):
+	"""
+	Returns the number of sites the stencil is applied to, half the lattice if even-odd preconditioned.
+	"""
+	nt, nx, ny, nz = extents
+	volume = nt * nx * ny * nz
+	return volume / 2 if even_odd else volume
+
+def get_bytes_transferred(sites, real_size):
+	"""
+	The standard byte model of the Wilson Dslash: each site loads its 8 neighbouring spinors and the
+	8 links connecting them and stores one spinor. Cache reuse of neighbours is not accounted for.
+	"""
+	return sites * (8 * (SPINOR_REALS + LINK_REALS) + SPINOR_REALS) * real_size
+
+class StencilBenchmark:
+	"""
+	Measures the Wilson Dslash on a 4D lattice with periodic boundaries.
+
+	The spinor and link fields are allocated by the benchmark, as they do not fit the buffers of the
+	runner, and kept until a lattice needs different sizes. They are not initialized.
+	"""
+
+	def __init__(self, runner):
+		self.runner = runner
+		self.kernels = {}
+		self.buffers = None
+		self.buffer_sizes = None
+
+		prg, cached, error = runner.build_unit('stencil')
+		if error:
+			raise error
+		runner.programs['stencil'] = prg
+		self.program = prg
+
+	def get_kernel(self, kernelname):
+		if kernelname not in self.kernels:
+			self.kernels[kernelname] = getattr(self.program, kernelname)
+		return self.kernels[kernelname]
+
+	def get_buffers(self, sizes):
+		"""
+		Returns the output spinor, input spinor and link buffers of the given sizes in bytes.
+		"""
+		if sizes != self.buffer_sizes:
+			max_size = self.runner.device.max_mem_alloc_size
+			for size in sizes:
+				if size > max_size:
+					raise ValueError('A field of {0} bytes exceeds the maximum buffer size of {1} bytes'.format(size, max_size))
+			self.buffers = None # release the old fields first
+			self.buffers = (cl.Buffer(self.runner.ctx, cl.mem_flags.WRITE_ONLY, sizes[0]),
+			                cl.Buffer(self.runner.ctx, cl.mem_flags.READ_ONLY, sizes[1]),
+			                cl.Buffer(self.runner.ctx, cl.mem_flags.READ_ONLY, sizes[2]))
+			self.buffer_sizes = sizes
+		return self.buffers
+
+	def prepare(self, precision, layout, lattice, even_odd, global_threads = None, local_threads = None):
+		"""
+		Check the parameters against the limits of the device and return the resulting Launch.
+		The memory size of the launch is the size of all three fields.
+		"""
+		if precision not in PRECISIONS:
+			raise NameError("Don't know the precision {0}".format(precision))
+		if layout not in LAYOUTS:
+			raise NameError("Don't know the layout {0}".format(layout))
+		if precision == 'dp' and not self.runner.hasDoublePrecisionSupport():
+			raise ValueError('Double precision is not supported by the device')
+		extents = parse_lattice(lattice)
+		if even_odd and any(extent % 2 for extent in extents):
+			raise ValueError('Even-odd preconditioning requires even extents, not {0}'.format(lattice))
+		if not global_threads:
+			global_threads = self.runner.global_threads
+		if not local_threads:
+			local_threads = self.runner.local_threads
+
+		nt, nx, ny, nz = extents
+		real_size = PRECISIONS[precision]
+		sites = get_sites(extents, even_odd)
+		sizes = (sites * SPINOR_REALS * real_size, sites * SPINOR_REALS * real_size, 4 * nt * nx * ny * nz * LINK_REALS * real_size)
+		out_buf, in_buf, links = self.get_buffers(sizes)
+
+		kernelname = get_kernel_name(precision, layout)
+		args = [out_buf, in_buf, links, np.uint32(nx), np.uint32(ny), np.uint32(nz), np.uint32(nt), np.uint32(1 if even_odd else 0)]
+		return Launch(kernelname, self.get_kernel(kernelname), [args], global_threads, local_threads, sum(sizes), get_bytes_transferred(sites, real_size))
+
+	def benchmark(self, precision, layout, lattice, even_odd, global_threads = None, local_threads = None, sampler = None):
+		if not sampler:
+			sampler = self.runner.sampler
+		launch = self.prepare(precision, layout, lattice, even_odd, global_threads, local_threads)
+
+		event_times, warmup = sampler.sample(lambda runs: self.runner.enqueue_runs(launch, runs))
+		datapoint = self.runner.get_datapoint(launch, event_times)
+		return StencilDataPoint(*datapoint, lattice = lattice, even_odd = 1 if even_odd else 0)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import pyopencl as cl
+import optparse
+import os
+
+from runner import *
+from multidevice import resolve_devices, run_on_devices
+from results import ResultsRecorder
+from latency import KERNEL, LatencyDataPoint, LatencyBenchmark, get_latency, find_boundaries
+import latency
+import sampling
+from refinement import get_sizes, STEPS_PER_OCTAVE
+
+def run(runner, args, done = (), report = None):
+	bench = LatencyBenchmark(runner, args.stride, args.steps)
+	sizes = get_sizes(args.mem_min_size, bench.max_size, args.steps_per_octave, args.stride)
+	# sizes already measured by a previous run are skipped
+	sizes = [size for size in sizes if (runner.device_id, size, args.stride) not in done]
+
+	if args.progress:
+		from progressbar import ProgressBar
+		progress = ProgressBar(maxval=len(sizes)).start()
+
+	datapoints = []
+	# each process records the run on its own device
+	recorder = ResultsRecorder(args.database, runner, 'sweepLatency.py') if args.database else None
+
+	for i, size in enumerate(sizes):
+		try:
+			datapoint = bench.benchmark(size)
+			datapoints.append(datapoint)
+			if report:
+				report(datapoint)
+			if recorder:
+				recorder.write(datapoint)
+			if args.progress:
+				progress.update(i + 1)
+		except (cl.RuntimeError, cl.LogicError) as ex:
+			# On Apples OpenCL retrieving the profiling information sometimes seems to fail for no good reason
+			# In addition, sometimes the queue becomes invalid
+			print 'Error benchmarking {0}: {1}'.format(KERNEL, ex)
+
+	if args.progress:
+		progress.finish()
+	if recorder:
+		recorder.close()
+
+	return datapoints
+
+if __name__ == '__main__':
+	parser = optparse.OptionParser(description='Benchmark the latency of global memory over the working set size by pointer chasing')
+	parser.add_option('-d', '--device', metavar='SEL', help='The device(s) to use for the measurement: a device index, PLATFORM:DEVICE, a comma separated list of those or all')
+	parser.add_option('-p', '--plot', action='store_true', default=False, help='Make a plot of the measurements')
+	parser.add_option('-e', '--plot-errorbars', action='store_true', default=False, help='Add error bars to the plot')
+	parser.add_option('-o', '--plot-file', metavar='FILE', help='File to store the plot in (Display if unset)')
+	parser.add_option('-m', '--mem-max-size', type=int, metavar='BYTE', help='Maximum working set size in bytes')
+	parser.add_option('--mem-min-size', type=int, default=1024, metavar='BYTE', help='Minimum working set size in bytes')
+	parser.add_option('-s', '--steps-per-octave', type=int, default=STEPS_PER_OCTAVE, metavar='N', help='Number of working set sizes per doubling of the size (default {0})'.format(STEPS_PER_OCTAVE))
+	parser.add_option('--stride', type=int, default=latency.STRIDE, metavar='BYTE', help='Distance between the elements of the chain, at least a cache line (default {0})'.format(latency.STRIDE))
+	parser.add_option('--steps', type=int, default=latency.STEPS, metavar='N', help='Number of accesses per kernel run (default {0})'.format(latency.STEPS))
+	parser.add_option('--threshold', type=float, default=latency.THRESHOLD, metavar='REL', help='Report a cache boundary where the latency rises by more than REL (default {0})'.format(latency.THRESHOLD))
+	parser.add_option('--progress', action='store_true', default=False, help='Display a progress bar while running kernels')
+	parser.add_option('--export', metavar='FILE', help='Export measurement results to a CSV file, or a binary file if it ends with .npy')
+	parser.add_option('--database', metavar='FILE', help='Record the run and its results in the given SQLite database, see queryResults.py')
+	parser.add_option('--resume', action='store_true', default=False, help='Continue the measurement in the export file, skipping the working set sizes it already contains')
+	parser.add_option('--import', metavar='FILE', action='append', help='Import data from file instead of benchmarking', dest='imports')
+	parser.add_option('--no-build-cache', action='store_false', dest='build_cache', default=True, help='Always build the kernels from source instead of using cached binaries')
+	parser.add_option('--precision', type=float, metavar='REL', help='Repeat each measurement until the 95% confidence interval of the time is within +-REL of the mean (default {0})'.format(sampling.PRECISION))
+	parser.add_option('--max-runs', type=int, metavar='N', help='Never repeat a measurement more than N times (default {0})'.format(sampling.MAX_RUNS))
+	parser.add_option('--time-budget', type=float, metavar='SECONDS', help='Stop repeating a measurement once its runs took SECONDS (default {0})'.format(sampling.TIME_BUDGET))
+
+	(args, rem) = parser.parse_args()
+
+	if args.stride % latency.INDEX_SIZE:
+		parser.error('The stride has to be a multiple of {0} bytes'.format(latency.INDEX_SIZE))
+
+	runner_args = {}
+	if args.mem_max_size != None:
+		runner_args['max_mem_size'] = args.mem_max_size
+	if not args.build_cache:
+		runner_args['build_cache'] = False
+	sampler_args = {}
+	if args.precision:
+		sampler_args['precision'] = args.precision
+	if args.max_runs:
+		sampler_args['max_runs'] = args.max_runs
+	if args.time_budget:
+		sampler_args['time_budget'] = args.time_budget
+	if sampler_args:
+		runner_args['sampler'] = sampling.AdaptiveSampler(**sampler_args)
+
+	if args.imports == None: # no data file given, run benchmark
+
+		previous = []
+		if args.resume:
+			if args.export == None:
+				parser.error('--resume requires --export')
+			if os.path.exists(args.export):
+				previous = read_datapoints(args.export, LatencyDataPoint)
+		done = set((p.device, p.mem_size, p.stride) for p in previous)
+
+		# datapoints are exported as soon as they are measured, so an abort does not lose them
+		writer = get_writer(args.export, LatencyDataPoint, append = args.resume) if args.export != None else None
+		report = writer.write if writer else None
+		try:
+			devices = resolve_devices(args.device) if args.device != None else []
+			if len(devices) > 1:
+				args.progress = False # the progress bars of the workers would garble each other
+				datapoints = run_on_devices(devices, runner_args, run, args, done, report = report)
+			else:
+				if devices:
+					runner_args['device'] = devices[0]
+				datapoints = run(Runner(**runner_args), args, done, report)
+		finally:
+			if writer:
+				writer.close()
+		datapoints = previous + datapoints
+
+	else: # data file(s) given. import
+
+		datapoints = []
+		for file in args.imports:
+			datapoints.extend(read_datapoints(file, LatencyDataPoint))
+
+	device_ids = unique(map(lambda p: p.device, datapoints))
+	series = [(device, stride) for device in device_ids for stride in unique(map(lambda p: p.stride, filter(lambda p: p.device == device, datapoints)))]
+
+	print '#Bytes Stride nanos/access (rel err)'
+	for device, stride in series:
+		points = sorted(filter(lambda p: p.device == device and p.stride == stride, datapoints), key = lambda p: p.mem_size)
+		if len(device_ids) > 1:
+			print '#Device: {0}'.format(device)
+		for datapoint in points:
+			print '{0.mem_size} {0.stride} {1:.1f} ({2:.1%})'.format(datapoint, get_latency(datapoint), datapoint.time_std / datapoint.time)
+		for size, before, after in find_boundaries(points, args.threshold):
+			print '#Cache boundary: {0} KiB ({1:.1f} -> {2:.1f} nanos/access)'.format(size / 1024, before, after)
+
+	if args.plot:
+		import matplotlib.pyplot as plt # by including it here we won't need it unless we want to plot
+
+		for device, stride in series:
+			points = sorted(filter(lambda p: p.device == device and p.stride == stride, datapoints), key = lambda p: p.mem_size)
+			label = '{0} {1} B'.format(device, stride) if len(device_ids) > 1 else '{0} B stride'.format(stride)
+			sizes = map(lambda p: p.mem_size, points)
+			latencies = map(get_latency, points)
+			if args.plot_errorbars:
+				errs = map(lambda p: p.time_std / p.time * get_latency(p), points)
+				line = plt.errorbar(sizes, latencies, yerr=errs, fmt='.-', ecolor='black', label=label)[0]
+			else:
+				line = plt.plot(sizes, latencies, '.-', label=label)[0]
+			for size, before, after in find_boundaries(points, args.threshold):
+				plt.axvline(x=size, color=line.get_color(), linestyle='--')
+
+		plt.title('Memory Latency')
+		plt.xscale('log')
+		plt.xlabel('Working Set Size / Bytes')
+		plt.ylabel('nanos/access')
+		plt.legend(loc='upper left')
+
+		if args.plot_file:
+			plt.savefig(args.plot_file)
+		else:
+			plt.show()
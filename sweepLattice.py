@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+
+import pyopencl as cl
+import optparse
+import os
+
+from runner import *
+from multidevice import resolve_devices, run_on_devices
+from results import ResultsRecorder
+from stencil import StencilDataPoint, StencilBenchmark, get_kernel_name, parse_lattice
+import stencil
+import sampling
+
+PRECONDITIONINGS = ('none', 'even-odd')
+
+def run(runner, args, done = (), report = None):
+	bench = StencilBenchmark(runner)
+
+	# configurations already measured by a previous run are skipped
+	jobs = [(precision, layout, lattice, preconditioning == 'even-odd') for precision in args.reals for layout in args.layouts
+	        for preconditioning in args.preconditionings for lattice in args.lattices]
+	jobs = [job for job in jobs if (runner.device_id, get_kernel_name(job[0], job[1]), job[2], int(job[3])) not in done]
+
+	if args.progress:
+		from progressbar import ProgressBar
+		progress = ProgressBar(maxval=len(jobs)).start()
+
+	datapoints = []
+	# each process records the run on its own device
+	recorder = ResultsRecorder(args.database, runner, 'sweepLattice.py') if args.database else None
+
+	for i, (precision, layout, lattice, even_odd) in enumerate(jobs):
+		kernel = get_kernel_name(precision, layout)
+		try:
+			datapoint = bench.benchmark(precision, layout, lattice, even_odd, args.global_threads, args.local_threads)
+			datapoints.append(datapoint)
+			if report:
+				report(datapoint)
+			if recorder:
+				recorder.write(datapoint)
+		except ValueError as ex:
+			# lattices exceeding the buffer size or unsupported by the device
+			print '#Skipping {0} on {1}: {2}'.format(kernel, lattice, ex)
+		except (cl.RuntimeError, cl.LogicError) as ex:
+			# On Apples OpenCL retrieving the profiling information sometimes seems to fail for no good reason
+			# In addition, sometimes the queue becomes invalid
+			print 'Error benchmarking {0}: {1}'.format(kernel, ex)
+		if args.progress:
+			progress.update(i + 1)
+
+	if args.progress:
+		progress.finish()
+	if recorder:
+		recorder.close()
+
+	return datapoints
+
+if __name__ == '__main__':
+	parser = optparse.OptionParser(description='Benchmark the Wilson Dslash stencil on 4D lattices')
+	parser.add_option('-d', '--device', metavar='SEL', help='The device(s) to use for the measurement: a device index, PLATFORM:DEVICE, a comma separated list of those or all')
+	parser.add_option('-p', '--plot', action='store_true', default=False, help='Make a plot of the measurements')
+	parser.add_option('-o', '--plot-file', metavar='FILE', help='File to store the plot in (Display if unset)')
+	parser.add_option('--lattice', dest='lattices', action='append', metavar='NTxNXxNYxNZ', help='The lattice extents, can be given multiple times (default {0})'.format(', '.join(stencil.LATTICES)))
+	parser.add_option('-L', '--layout', dest='layouts', action='append', metavar='LAYOUT', help='The storage layout of spinors and links, one of {0}, can be given multiple times (default all)'.format(', '.join(stencil.LAYOUTS)))
+	parser.add_option('-r', '--real', dest='reals', action='append', metavar='PREC', help='The floating point precision, one of {0}, can be given multiple times (default all the device supports)'.format(', '.join(stencil.PRECISIONS)))
+	parser.add_option('--preconditioning', dest='preconditionings', action='append', metavar='MODE', help='Apply the stencil to the whole lattice or the even sites only, one of {0}, can be given multiple times (default all)'.format(', '.join(PRECONDITIONINGS)))
+	parser.add_option('-g', '--global-threads', type=int, metavar='NUM', help='Number of threads to use')
+	parser.add_option('-l', '--local-threads', type=int, metavar='NUM', help='Number of threads per work-group')
+	parser.add_option('--progress', action='store_true', default=False, help='Display a progress bar while running kernels')
+	parser.add_option('--export', metavar='FILE', help='Export measurement results to a CSV file, or a binary file if it ends with .npy')
+	parser.add_option('--database', metavar='FILE', help='Record the run and its results in the given SQLite database, see queryResults.py')
+	parser.add_option('--resume', action='store_true', default=False, help='Continue the measurement in the export file, skipping the configurations it already contains')
+	parser.add_option('--import', metavar='FILE', action='append', help='Import data from file instead of benchmarking', dest='imports')
+	parser.add_option('--no-build-cache', action='store_false', dest='build_cache', default=True, help='Always build the kernels from source instead of using cached binaries')
+	parser.add_option('--peak-table', metavar='FILE', help='JSON file mapping device names to their peak bandwidth in GB/s (default {0})'.format(PEAK_FILE))
+	parser.add_option('--precision', type=float, metavar='REL', help='Repeat each measurement until the 95% confidence interval of the time is within +-REL of the mean (default {0})'.format(sampling.PRECISION))
+	parser.add_option('--max-runs', type=int, metavar='N', help='Never repeat a measurement more than N times (default {0})'.format(sampling.MAX_RUNS))
+	parser.add_option('--time-budget', type=float, metavar='SECONDS', help='Stop repeating a measurement once its runs took SECONDS (default {0})'.format(sampling.TIME_BUDGET))
+
+	(args, rem) = parser.parse_args()
+
+	if args.lattices == None:
+		args.lattices = stencil.LATTICES
+	for lattice in args.lattices:
+		try:
+			parse_lattice(lattice)
+		except ValueError as ex:
+			parser.error(str(ex))
+	if args.layouts == None:
+		args.layouts = stencil.LAYOUTS
+	for layout in args.layouts:
+		if layout not in stencil.LAYOUTS:
+			parser.error('Unknown layout {0}'.format(layout))
+	# double precision is skipped on devices not supporting it, see StencilBenchmark.prepare()
+	if args.reals == None:
+		args.reals = stencil.PRECISIONS.keys()
+	for precision in args.reals:
+		if precision not in stencil.PRECISIONS:
+			parser.error('Unknown precision {0}'.format(precision))
+	if args.preconditionings == None:
+		args.preconditionings = PRECONDITIONINGS
+	for preconditioning in args.preconditionings:
+		if preconditioning not in PRECONDITIONINGS:
+			parser.error('Unknown preconditioning {0}'.format(preconditioning))
+
+	runner_args = {}
+	if args.global_threads != None:
+		runner_args['global_threads'] = args.global_threads
+	if args.local_threads != None:
+		runner_args['local_threads'] = args.local_threads
+	if not args.build_cache:
+		runner_args['build_cache'] = False
+	if args.peak_table:
+		runner_args['peak_table'] = args.peak_table
+	sampler_args = {}
+	if args.precision:
+		sampler_args['precision'] = args.precision
+	if args.max_runs:
+		sampler_args['max_runs'] = args.max_runs
+	if args.time_budget:
+		sampler_args['time_budget'] = args.time_budget
+	if sampler_args:
+		runner_args['sampler'] = sampling.AdaptiveSampler(**sampler_args)
+
+	if args.imports == None: # no data file given, run benchmark
+
+		previous = []
+		if args.resume:
+			if args.export == None:
+				parser.error('--resume requires --export')
+			if os.path.exists(args.export):
+				previous = read_datapoints(args.export, StencilDataPoint)
+		done = set((p.device, p.kernel, p.lattice, p.even_odd) for p in previous)
+
+		# datapoints are exported as soon as they are measured, so an abort does not lose them
+		writer = get_writer(args.export, StencilDataPoint, append = args.resume) if args.export != None else None
+		report = writer.write if writer else None
+		try:
+			devices = resolve_devices(args.device) if args.device != None else []
+			if len(devices) > 1:
+				args.progress = False # the progress bars of the workers would garble each other
+				datapoints = run_on_devices(devices, runner_args, run, args, done, report = report)
+			else:
+				if devices:
+					runner_args['device'] = devices[0]
+				datapoints = run(Runner(**runner_args), args, done, report)
+		finally:
+			if writer:
+				writer.close()
+		datapoints = previous + datapoints
+
+	else: # data file(s) given. import
+
+		datapoints = []
+		for file in args.imports:
+			datapoints.extend(read_datapoints(file, StencilDataPoint))
+
+	device_ids = unique(map(lambda p: p.device, datapoints))
+
+	print '#Kernel Lattice EvenOdd Bytes nanos (rel err) GB/s [of peak]'
+	for device in device_ids:
+		if len(device_ids) > 1:
+			print '#Device: {0}'.format(device)
+		for datapoint in filter(lambda p: p.device == device, datapoints):
+			print '{0.kernel} {0.lattice} {0.even_odd} {0.bytes_transferred} {0.time:.0f} ({1:.1%}) {0.bandwidth}{2}'.format(datapoint, datapoint.time_std / datapoint.time, format_efficiency(datapoint))
+
+	if args.plot:
+		import matplotlib.pyplot as plt # by including it here we won't need it unless we want to plot
+
+		series = unique(map(lambda p: (p.device, p.kernel, p.even_odd), datapoints))
+		for device, kernel, even_odd in series:
+			points = sorted(filter(lambda p: (p.device, p.kernel, p.even_odd) == (device, kernel, even_odd), datapoints), key = lambda p: p.mem_size)
+			label = '{0}{1}'.format(kernel, ' EvenOdd' if even_odd else '')
+			if len(device_ids) > 1:
+				label += ' ' + device
+			plt.plot(map(lambda p: p.mem_size, points), map(lambda p: p.bandwidth, points), '.-', label=label)
+
+		plt.title('Dslash Bandwidth')
+		plt.xscale('log')
+		plt.xlabel('Size of the Fields / Bytes')
+		plt.ylabel('Effective GB/s')
+		plt.legend(loc='lower right', prop={'size': 'small'})
+
+		if args.plot_file:
+			plt.savefig(args.plot_file)
+		else:
+			plt.show()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import pyopencl as cl
+import optparse
+import os
+
+from runner import *
+from multidevice import resolve_devices, run_on_devices
+from registry import ACCESS_MODES
+from results import ResultsRecorder
+from localmem import LocalDataPoint, LocalMemoryBenchmark, get_kernel_name
+import localmem
+import sampling
+
+def run(runner, args, done = (), report = None):
+	bench = LocalMemoryBenchmark(runner, args.iterations, args.groups_per_cu)
+	print '#Compute units: {0}'.format(runner.device.max_compute_units)
+	print '#Clock: {0} MHz'.format(runner.device.max_clock_frequency)
+	print '#Local memory: {0} KiB'.format(runner.device.local_mem_size / 1024)
+
+	# configurations already measured by a previous run are skipped
+	jobs = [(get_kernel_name(access, elemtype), local_threads, stride) for elemtype in args.types for access in args.accesses
+	        for local_threads in args.local_threads for stride in args.strides]
+	jobs = [job for job in jobs if (runner.device_id,) + job not in done]
+
+	if args.progress:
+		from progressbar import ProgressBar
+		progress = ProgressBar(maxval=len(jobs)).start()
+
+	datapoints = []
+	# each process records the run on its own device
+	recorder = ResultsRecorder(args.database, runner, 'sweepLocal.py') if args.database else None
+
+	for i, (kernel, local_threads, stride) in enumerate(jobs):
+		try:
+			datapoint = bench.benchmark(kernel, local_threads, stride)
+			datapoints.append(datapoint)
+			if report:
+				report(datapoint)
+			if recorder:
+				recorder.write(datapoint)
+		except ValueError as ex:
+			# configurations exceeding the local memory or the work-group size of the device
+			print '#Skipping {0} with {1} local threads and stride {2}: {3}'.format(kernel, local_threads, stride, ex)
+		except (cl.RuntimeError, cl.LogicError) as ex:
+			# On Apples OpenCL retrieving the profiling information sometimes seems to fail for no good reason
+			# In addition, sometimes the queue becomes invalid
+			print 'Error benchmarking {0}: {1}'.format(kernel, ex)
+		if args.progress:
+			progress.update(i + 1)
+
+	if args.progress:
+		progress.finish()
+	if recorder:
+		recorder.close()
+
+	return datapoints
+
+if __name__ == '__main__':
+	parser = optparse.OptionParser(description='Benchmark local memory bandwidth and bank conflicts')
+	parser.add_option('-d', '--device', metavar='SEL', help='The device(s) to use for the measurement: a device index, PLATFORM:DEVICE, a comma separated list of those or all')
+	parser.add_option('-p', '--plot', action='store_true', default=False, help='Make a plot of the measurements')
+	parser.add_option('-o', '--plot-file', metavar='FILE', help='File to store the plot in (Display if unset)')
+	parser.add_option('-t', '--type', dest='types', action='append', metavar='TYPE', help='The element type to benchmark, one of {0}, can be given multiple times (default all)'.format(', '.join(localmem.TYPES)))
+	parser.add_option('-a', '--access', dest='accesses', action='append', metavar='MODE', help='The access mode to benchmark, one of {0}, can be given multiple times (default all)'.format(', '.join(ACCESS_MODES)))
+	parser.add_option('-s', '--stride', dest='strides', type=int, action='append', metavar='ELEMS', help='Distance between the elements accessed by neighbouring threads, can be given multiple times (default {0})'.format(', '.join(map(str, localmem.STRIDES))))
+	parser.add_option('-l', '--local-threads', type=int, action='append', metavar='NUM', help='The work-group size, can be given multiple times (default {0})'.format(', '.join(map(str, localmem.LOCAL_THREADS))))
+	parser.add_option('--iterations', type=int, default=localmem.ITERATIONS, metavar='N', help='Number of accesses of each thread per kernel run (default {0})'.format(localmem.ITERATIONS))
+	parser.add_option('--groups-per-cu', type=int, default=localmem.GROUPS_PER_CU, metavar='N', help='Number of work-groups launched per compute unit (default {0})'.format(localmem.GROUPS_PER_CU))
+	parser.add_option('--progress', action='store_true', default=False, help='Display a progress bar while running kernels')
+	parser.add_option('--export', metavar='FILE', help='Export measurement results to a CSV file, or a binary file if it ends with .npy')
+	parser.add_option('--database', metavar='FILE', help='Record the run and its results in the given SQLite database, see queryResults.py')
+	parser.add_option('--resume', action='store_true', default=False, help='Continue the measurement in the export file, skipping the configurations it already contains')
+	parser.add_option('--import', metavar='FILE', action='append', help='Import data from file instead of benchmarking', dest='imports')
+	parser.add_option('--no-build-cache', action='store_false', dest='build_cache', default=True, help='Always build the kernels from source instead of using cached binaries')
+	parser.add_option('--precision', type=float, metavar='REL', help='Repeat each measurement until the 95% confidence interval of the time is within +-REL of the mean (default {0})'.format(sampling.PRECISION))
+	parser.add_option('--max-runs', type=int, metavar='N', help='Never repeat a measurement more than N times (default {0})'.format(sampling.MAX_RUNS))
+	parser.add_option('--time-budget', type=float, metavar='SECONDS', help='Stop repeating a measurement once its runs took SECONDS (default {0})'.format(sampling.TIME_BUDGET))
+
+	(args, rem) = parser.parse_args()
+
+	if args.types == None:
+		args.types = localmem.TYPES.keys()
+	for elemtype in args.types:
+		if elemtype not in localmem.TYPES:
+			parser.error('Unknown element type {0}'.format(elemtype))
+	if args.accesses == None:
+		args.accesses = ACCESS_MODES
+	for access in args.accesses:
+		if access not in ACCESS_MODES:
+			parser.error('Unknown access mode {0}'.format(access))
+	if args.strides == None:
+		args.strides = localmem.STRIDES
+	if args.local_threads == None:
+		args.local_threads = localmem.LOCAL_THREADS
+
+	runner_args = {}
+	if not args.build_cache:
+		runner_args['build_cache'] = False
+	sampler_args = {}
+	if args.precision:
+		sampler_args['precision'] = args.precision
+	if args.max_runs:
+		sampler_args['max_runs'] = args.max_runs
+	if args.time_budget:
+		sampler_args['time_budget'] = args.time_budget
+	if sampler_args:
+		runner_args['sampler'] = sampling.AdaptiveSampler(**sampler_args)
+
+	if args.imports == None: # no data file given, run benchmark
+
+		previous = []
+		if args.resume:
+			if args.export == None:
+				parser.error('--resume requires --export')
+			if os.path.exists(args.export):
+				previous = read_datapoints(args.export, LocalDataPoint)
+		done = set((p.device, p.kernel, p.local_threads, p.stride) for p in previous)
+
+		# datapoints are exported as soon as they are measured, so an abort does not lose them
+		writer = get_writer(args.export, LocalDataPoint, append = args.resume) if args.export != None else None
+		report = writer.write if writer else None
+		try:
+			devices = resolve_devices(args.device) if args.device != None else []
+			if len(devices) > 1:
+				args.progress = False # the progress bars of the workers would garble each other
+				datapoints = run_on_devices(devices, runner_args, run, args, done, report = report)
+			else:
+				if devices:
+					runner_args['device'] = devices[0]
+				datapoints = run(Runner(**runner_args), args, done, report)
+		finally:
+			if writer:
+				writer.close()
+		datapoints = previous + datapoints
+
+	else: # data file(s) given. import
+
+		datapoints = []
+		for file in args.imports:
+			datapoints.extend(read_datapoints(file, LocalDataPoint))
+
+	device_ids = unique(map(lambda p: p.device, datapoints))
+
+	print '#Kernel Threads Stride Bytes nanos (rel err) GB/s B/cycle/CU'
+	for device in device_ids:
+		if len(device_ids) > 1:
+			print '#Device: {0}'.format(device)
+		for datapoint in filter(lambda p: p.device == device, datapoints):
+			print '{0.kernel} {0.local_threads} {0.stride} {0.bytes_transferred} {0.time:.0f} ({1:.1%}) {0.bandwidth} {0.bytes_per_cycle:.2f}'.format(datapoint, datapoint.time_std / datapoint.time)
+
+	if args.plot:
+		import matplotlib.pyplot as plt # by including it here we won't need it unless we want to plot
+
+		series = unique(map(lambda p: (p.device, p.kernel, p.local_threads), datapoints))
+		for device, kernel, local_threads in series:
+			points = sorted(filter(lambda p: (p.device, p.kernel, p.local_threads) == (device, kernel, local_threads), datapoints), key = lambda p: p.stride)
+			label = '{0} {1} {2}'.format(kernel, local_threads, device) if len(device_ids) > 1 else '{0} {1}'.format(kernel, local_threads)
+			plt.plot(map(lambda p: p.stride, points), map(lambda p: p.bytes_per_cycle, points), '.-', label=label)
+
+		plt.title('Local Memory Bandwidth')
+		plt.xscale('log')
+		plt.xlabel('Stride / Elements')
+		plt.ylabel('Bytes/Cycle per Compute Unit')
+		plt.legend(loc='upper right', prop={'size': 'small'})
+
+		if args.plot_file:
+			plt.savefig(args.plot_file)
+		else:
+			plt.show()
@@ -19,14 +19,70 @@
 # (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
 
 import pyopencl as cl
+import numpy as np
 import optparse
-import csv
+import os
 
 from runner import *
+from multidevice import resolve_devices, run_on_devices
+from peak import PEAK_FILE, plot_peaks
+from results import ResultsRecorder
+import sampling
+import refinement
+
+MAX_MARKERS = 100000 # plots with more points use single pixels as markers, which are much faster to draw
+
+def get_marker(datapoints):
+	return '.' if len(datapoints) <= MAX_MARKERS else ','
+
+def run(runner, args, done = (), report = None):
+	if args.progress:
+		from progressbar import ProgressBar
+		progress = ProgressBar(maxval=runner.max_mem_size).start()
+
+	datapoints = []
+	# each process records the run on its own device
+	recorder = ResultsRecorder(args.database, runner, 'sweepMemSize.py') if args.database else None
+
+	def measure(sizes):
+		# sizes already measured by a previous run are skipped
+		requests = [BenchmarkRequest(args.kernel, size) for size in sizes if (runner.device_id, args.kernel, size) not in done]
+		for request, datapoint in runner.benchmark_many(requests):
+			if isinstance(datapoint, Exception):
+				# On Apples OpenCL retrieving the profiling information sometimes seems to fail for no good reason
+				# In addition, sometimes the queue becomes invalid
+				print 'Error benchmarking {0}: {1}'.format(args.kernel, datapoint)
+				continue
+			datapoints.append(datapoint)
+			if report:
+				report(datapoint)
+			if recorder:
+				recorder.write(datapoint)
+			if args.progress:
+				progress.update(request.mem_size)
+
+	if args.adaptive:
+		# start from a logarithmic grid and bisect the intervals with large changes until they are resolved
+		sizes = refinement.get_sizes(args.mem_step_size, runner.max_mem_size, args.steps_per_octave, args.mem_step_size)
+		previous = [done[key] for key in done if key[:2] == (runner.device_id, args.kernel)]
+		attempted = set()
+		while sizes:
+			attempted.update(sizes)
+			measure(sizes)
+			sizes = [size for size in refinement.get_refinements(previous + datapoints, args.tolerance, args.mem_step_size) if size not in attempted]
+	else:
+		measure(range(args.mem_step_size, runner.max_mem_size, args.mem_step_size))
+
+	if args.progress:
+		progress.finish()
+	if recorder:
+		recorder.close()
+
+	return datapoints
 
 if __name__ == '__main__':
 	parser = optparse.OptionParser(description='Benchmark global memory bandwidth')
-	parser.add_option('-d', '--device', type=int, metavar='I', help='The device to use for the measurement')
+	parser.add_option('-d', '--device', metavar='SEL', help='The device(s) to use for the measurement: a device index, PLATFORM:DEVICE, a comma separated list of those or all')
 	parser.add_option('-p', '--plot', action='store_true', default=False, help='Make a plot of the measurements')
 	parser.add_option('-e', '--plot-errorbars', action='store_true', default=False, help='Add error bars to the plot')
 	parser.add_option('-b', '--plot-marker', type=float, dest='plot_markers', action='append', metavar='GB/s', help='Add a marker to the plot at the given performance')
@@ -34,85 +90,121 @@ if __name__ == '__main__':
 	parser.add_option('-g', '--global-threads', type=int, metavar='NUM', help='The number of global threads to use')
 	parser.add_option('-l', '--local-threads', type=int, metavar='NUM', help='The number of global threads to use')
 	parser.add_option('-m', '--mem-max-size', type=int, metavar='BYTE', help='Maximum memory size in bytes')
-	parser.add_option('-s', '--mem-step-size', type=int, default=192, metavar='BYTE', help='Memory step size in bytes')
+	parser.add_option('-s', '--mem-step-size', type=int, default=192, metavar='BYTE', help='Memory step size in bytes, with --adaptive the granularity of the sizes')
+	parser.add_option('--adaptive', action='store_true', default=False, help='Start from a logarithmic grid of sizes and refine it where the bandwidth changes, instead of measuring every step')
+	parser.add_option('--steps-per-octave', type=int, default=refinement.STEPS_PER_OCTAVE, metavar='N', help='Number of memory sizes per doubling of the size in the initial grid of --adaptive (default {0})'.format(refinement.STEPS_PER_OCTAVE))
+	parser.add_option('--tolerance', type=float, default=refinement.TOLERANCE, metavar='REL', help='Refine intervals of --adaptive whose bandwidth changes or varies by more than REL (default {0})'.format(refinement.TOLERANCE))
 	parser.add_option('-k', '--kernel', metavar='KERNEL', default='copyDpSpinorFullSOARestricted', help='The kernel to benchmark')
 	parser.add_option('--progress', action='store_true', default=False, help='Display a progress bar while running kernels')
-	parser.add_option('--export', metavar='FILE', help='Export measurement results to a CSV file')
+	parser.add_option('--export', metavar='FILE', help='Export measurement results to a CSV file, or a binary file if it ends with .npy')
+	parser.add_option('--database', metavar='FILE', help='Record the run and its results in the given SQLite database, see queryResults.py')
+	parser.add_option('--resume', action='store_true', default=False, help='Continue the measurement in the export file, skipping the memory sizes it already contains')
 	parser.add_option('--import', metavar='FILE', action='append', help='Import data from file instead of benchmarking', dest='imports')
+	parser.add_option('--no-build-cache', action='store_false', dest='build_cache', default=True, help='Always build the kernels from source instead of using cached binaries')
+	parser.add_option('--autotune', action='store_true', default=False, help='Search the fastest global and local thread numbers for each kernel and memory size not yet in the tuning cache')
+	parser.add_option('--no-tuning-cache', action='store_false', dest='tuning_cache', default=True, help='Neither use nor store tuned thread numbers across runs')
+	parser.add_option('--precision', type=float, metavar='REL', help='Repeat each measurement until the 95% confidence interval of the time is within +-REL of the mean (default {0})'.format(sampling.PRECISION))
+	parser.add_option('--max-runs', type=int, metavar='N', help='Never repeat a measurement more than N times (default {0})'.format(sampling.MAX_RUNS))
+	parser.add_option('--time-budget', type=float, metavar='SECONDS', help='Stop repeating a measurement once its runs took SECONDS (default {0})'.format(sampling.TIME_BUDGET))
+	parser.add_option('--peak-table', metavar='FILE', help='JSON file mapping device names to their peak bandwidth in GB/s (default {0})'.format(PEAK_FILE))
 
 	(args, rem) = parser.parse_args()
 
 	runner_args = {}
-	if args.device != None:
-		runner_args['device'] = args.device
 	if args.global_threads != None:
 		runner_args['global_threads'] = args.global_threads
 	if args.local_threads != None:
 		runner_args['local_threads'] = args.local_threads
 	if args.mem_max_size != None:
 		runner_args['max_mem_size'] = args.mem_max_size
+	if not args.build_cache:
+		runner_args['build_cache'] = False
+	if args.autotune:
+		runner_args['autotune'] = True
+	if not args.tuning_cache:
+		runner_args['tuning_cache'] = False
+	if args.peak_table:
+		runner_args['peak_table'] = args.peak_table
+	sampler_args = {}
+	if args.precision:
+		sampler_args['precision'] = args.precision
+	if args.max_runs:
+		sampler_args['max_runs'] = args.max_runs
+	if args.time_budget:
+		sampler_args['time_budget'] = args.time_budget
+	if sampler_args:
+		runner_args['sampler'] = sampling.AdaptiveSampler(**sampler_args)
 
 	if args.imports == None: # no data file given, run benchmark
 
-		runner = Runner(**runner_args)
-
-		if args.progress:
-			from progressbar import ProgressBar
-			progress = ProgressBar(maxval=runner.max_mem_size).start()
-
-		datapoints = []
-
-		for size in range(args.mem_step_size, runner.max_mem_size, args.mem_step_size):
-			try:
-				datapoints.append(runner.benchmark(args.kernel, mem_size = size))
-				if args.progress:
-					progress.update(size)
-			except (cl.RuntimeError, cl.LogicError) as ex:
-				# On Apples OpenCL retrieving the profiling information sometimes seems to fail for no good reason
-				# In addition, sometimes the queue becomes invalid
-				print 'Error benchmarking {0}: {1}'.format(kernel, ex)
-
-		if args.progress:
-			progress.finish()
-
-		print '#Kernel Bytes nanos (rel err) GB/s'
-		for datapoint in datapoints:
-			print '{0.kernel} {0.bytes_transferred} {0.time:.0f} ({1:.1%}) {0.bandwidth}'.format(datapoint, datapoint.time_std / datapoint.time)
-
-		if args.export != None:
-			writer = csv.writer(open(args.export, 'wb'), quoting=csv.QUOTE_MINIMAL)
-			writer.writerow(datapoints[0]._fields)
-			writer.writerows(datapoints)
-
-		to_plot = [datapoints]
+		previous = []
+		if args.resume:
+			if args.export == None:
+				parser.error('--resume requires --export')
+			if os.path.exists(args.export):
+				previous = read_datapoints(args.export)
+		done = dict(((p.device, p.kernel, p.mem_size), p) for p in previous)
+
+		# datapoints are exported as soon as they are measured, so an abort does not lose them
+		writer = get_writer(args.export, append = args.resume) if args.export != None else None
+		report = writer.write if writer else None
+		try:
+			devices = resolve_devices(args.device) if args.device != None else []
+			if len(devices) > 1:
+				args.progress = False # the progress bars of the workers would garble each other
+				datapoints = run_on_devices(devices, runner_args, run, args, done, report = report)
+			else:
+				if devices:
+					runner_args['device'] = devices[0]
+				datapoints = run(Runner(**runner_args), args, done, report)
+		finally:
+			if writer:
+				writer.close()
+		datapoints = previous + datapoints
+
+		device_ids = unique(map(lambda p: p.device, datapoints))
+
+		print '#Kernel Bytes nanos (rel err) GB/s [of peak]'
+		for device in device_ids:
+			if len(device_ids) > 1:
+				print '#Device: {0}'.format(device)
+			for datapoint in filter(lambda p: p.device == device, datapoints):
+				print '{0.kernel} {0.bytes_transferred} {0.time:.0f} ({1:.1%}) {0.bandwidth}{2}'.format(datapoint, datapoint.time_std / datapoint.time, format_efficiency(datapoint))
+
+		to_plot = map(lambda device: to_datapoint_array(filter(lambda p: p.device == device, datapoints), get_dtype()), device_ids)
+		labels = device_ids
 
 	else: # data file(s) given. import
 
 		to_plot = []
+		labels = []
 		for file in args.imports:
-			reader = csv.reader(open(file, 'rb'))
-			reader.next() # skip headers
-			to_plot.append(map(DataPoint._make, reader))
+			# files of sweepTransfer.py hold multiple transfers, plot each on its own
+			imported = read_datapoint_array(file)
+			kernels, first = np.unique(imported['kernel'], return_index=True)
+			for kernel in kernels[np.argsort(first)]:
+				to_plot.append(imported[imported['kernel'] == kernel])
+				labels.append('{0} {1}'.format(file, kernel) if len(kernels) > 1 else file)
 
 	if args.plot:
 		import matplotlib.pyplot as plt # by including it here we won't need it unless we want to plot
 
 		plots = []
 		for datapoints in to_plot:
-			bandwidths = map(lambda p: p.bandwidth, datapoints)
-			sizes = map(lambda p: p.bytes_transferred, datapoints)
+			bandwidths = datapoints['bandwidth']
+			sizes = datapoints['bytes_transferred']
 			if args.plot_errorbars:
-				errs = map(lambda p: p.time_std / p.time * p.bandwidth, datapoints)
+				errs = datapoints['time_std'] / datapoints['time'] * bandwidths
 
 			if args.plot_errorbars:
-				plots.append(plt.errorbar(sizes, bandwidths, yerr=errs, fmt='.', ecolor='black'))
+				plots.append(plt.errorbar(sizes, bandwidths, yerr=errs, fmt=get_marker(datapoints), ecolor='black'))
 			else:
-				plots.append(plt.plot(sizes, bandwidths, '.'))
+				plots.append(plt.plot(sizes, bandwidths, get_marker(datapoints)))
 
 		if args.imports == None:
 			plt.title('Global Memory Bandwidth of {0}'.format(args.kernel))
-		else:
-			plt.legend(plots, args.imports, loc='lower right')
+		if len(to_plot) > 1:
+			plt.legend(plots, labels, loc='lower right')
 		plt.xlabel('Transferred Bytes')
 		plt.ylabel('GB/s')
 
@@ -121,6 +213,8 @@ if __name__ == '__main__':
 			for marker in args.plot_markers:
 				plt.axhline(y=marker, color='r')
 
+		plot_peaks(plt, [peak for datapoints in to_plot for peak in get_peaks(datapoints)])
+
 		if args.plot_file:
 			plt.savefig(args.plot_file)
 		else:
@@ -20,16 +20,102 @@
 
 import pyopencl as cl
 import optparse
-import csv
+import os
 from collections import namedtuple
 
 from runner import *
+from multidevice import resolve_devices, run_on_devices
+from peak import PEAK_FILE, plot_peaks
+from results import ResultsRecorder
+import sampling
+import refinement
+
+MAX_MARKERS = 100000 # plots with more points use single pixels as markers, which are much faster to draw
+
+def get_marker(datapoints):
+	return '.' if len(datapoints) <= MAX_MARKERS else ','
 
 StrideDataPoint = namedtuple('StrideDataPoint', DataPoint._fields + ('stride',))
 
+def run(runner, args, done = (), report = None):
+	datapoints = []
+	# each process records the run on its own device
+	recorder = ResultsRecorder(args.database, runner, 'sweepStride.py') if args.database else None
+
+	# The minimum possible stride is elems * struct-elems-size
+	# For strides larger than 2 * elems * struct-elems-size no new effects should occur (assuming large values for elems...)
+	# The maximum memory required will therefore be 2 * elems * struct-elems * struct-elems-size
+
+	if args.progress:
+		from progressbar import ProgressBar
+		progress = ProgressBar().start()
+
+	if args.sweep_sizes:
+		sizes = range(args.struct_elems * args.struct_elems_size, runner.max_mem_size, args.struct_elems * args.struct_elems_size)
+	else:
+		sizes = [runner.max_mem_size]
+
+	grid = [] # (transfer size, minimum stride, number of strides) for each size, see refinement.get_lattice()
+	for size in sizes:
+
+		elems = size / 2 / args.struct_elems / args.struct_elems_size
+		min_stride = elems * args.struct_elems_size
+		transfer_size = min_stride * args.struct_elems
+
+		if elems and (not grid or grid[-1][0] != transfer_size):
+			grid.append((transfer_size, min_stride, elems))
+
+	planned = [0]
+	def measure(points):
+		planned[0] += len(points)
+		# points already measured by a previous run are skipped
+		requests = [BenchmarkRequest(args.kernel, size, stride = stride / args.struct_elems_size) for size, stride in points
+		            if (runner.device_id, args.kernel, size, stride) not in done]
+		for request, datapoint in runner.benchmark_many(requests):
+			if isinstance(datapoint, Exception):
+				# On Apples OpenCL retrieving the profiling information sometimes seems to fail for no good reason
+				# In addition, sometimes the queue becomes invalid
+				print 'Error benchmarking {0}: {1}'.format(args.kernel, datapoint)
+				continue
+			datapoint = StrideDataPoint(*datapoint, stride = request.stride * args.struct_elems_size)
+			datapoints.append(datapoint)
+			if report:
+				report(datapoint)
+			if recorder:
+				recorder.write(datapoint)
+			if args.progress:
+				progress.update(min(float(len(datapoints)) / (args.budget if args.budget else planned[0]) * 100, 100))
+
+	if args.budget:
+		# half of the budget goes to a coarse lattice, the rest to the resonances found on it
+		step = refinement.get_lattice_step(sum(map(lambda row: row[2], grid)), args.budget / 2)
+		# the odd step can leave more lattice points than planned, so they are capped at half the budget
+		lattice = refinement.thin_out(refinement.get_lattice(grid, args.struct_elems_size, step), args.budget / 2)
+		measure(lattice)
+		previous = [done[key] for key in done if key[:2] == (runner.device_id, args.kernel)]
+		resonances = refinement.find_resonances(previous + datapoints, args.struct_elems_size, args.tolerance)
+		if resonances:
+			print '#Resonances: stride / {0} % {1[0]} in {1[1]}'.format(args.struct_elems_size, resonances)
+			candidates = refinement.get_resonance_points(grid, args.struct_elems_size, resonances, max(0, args.budget - len(lattice)))
+		else:
+			# no structure found, fill in the gaps of the lattice
+			candidates = refinement.get_lattice(grid, args.struct_elems_size, max(step / 2, 1), step / 2)
+		lattice = set(lattice)
+		candidates = [point for point in candidates if point not in lattice]
+		measure(refinement.thin_out(candidates, max(0, args.budget - len(lattice))))
+	else:
+		measure(refinement.get_lattice(grid, args.struct_elems_size, 1))
+
+	if args.progress:
+		progress.finish()
+	if recorder:
+		recorder.close()
+
+	return datapoints
+
 if __name__ == '__main__':
 	parser = optparse.OptionParser(description='Benchmark global memory bandwidth for different memory strides. Be aware, that strides only apply to SOA kernels. If you adjust the kernel you will also have to adjust the struct-elems and struct-elem-size parameters.')
-	parser.add_option('-d', '--device', type=int, metavar='I', help='The device to use for the measurement')
+	parser.add_option('-d', '--device', metavar='SEL', help='The device(s) to use for the measurement: a device index, PLATFORM:DEVICE, a comma separated list of those or all')
 	parser.add_option('-p', '--plot', action='store_true', default=False, help='Make a plot of the measurements')
 	parser.add_option('-e', '--plot-errorbars', action='store_true', default=False, help='Add error bars to the plot')
 	parser.add_option('-b', '--plot-marker', type=float, dest='plot_markers', action='append', metavar='GB/s', help='Add a marker to the plot at the given performance')
@@ -41,96 +127,105 @@ if __name__ == '__main__':
 	parser.add_option('--struct-elems', metavar='N', type=int, default=12, help='The number of elements in one struct')
 	parser.add_option('--struct-elems-size', metavar='BYTES', type=int, default=16, help='The size of one element of the struct')
 	parser.add_option('--progress', action='store_true', default=False, help='Display a progress bar while running kernels')
-	parser.add_option('--export', metavar='FILE', help='Export measurement results to a CSV file')
+	parser.add_option('--export', metavar='FILE', help='Export measurement results to a CSV file, or a binary file if it ends with .npy')
+	parser.add_option('--database', metavar='FILE', help='Record the run and its results in the given SQLite database, see queryResults.py')
+	parser.add_option('--resume', action='store_true', default=False, help='Continue the measurement in the export file, skipping the sizes and strides it already contains')
 	parser.add_option('--import', metavar='FILE', action='append', help='Import data from file instead of benchmarking', dest='imports')
 	parser.add_option('--sweep-sizes', action='store_true', default=False, help='Also sweep sizes, generates a pseudo-color plot when plotting')
+	parser.add_option('--budget', type=int, metavar='N', help='Measure at most N points of the grid: a coarse lattice first, then the strides resonating on it')
+	parser.add_option('--tolerance', type=float, default=refinement.TOLERANCE, metavar='REL', help='Strides whose bandwidth deviates by more than REL count as resonances with --budget (default {0})'.format(refinement.TOLERANCE))
 	parser.add_option('--plot-norm-x', metavar='N', default=1, help='Normalize x axis of plot by N')
+	parser.add_option('--no-build-cache', action='store_false', dest='build_cache', default=True, help='Always build the kernels from source instead of using cached binaries')
+	parser.add_option('--autotune', action='store_true', default=False, help='Search the fastest global and local thread numbers for each kernel and memory size not yet in the tuning cache')
+	parser.add_option('--no-tuning-cache', action='store_false', dest='tuning_cache', default=True, help='Neither use nor store tuned thread numbers across runs')
+	parser.add_option('--precision', type=float, metavar='REL', help='Repeat each measurement until the 95% confidence interval of the time is within +-REL of the mean (default {0})'.format(sampling.PRECISION))
+	parser.add_option('--max-runs', type=int, metavar='N', help='Never repeat a measurement more than N times (default {0})'.format(sampling.MAX_RUNS))
+	parser.add_option('--time-budget', type=float, metavar='SECONDS', help='Stop repeating a measurement once its runs took SECONDS (default {0})'.format(sampling.TIME_BUDGET))
+	parser.add_option('--peak-table', metavar='FILE', help='JSON file mapping device names to their peak bandwidth in GB/s (default {0})'.format(PEAK_FILE))
 
 	(args, rem) = parser.parse_args()
 
 	runner_args = {}
-	if args.device != None:
-		runner_args['device'] = args.device
 	if args.global_threads != None:
 		runner_args['global_threads'] = args.global_threads
 	if args.local_threads != None:
 		runner_args['local_threads'] = args.local_threads
 	if args.mem_size != None:
 		runner_args['max_mem_size'] = args.mem_size
+	if not args.build_cache:
+		runner_args['build_cache'] = False
+	if args.autotune:
+		runner_args['autotune'] = True
+	if not args.tuning_cache:
+		runner_args['tuning_cache'] = False
+	if args.peak_table:
+		runner_args['peak_table'] = args.peak_table
+	sampler_args = {}
+	if args.precision:
+		sampler_args['precision'] = args.precision
+	if args.max_runs:
+		sampler_args['max_runs'] = args.max_runs
+	if args.time_budget:
+		sampler_args['time_budget'] = args.time_budget
+	if sampler_args:
+		runner_args['sampler'] = sampling.AdaptiveSampler(**sampler_args)
 
 	if args.imports == None: # no data file given, run benchmark
 
-		runner = Runner(**runner_args)
+		previous = []
+		if args.resume:
+			if args.export == None:
+				parser.error('--resume requires --export')
+			if os.path.exists(args.export):
+				previous = read_datapoints(args.export, StrideDataPoint)
+		done = dict(((p.device, p.kernel, p.mem_size, p.stride), p) for p in previous)
 
-		datapoints = []
+		# datapoints are exported as soon as they are measured, so an abort does not lose them
+		writer = get_writer(args.export, StrideDataPoint, append = args.resume) if args.export != None else None
+		report = writer.write if writer else None
+		try:
+			devices = resolve_devices(args.device) if args.device != None else []
+			if len(devices) > 1:
+				args.progress = False # the progress bars of the workers would garble each other
+				datapoints = run_on_devices(devices, runner_args, run, args, done, report = report)
+			else:
+				if devices:
+					runner_args['device'] = devices[0]
+				datapoints = run(Runner(**runner_args), args, done, report)
+		finally:
+			if writer:
+				writer.close()
+		datapoints = previous + datapoints
 
-		# The minimum possible stride is elems * struct-elems-size
-		# For strides larger than 2 * elems * struct-elems-size no new effects should occur (assuming large values for elems...)
-		# The maximum memory required will therefore be 2 * elems * struct-elems * struct-elems-size
+		device_ids = unique(map(lambda p: p.device, datapoints))
 
-		if args.progress:
-			from progressbar import ProgressBar
-			progress = ProgressBar().start()
+		print '#Kernel Bytes nanos (rel err) GB/s [of peak]'
+		for device in device_ids:
+			if len(device_ids) > 1:
+				print '#Device: {0}'.format(device)
+			for datapoint in filter(lambda p: p.device == device, datapoints):
+				print '{0.kernel} {0.stride} {0.time:.0f} ({1:.1%}) {0.bandwidth}{2}'.format(datapoint, datapoint.time_std / datapoint.time, format_efficiency(datapoint))
 
-		if args.sweep_sizes:
-			sizes = range(args.struct_elems * args.struct_elems_size, runner.max_mem_size, args.struct_elems * args.struct_elems_size)
-		else:
-			sizes = [runner.max_mem_size]
-
-		for size in sizes:
-
-			elems = size / 2 / args.struct_elems / args.struct_elems_size
-			min_stride = elems * args.struct_elems_size
-			max_stride = 2 * min_stride
-			transfer_size = min_stride * args.struct_elems
-
-			for stride in range(min_stride, max_stride, args.struct_elems_size):
-				try:
-					datapoint = runner.benchmark(args.kernel, mem_size = transfer_size, stride = stride / args.struct_elems_size)
-					datapoints.append(StrideDataPoint(*datapoint, stride = stride))
-					if args.progress:
-						if len(sizes) > 1:
-							progress.update(float(size) / runner.max_mem_size * 100)
-						else:
-							progress.update((stride - min_stride) / float(max_stride - min_stride) * 100)
-				except (cl.RuntimeError, cl.LogicError) as ex:
-					# On Apples OpenCL retrieving the profiling information sometimes seems to fail for no good reason
-					# In addition, sometimes the queue becomes invalid
-					print 'Error benchmarking {0}: {1}'.format(kernel, ex)
-
-		if args.progress:
-			progress.finish()
-
-		print '#Kernel Bytes nanos (rel err) GB/s'
-		for datapoint in datapoints:
-			print '{0.kernel} {0.stride} {0.time:.0f} ({1:.1%}) {0.bandwidth}'.format(datapoint, datapoint.time_std / datapoint.time)
-
-		if args.export != None:
-			writer = csv.writer(open(args.export, 'wb'), quoting=csv.QUOTE_MINIMAL)
-			writer.writerow(datapoints[0]._fields)
-			writer.writerows(datapoints)
-
-		to_plot = [datapoints]
-		labels = ['']
+		to_plot = map(lambda device: to_datapoint_array(filter(lambda p: p.device == device, datapoints), get_dtype(StrideDataPoint)), device_ids)
+		labels = device_ids
 
 	else: # data file(s) given. import
 
 		to_plot = []
 		for file in args.imports:
-			reader = csv.reader(open(file, 'rb'))
-			reader.next() # skip headers
-			to_plot.append(map(StrideDataPoint._make, reader))
+			to_plot.append(read_datapoint_array(file, StrideDataPoint))
 		labels = args.imports
 
 	#reformat data
-	even = []
-	odd = []
-	datapoints = to_plot[0]
-
-	to_plot = [[], [], [], []]
-	labels = ['(N/16)%4+0', '(N/16)%4+1', '(N/16)%4+2', '(N/16)%4+3']
-	for datapoint in datapoints:
-		to_plot[(int(datapoint.stride) / 16 ) % 4].append(datapoint)
+	groups = []
+	group_labels = []
+	for datapoints, label in zip(to_plot, labels):
+		prefix = label + ' ' if len(to_plot) > 1 else ''
+		group_labels.extend(map(lambda i: '{0}(N/16)%4+{1}'.format(prefix, i), range(4)))
+		group = (datapoints['stride'] / 16) % 4
+		groups.extend(map(lambda i: datapoints[group == i], range(4)))
+	to_plot = groups
+	labels = group_labels
 
 	if args.plot:
 		import matplotlib.pyplot as plt # by including it here we won't need it unless we want to plot
@@ -141,15 +236,15 @@ if __name__ == '__main__':
 		plots = []
 		idx = 0
 		for datapoints in to_plot:
-			bandwidths = map(lambda p: float(p.bandwidth), datapoints)
-			strides = map(lambda p: int(p.stride) / float(args.plot_norm_x), datapoints)
+			bandwidths = datapoints['bandwidth']
+			strides = datapoints['stride'] / float(args.plot_norm_x)
 			if args.plot_errorbars:
-				errs = map(lambda p: float(p.time_std) / float(p.time) * float(p.bandwidth), datapoints)
+				errs = datapoints['time_std'] / datapoints['time'] * bandwidths
 
 			if args.plot_errorbars:
-				plots.append(plt.errorbar(strides, bandwidths, yerr=errs, fmt='.', ecolor='black', label=labels[idx]))
+				plots.append(plt.errorbar(strides, bandwidths, yerr=errs, fmt=get_marker(datapoints), ecolor='black', label=labels[idx]))
 			else:
-				plots.append(plt.plot(strides, bandwidths, '.', label=labels[idx]))
+				plots.append(plt.plot(strides, bandwidths, get_marker(datapoints), label=labels[idx]))
 			idx += 1
 
 		if args.imports == None:
@@ -168,6 +263,8 @@ if __name__ == '__main__':
 			for marker in args.plot_markers:
 				plt.axhline(y=marker, color='r')
 
+		plot_peaks(plt, [peak for datapoints in to_plot for peak in get_peaks(datapoints)])
+
 		if args.plot_file:
 			plt.savefig(args.plot_file)
 		else:
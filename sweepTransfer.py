@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import pyopencl as cl
+import optparse
+import os
+
+from runner import *
+from multidevice import resolve_devices, run_on_devices
+from peak import PEAK_FILE, plot_peaks
+from results import ResultsRecorder
+from transfers import TRANSFERS, TransferBenchmark
+import sampling
+from refinement import get_sizes
+
+def run(runner, args, done = (), report = None):
+	bench = TransferBenchmark(runner)
+	sizes = get_sizes(args.mem_min_size, bench.max_size, args.steps_per_octave)
+	# transfers already measured by a previous run are skipped
+	jobs = [(transfer, size) for transfer in args.transfers for size in sizes if (runner.device_id, transfer, size) not in done]
+
+	if args.progress:
+		from progressbar import ProgressBar
+		progress = ProgressBar(maxval=len(jobs)).start()
+
+	datapoints = []
+	# each process records the run on its own device
+	recorder = ResultsRecorder(args.database, runner, 'sweepTransfer.py') if args.database else None
+
+	for i, (transfer, size) in enumerate(jobs):
+		try:
+			datapoint = bench.benchmark(transfer, size)
+			datapoints.append(datapoint)
+			if report:
+				report(datapoint)
+			if recorder:
+				recorder.write(datapoint)
+			if args.progress:
+				progress.update(i + 1)
+		except (cl.RuntimeError, cl.LogicError) as ex:
+			# On Apples OpenCL retrieving the profiling information sometimes seems to fail for no good reason
+			# In addition, sometimes the queue becomes invalid
+			print 'Error benchmarking {0}: {1}'.format(transfer, ex)
+
+	if args.progress:
+		progress.finish()
+	if recorder:
+		recorder.close()
+
+	return datapoints
+
+if __name__ == '__main__':
+	parser = optparse.OptionParser(description='Benchmark the bandwidth of transfers between host and device memory')
+	parser.add_option('-d', '--device', metavar='SEL', help='The device(s) to use for the measurement: a device index, PLATFORM:DEVICE, a comma separated list of those or all')
+	parser.add_option('-p', '--plot', action='store_true', default=False, help='Make a plot of the measurements')
+	parser.add_option('-e', '--plot-errorbars', action='store_true', default=False, help='Add error bars to the plot')
+	parser.add_option('-b', '--plot-marker', type=float, dest='plot_markers', action='append', metavar='GB/s', help='Add a marker to the plot at the given performance')
+	parser.add_option('-o', '--plot-file', metavar='FILE', help='File to store the plot in (Display if unset)')
+	parser.add_option('-m', '--mem-max-size', type=int, metavar='BYTE', help='Maximum memory size in bytes')
+	parser.add_option('--mem-min-size', type=int, default=4096, metavar='BYTE', help='Minimum memory size in bytes')
+	parser.add_option('-s', '--steps-per-octave', type=int, default=4, metavar='N', help='Number of memory sizes per doubling of the size')
+	parser.add_option('-t', '--transfer', dest='transfers', action='append', metavar='TRANSFER', help='The transfer to benchmark, can be given multiple times (default all)')
+	parser.add_option('--list', action='store_true', default=False, help='List the available transfers')
+	parser.add_option('--progress', action='store_true', default=False, help='Display a progress bar while running transfers')
+	parser.add_option('--export', metavar='FILE', help='Export measurement results to a CSV file, or a binary file if it ends with .npy')
+	parser.add_option('--database', metavar='FILE', help='Record the run and its results in the given SQLite database, see queryResults.py')
+	parser.add_option('--resume', action='store_true', default=False, help='Continue the measurement in the export file, skipping the transfers it already contains')
+	parser.add_option('--import', metavar='FILE', action='append', help='Import data from file instead of benchmarking', dest='imports')
+	parser.add_option('--precision', type=float, metavar='REL', help='Repeat each measurement until the 95% confidence interval of the time is within +-REL of the mean (default {0})'.format(sampling.PRECISION))
+	parser.add_option('--max-runs', type=int, metavar='N', help='Never repeat a measurement more than N times (default {0})'.format(sampling.MAX_RUNS))
+	parser.add_option('--time-budget', type=float, metavar='SECONDS', help='Stop repeating a measurement once its runs took SECONDS (default {0})'.format(sampling.TIME_BUDGET))
+	parser.add_option('--peak-table', metavar='FILE', help='JSON file mapping device names to their peak bandwidth in GB/s (default {0})'.format(PEAK_FILE))
+
+	(args, rem) = parser.parse_args()
+
+	if args.list:
+		for transfer in TRANSFERS:
+			print transfer
+		raise SystemExit
+
+	if args.transfers == None:
+		args.transfers = TRANSFERS.keys()
+	for transfer in args.transfers:
+		if transfer not in TRANSFERS:
+			parser.error('Unknown transfer {0}'.format(transfer))
+
+	runner_args = {}
+	if args.mem_max_size != None:
+		runner_args['max_mem_size'] = args.mem_max_size
+	if args.peak_table:
+		runner_args['peak_table'] = args.peak_table
+	sampler_args = {}
+	if args.precision:
+		sampler_args['precision'] = args.precision
+	if args.max_runs:
+		sampler_args['max_runs'] = args.max_runs
+	if args.time_budget:
+		sampler_args['time_budget'] = args.time_budget
+	if sampler_args:
+		runner_args['sampler'] = sampling.AdaptiveSampler(**sampler_args)
+
+	if args.imports == None: # no data file given, run benchmark
+
+		previous = []
+		if args.resume:
+			if args.export == None:
+				parser.error('--resume requires --export')
+			if os.path.exists(args.export):
+				previous = read_datapoints(args.export)
+		done = set((p.device, p.kernel, p.mem_size) for p in previous)
+
+		# datapoints are exported as soon as they are measured, so an abort does not lose them
+		writer = get_writer(args.export, append = args.resume) if args.export != None else None
+		report = writer.write if writer else None
+		try:
+			devices = resolve_devices(args.device) if args.device != None else []
+			if len(devices) > 1:
+				args.progress = False # the progress bars of the workers would garble each other
+				datapoints = run_on_devices(devices, runner_args, run, args, done, report = report)
+			else:
+				if devices:
+					runner_args['device'] = devices[0]
+				datapoints = run(Runner(**runner_args), args, done, report)
+		finally:
+			if writer:
+				writer.close()
+		datapoints = previous + datapoints
+
+		device_ids = unique(map(lambda p: p.device, datapoints))
+
+		print '#Transfer Bytes nanos (rel err) GB/s [of peak]'
+		for device in device_ids:
+			if len(device_ids) > 1:
+				print '#Device: {0}'.format(device)
+			for datapoint in filter(lambda p: p.device == device, datapoints):
+				print '{0.kernel} {0.bytes_transferred} {0.time:.0f} ({1:.1%}) {0.bandwidth}{2}'.format(datapoint, datapoint.time_std / datapoint.time, format_efficiency(datapoint))
+
+	else: # data file(s) given. import
+
+		datapoints = []
+		for file in args.imports:
+			datapoints.extend(read_datapoints(file))
+		device_ids = unique(map(lambda p: p.device, datapoints))
+
+	if args.plot:
+		import matplotlib.pyplot as plt # by including it here we won't need it unless we want to plot
+
+		for device in device_ids:
+			for transfer in unique(map(lambda p: p.kernel, datapoints)):
+				points = filter(lambda p: p.device == device and p.kernel == transfer, datapoints)
+				if not points:
+					continue
+				label = '{0} {1}'.format(device, transfer) if len(device_ids) > 1 else transfer
+				sizes = map(lambda p: p.mem_size, points)
+				bandwidths = map(lambda p: p.bandwidth, points)
+				if args.plot_errorbars:
+					errs = map(lambda p: p.time_std / p.time * p.bandwidth, points)
+					plt.errorbar(sizes, bandwidths, yerr=errs, fmt='.-', ecolor='black', label=label)
+				else:
+					plt.plot(sizes, bandwidths, '.-', label=label)
+
+		plt.title('Transfer Bandwidth')
+		plt.xscale('log')
+		plt.xlabel('Transfer Size / Bytes')
+		plt.ylabel('GB/s')
+		plt.legend(loc='lower right')
+
+		# handle markers
+		if args.plot_markers:
+			for marker in args.plot_markers:
+				plt.axhline(y=marker, color='r')
+
+		plot_peaks(plt, map(get_peak, datapoints))
+
+		if args.plot_file:
+			plt.savefig(args.plot_file)
+		else:
+			plt.show()
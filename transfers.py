@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# coding=utf8
+
+# This file is part of clBandwidth.
+#
+# clBandwidth is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# clBandwidth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with clBandwidth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# (c) 2011 Matthias Bach <bach@compeng.uni-frankfurt.de>
+
+import pyopencl as cl
+import numpy as np
+from collections import OrderedDict
+
+from runner import Launch
+
+# transfer name -> (direction, kind of host memory)
+TRANSFERS = OrderedDict()
+for direction in ('H2D', 'D2H'):
+	for host in ('Pageable', 'Pinned', 'Mapped', 'HostPtr'):
+		TRANSFERS['transfer{0}{1}'.format(direction, host)] = (direction, host)
+TRANSFERS['transferD2D'] = ('D2D', None)
+
+def get_transfer_info(name):
+	try:
+		return TRANSFERS[name]
+	except KeyError:
+		raise NameError("Don't know how to run {0}".format(name))
+
+class TransferBenchmark:
+	"""
+	Measures transfers between host and device memory, using the buffers of the given runner.
+
+	Pageable transfers copy from and to a plain numpy array, Pinned ones from and to the mapped host
+	memory of an ALLOC_HOST_PTR buffer. Mapped transfers map the device buffer and copy on the host,
+	HostPtr transfers copy between the device buffer and a USE_HOST_PTR buffer wrapping a numpy array.
+	The device to device transfer copies between the input and the output buffer of the runner.
+	"""
+
+	def __init__(self, runner):
+		self.runner = runner
+		self.max_size = min(runner.in_buf.tiles[0].size, runner.out_buf.tiles[0].size)
+		self.host_memory = {} # allocated on first use, see get_host_memory()
+
+	def get_host_memory(self, host):
+		"""
+		Returns the host memory for the given kind of transfer, a numpy array or a cl.Buffer for HostPtr.
+		"""
+		if host not in self.host_memory:
+			ctx = self.runner.ctx
+			if host == 'Pinned':
+				buf = cl.Buffer(ctx, cl.mem_flags.READ_WRITE | cl.mem_flags.ALLOC_HOST_PTR, self.max_size)
+				array, event = cl.enqueue_map_buffer(self.runner.queue, buf, cl.map_flags.READ | cl.map_flags.WRITE, 0, (self.max_size,), np.uint8)
+				event.wait()
+				memory = (array, buf) # the buffer has to be kept alive while its memory is in use
+			elif host == 'HostPtr':
+				array = np.ones(self.max_size, np.uint8)
+				memory = (cl.Buffer(ctx, cl.mem_flags.READ_WRITE | cl.mem_flags.USE_HOST_PTR, hostbuf=array), array)
+			else:
+				memory = (np.ones(self.max_size, np.uint8), None)
+			self.host_memory[host] = memory
+		return self.host_memory[host][0]
+
+	def enqueue(self, name, size):
+		"""
+		Perform a single transfer of size bytes. Returns the events spanning it.
+		"""
+		direction, host = get_transfer_info(name)
+		queue = self.runner.queue
+		if direction == 'D2D':
+			return [cl.enqueue_copy(queue, self.runner.out_buf.tiles[0], self.runner.in_buf.tiles[0], byte_count=size)]
+
+		device_buf = self.runner.in_buf.tiles[0] if direction == 'H2D' else self.runner.out_buf.tiles[0]
+		memory = self.get_host_memory(host)
+		if host == 'Mapped':
+			flags = cl.map_flags.WRITE if direction == 'H2D' else cl.map_flags.READ
+			mapped, map_event = cl.enqueue_map_buffer(queue, device_buf, flags, 0, (size,), np.uint8)
+			map_event.wait()
+			if direction == 'H2D':
+				mapped[:] = memory[:size]
+			else:
+				memory[:size] = mapped
+			return [map_event, mapped.base.release(queue)]
+		elif host == 'HostPtr':
+			if direction == 'H2D':
+				return [cl.enqueue_copy(queue, device_buf, memory, byte_count=size)]
+			else:
+				return [cl.enqueue_copy(queue, memory, device_buf, byte_count=size)]
+		else:
+			if direction == 'H2D':
+				return [cl.enqueue_copy(queue, device_buf, memory[:size], is_blocking=False)]
+			else:
+				return [cl.enqueue_copy(queue, memory[:size], device_buf, is_blocking=False)]
+
+	def measure(self, name, size, runs):
+		"""
+		Perform the given number of transfers and return the time of each in nanos.
+		"""
+		transfers = [self.enqueue(name, size) for i in range(runs)]
+		cl.wait_for_events([event for events in transfers for event in events])
+		# mapped transfers span from mapping to unmapping, including the copy on the host
+		return [events[-1].profile.end - events[0].profile.start for events in transfers]
+
+	def benchmark(self, name, mem_size, sampler = None):
+		"""
+		Benchmark a transfer of mem_size bytes. Device to device transfers count each byte twice,
+		as it is both read and written in device memory, like the copy kernels.
+		"""
+		if not sampler:
+			sampler = self.runner.sampler
+		if mem_size > self.max_size:
+			raise ValueError('The memory size of {0} bytes exceeds the buffer size of {1} bytes'.format(mem_size, self.max_size))
+		direction, host = get_transfer_info(name)
+		launch = Launch(name, None, [], None, None, mem_size, mem_size * 2 if direction == 'D2D' else mem_size)
+
+		event_times, warmup = sampler.sample(lambda runs: self.measure(name, mem_size, runs))
+		datapoint = self.runner.get_datapoint(launch, event_times)
+		if direction != 'D2D':
+			# the peak bandwidth of the device memory is no bound for transfers over the bus
+			datapoint = datapoint._replace(efficiency = None)
+		return datapoint